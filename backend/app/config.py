@@ -38,15 +38,56 @@ class ClassificationSettings(BaseModel):
     # Wildlife/general animal model settings
     wildlife_model: str = Field(default="wildlife_model.tflite", description="Wildlife classification model file")
     wildlife_labels: str = Field(default="wildlife_labels.txt", description="Wildlife labels file")
+    # Inference executor settings
+    interpreter_pool_size: Optional[int] = Field(default=None, ge=1, description="Bird model interpreters and inference threads (defaults to CPU core count; the wildlife model gets a quarter)")
+    inference_queue_size: int = Field(default=32, ge=1, description="Max classification jobs queued for the inference executor")
+    batch_max_size: int = Field(default=8, ge=1, description="Max images grouped into one batched invoke (1 disables micro-batching)")
+    inference_mode: str = Field(default="thread", pattern="^(thread|process)$", description="Run bird inference in threads or in worker processes")
+    process_workers: Optional[int] = Field(default=None, ge=1, description="Worker processes in process mode (defaults to CPU core count)")
+    result_cache_size: int = Field(default=256, ge=0, description="Classification results cached by snapshot hash (0 disables)")
+    batch_max_wait_ms: float = Field(default=10.0, ge=0.0, description="Max time a classify request waits for a batch to fill")
+
+class ProcessingSettings(BaseModel):
+    # MQTT event coalescing
+    coalesce_window_ms: float = Field(default=250.0, ge=0.0, description="Quiet window for coalescing messages of the same event (0 disables)")
+    coalesce_max_delay_ms: float = Field(default=2000.0, ge=0.0, description="Max time an event's latest message is held back while updates keep arriving")
+    # Bounded work queue between MQTT intake and event processing
+    queue_max_size: int = Field(default=256, ge=1, description="Max queued events before old updates are dropped")
+    queue_workers: int = Field(default=4, ge=1, description="Number of workers feeding events into the pipeline")
+    # Per-stage limits of the event pipeline (fetch -> decode -> classify -> persist -> notify)
+    stage_queue_size: int = Field(default=64, ge=1, description="Max events waiting in front of each pipeline stage")
+    fetch_concurrency: int = Field(default=8, ge=1, description="Concurrent snapshot downloads")
+    decode_concurrency: Optional[int] = Field(default=None, ge=1, description="Concurrent snapshot decodes (default: one per CPU core)")
+    classify_concurrency: int = Field(default=16, ge=1, description="Events awaiting inference at once (lets them share batched invokes)")
+    persist_concurrency: int = Field(default=16, ge=1, description="Detections handed to the detection writer at once (it groups them into transactions)")
+    notify_concurrency: int = Field(default=8, ge=1, description="Concurrent sublabel updates/broadcasts")
+    # Write-behind persistence shared by live processing, backfill and the API
+    write_batch_size: int = Field(default=64, ge=1, description="Max queued database writes applied in one transaction")
+    write_max_wait_ms: float = Field(default=5.0, ge=0.0, description="Max time a write is held back to share a transaction with others")
+    # Latency tracing
+    store_traces: bool = Field(default=False, description="Store each detection's per-stage timings in the database")
 
 class MaintenanceSettings(BaseModel):
     retention_days: int = Field(default=0, ge=0, description="Days to keep detections (0 = unlimited)")
     cleanup_enabled: bool = Field(default=True, description="Enable automatic cleanup")
+    # Background refresh of the stored clip availability (detections.has_clip)
+    clip_reconcile_interval_seconds: int = Field(default=600, ge=10, description="Interval between clip availability refreshes")
+    clip_recheck_hours: float = Field(default=24.0, gt=0.0, description="Age after which stored clip availability is checked again")
+    clip_reconcile_batch_size: int = Field(default=100, ge=1, description="Max detections checked against Frigate per refresh")
+
+class DiagnosticsSettings(BaseModel):
+    loop_monitor_enabled: bool = Field(default=True, description="Measure event-loop lag and capture stacks of blocking code")
+    loop_monitor_interval_ms: float = Field(default=100.0, gt=0.0, description="Interval of the loop-lag probe")
+    loop_lag_threshold_ms: float = Field(default=100.0, gt=0.0, description="Lag above which the blocking stack is captured and logged")
+    profiler_enabled: bool = Field(default=False, description="Allow on-demand sampling profiles via /api/debug/profile (opt-in)")
+    profiler_max_seconds: int = Field(default=60, ge=1, description="Longest profile that may be requested")
 
 class Settings(BaseSettings):
     frigate: FrigateSettings
     classification: ClassificationSettings = ClassificationSettings()
+    processing: ProcessingSettings = ProcessingSettings()
     maintenance: MaintenanceSettings = MaintenanceSettings()
+    diagnostics: DiagnosticsSettings = DiagnosticsSettings()
     
     # General app settings
     log_level: str = "INFO"
@@ -87,6 +128,12 @@ class Settings(BaseSettings):
             'unknown_bird_labels': ["background", "Background"]
         }
 
+        # Event processing settings (loaded from file only, no env vars)
+        processing_data = {}
+
+        # Diagnostics settings (loaded from file only, no env vars)
+        diagnostics_data = {}
+
         # Load from config file if it exists, env vars take precedence
         if CONFIG_PATH.exists():
             try:
@@ -112,6 +159,16 @@ class Settings(BaseSettings):
                         if value is not None:  # Guard against null values in config
                             classification_data[key] = value
 
+                if 'processing' in file_data:
+                    for key, value in file_data['processing'].items():
+                        if value is not None:
+                            processing_data[key] = value
+
+                if 'diagnostics' in file_data:
+                    for key, value in file_data['diagnostics'].items():
+                        if value is not None:
+                            diagnostics_data[key] = value
+
                 log.info("Loaded config from file", path=str(CONFIG_PATH))
             except Exception as e:
                 log.warning("Failed to load config from file", path=str(CONFIG_PATH), error=str(e))
@@ -127,7 +184,9 @@ class Settings(BaseSettings):
         return cls(
             frigate=FrigateSettings(**frigate_data),
             classification=ClassificationSettings(**classification_data),
-            maintenance=MaintenanceSettings(**maintenance_data)
+            processing=ProcessingSettings(**processing_data),
+            maintenance=MaintenanceSettings(**maintenance_data),
+            diagnostics=DiagnosticsSettings(**diagnostics_data)
         )
 
 settings = Settings.load()
\ No newline at end of file
@@ -1,25 +1,129 @@
+import asyncio
+import time
 import aiosqlite
 import structlog
 from contextlib import asynccontextmanager
+from typing import Optional
 
 log = structlog.get_logger()
 DB_PATH = "/data/speciesid.db"
 
+# Reader connections kept open next to the single writer
+READ_POOL_SIZE = 4
+
+# Applied to every pooled connection when it is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",  # safe with WAL; fsync at checkpoints instead of every commit
+    "PRAGMA cache_size = -16000",  # 16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Bumped by migrations that rewrite existing data (stored in PRAGMA user_version)
+SCHEMA_VERSION = 3
+
+# detection_time is epoch milliseconds (UTC); utc_offset the local offset (s) at that moment.
+# clip_checked_at is epoch milliseconds as well; with has_clip NULL it is the last failed check.
+DETECTIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        detection_time INTEGER NOT NULL,
+        utc_offset INTEGER NOT NULL DEFAULT 0,
+        detection_index INTEGER NOT NULL,
+        score REAL NOT NULL,
+        display_name TEXT NOT NULL,
+        category_name TEXT NOT NULL,
+        frigate_event TEXT NOT NULL UNIQUE,
+        camera_name TEXT NOT NULL,
+        is_hidden INTEGER NOT NULL DEFAULT 0,
+        has_clip INTEGER,
+        clip_checked_at INTEGER
+    )
+"""
+
+
+# SQL converting local-time text (as written from naive datetimes) in a column to epoch ms
+_LOCAL_TEXT_TO_EPOCH_MS = "CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+
+# Pre-v1 detection_time text to (epoch ms, UTC offset s)
+_TEXT_TO_EPOCH_MS = f"""COALESCE({_LOCAL_TEXT_TO_EPOCH_MS.format(column="detection_time")},
+                                CAST(strftime('%s', 'now') AS INTEGER) * 1000)"""
+_TEXT_TO_UTC_OFFSET = "COALESCE(CAST(ROUND((julianday(detection_time) - julianday(detection_time, 'utc')) * 86400) AS INTEGER), 0)"
+
+
+DETECTION_INDEXES = (
+    # Unfiltered lists/counts and retention cleanup with hidden rows included
+    "CREATE INDEX IF NOT EXISTS idx_detections_time ON detections(detection_time DESC)",
+    # Default event list/count: visible rows by time range, newest or oldest first
+    # (is_hidden is repeated as a column so counts are index-only)
+    "CREATE INDEX IF NOT EXISTS idx_detections_visible_time ON detections(detection_time, is_hidden) WHERE is_hidden = 0",
+    # Event list sorted by confidence
+    "CREATE INDEX IF NOT EXISTS idx_detections_visible_score ON detections(score DESC, detection_time DESC) WHERE is_hidden = 0",
+    # Species filter/recent detections; utc_offset and score make the species stats index-only
+    "CREATE INDEX IF NOT EXISTS idx_detections_species_time ON detections(display_name, detection_time, utc_offset, score)",
+    "CREATE INDEX IF NOT EXISTS idx_detections_camera_time ON detections(camera_name, detection_time)",
+    # Hidden count. Partial: a full index on is_hidden looks selective to the planner
+    # and wins "is_hidden = 0" lookups that then need a sort
+    "CREATE INDEX IF NOT EXISTS idx_detections_hidden_time ON detections(detection_time) WHERE is_hidden = 1",
+    # Clip availability refresh, one partial index per branch of get_clip_check_candidates.
+    # A row is in exactly one of them, so a clip check only updates one index;
+    # has_clip is repeated as a column so the branches are index-only.
+    # Unknown availability: never checked (NULL) newest first, then failed checks oldest attempt first
+    "CREATE INDEX IF NOT EXISTS idx_detections_clip_pending ON detections(clip_checked_at, detection_time DESC, frigate_event, has_clip) WHERE has_clip IS NULL",
+    # Clips last checked before a cutoff (rechecks keep this range small)
+    "CREATE INDEX IF NOT EXISTS idx_detections_clip_stale ON detections(clip_checked_at, detection_time, frigate_event, has_clip) WHERE has_clip = 1",
+    # Recent detections without a clip (old ones are never rechecked, so range on time)
+    "CREATE INDEX IF NOT EXISTS idx_detections_clip_missing ON detections(detection_time, clip_checked_at, frigate_event, has_clip) WHERE has_clip = 0",
+)
+
+
+async def _rebuild_detections(db: aiosqlite.Connection, from_version: int):
+    """Copy detections into a table with the current schema, converting older data.
+
+    v1: detection_time as epoch ms instead of local-time text. The text was
+    written from naive local datetimes, so SQLite's 'utc' modifier (the same
+    localtime rules Python used) gives the UTC instant and the offset in
+    effect at that time, DST included. Unparseable values get the current
+    time, as reading them used to.
+    v2: is_hidden NOT NULL (NULL meant visible).
+    v3: clip_checked_at as epoch ms; unparseable values become 0 so the
+    clip is checked again.
+    """
+    if from_version < 1:
+        detection_time, utc_offset = _TEXT_TO_EPOCH_MS, _TEXT_TO_UTC_OFFSET
+    else:
+        detection_time, utc_offset = "detection_time", "utc_offset"
+    if from_version < 3:
+        clip_checked_at = f"""CASE WHEN typeof(clip_checked_at) = 'text'
+                                   THEN COALESCE({_LOCAL_TEXT_TO_EPOCH_MS.format(column="clip_checked_at")}, 0)
+                                   ELSE clip_checked_at END"""
+    else:
+        clip_checked_at = "clip_checked_at"
+    await db.execute("BEGIN")
+    await db.execute(DETECTIONS_TABLE.format(name="detections_new"))
+    await db.execute(f"""
+        INSERT INTO detections_new (id, detection_time, utc_offset, detection_index, score, display_name,
+                                    category_name, frigate_event, camera_name, is_hidden, has_clip, clip_checked_at)
+        SELECT id, {detection_time}, {utc_offset},
+               detection_index, score, display_name, category_name, frigate_event, camera_name,
+               COALESCE(is_hidden, 0), has_clip, {clip_checked_at}
+        FROM detections
+    """)
+    await db.execute("DROP TABLE detections")
+    await db.execute("ALTER TABLE detections_new RENAME TO detections")
+    await db.commit()
+
+
 async def init_db():
     async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                detection_time TIMESTAMP NOT NULL,
-                detection_index INTEGER NOT NULL,
-                score REAL NOT NULL,
-                display_name TEXT NOT NULL,
-                category_name TEXT NOT NULL,
-                frigate_event TEXT NOT NULL UNIQUE,
-                camera_name TEXT NOT NULL,
-                is_hidden INTEGER DEFAULT 0
-            )
-        """)
+        # WAL lets the pool's readers run while the writer commits (persists in the file)
+        await db.execute("PRAGMA journal_mode = WAL")
+        async with db.execute("PRAGMA user_version") as cursor:
+            version = (await cursor.fetchone())[0]
+        async with db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detections'") as cursor:
+            existing = await cursor.fetchone() is not None
+        await db.execute(DETECTIONS_TABLE.format(name="detections"))
 
         # Migration: Add is_hidden column to existing databases
         # Must run BEFORE creating the index on is_hidden
@@ -30,16 +134,225 @@ async def init_db():
             # Column already exists, ignore
             pass
 
-        # Add indexes for common query patterns (after migrations)
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_detections_time ON detections(detection_time DESC)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_detections_species ON detections(display_name)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_detections_camera ON detections(camera_name)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_detections_hidden ON detections(is_hidden)")
+        # Migration: cache Frigate's clip availability (NULL = not known yet)
+        for column in ("has_clip INTEGER", "clip_checked_at INTEGER"):
+            try:
+                await db.execute(f"ALTER TABLE detections ADD COLUMN {column}")
+                log.info("Added column to detections table", column=column)
+            except Exception:
+                # Column already exists, ignore
+                pass
+
+        # Migration: detection_time as integer epoch ms (v1), is_hidden NOT NULL (v2),
+        # clip_checked_at as epoch ms (v3)
+        if existing and version < SCHEMA_VERSION:
+            async with db.execute("SELECT COUNT(*) FROM detections") as cursor:
+                rows = (await cursor.fetchone())[0]
+            await db.commit()
+            await _rebuild_detections(db, version)
+            log.info("Migrated detections table", rows=rows, from_version=version, to_version=SCHEMA_VERSION)
+        await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        # Optional per-stage timings of each detection (processing.store_traces);
+        # recorded_at is epoch ms
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS detection_traces (
+                frigate_event TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                recorded_at INTEGER NOT NULL,
+                total_ms REAL NOT NULL,
+                trace TEXT NOT NULL
+            )
+        """)
+        if version < 3:
+            # Migration: recorded_at was local-time text before v3
+            await db.execute(f"""
+                UPDATE detection_traces
+                SET recorded_at = COALESCE({_LOCAL_TEXT_TO_EPOCH_MS.format(column="recorded_at")}, 0)
+                WHERE typeof(recorded_at) = 'text'
+            """)
+
+        # Indexes shaped after the repository's queries (after migrations); see test_query_plans.py
+        for statement in DETECTION_INDEXES:
+            await db.execute(statement)
+        # Superseded by the composite indexes above
+        for index in ("idx_detections_species", "idx_detections_camera", "idx_detections_hidden",
+                      "idx_detections_clip_unknown"):
+            await db.execute(f"DROP INDEX IF EXISTS {index}")
 
         await db.commit()
         log.info("Database initialized", path=DB_PATH)
 
+
+class DatabasePool:
+    """Long-lived SQLite connections: one writer and a few readers.
+
+    Opening a connection costs a thread, a file open and a schema parse, so
+    they are opened once and reused. SQLite allows one writer at a time, so
+    writes share a single connection behind a lock (no "database is locked"
+    retries); in WAL mode readers don't wait for it.
+    """
+
+    def __init__(self, path: str, readers: int = READ_POOL_SIZE):
+        self.path = path
+        self.size = max(1, readers)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._free: list[aiosqlite.Connection] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._read_slots: Optional[asyncio.Semaphore] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._opened = False
+
+        # Stats
+        self.writes = 0
+        self.reads = 0
+        self.write_wait_ms = 0.0
+        self.read_wait_ms = 0.0
+        self.max_write_wait_ms = 0.0
+        self.max_read_wait_ms = 0.0
+        self.rollbacks = 0
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.path)
+        # Don't let an unclosed pool keep the interpreter alive
+        conn.daemon = True
+        await conn
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        if read_only:
+            await conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    async def open(self):
+        self._bind_loop()
+        async with self._open_lock:
+            if self._opened:
+                return
+            self._writer = await self._connect(read_only=False)
+            self._readers = [await self._connect(read_only=True) for _ in range(self.size)]
+            self._free = list(self._readers)
+            self._opened = True
+        log.info("Database pool opened", path=self.path, readers=self.size)
+
+    def _bind_loop(self):
+        # Locks belong to one event loop; tests (and TestClient) may use several in turn
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._write_lock = asyncio.Lock()
+            self._read_slots = asyncio.Semaphore(self.size)
+            self._open_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def writer(self):
+        """The writer connection, held exclusively; rolled back if the block fails."""
+        if not self._opened:
+            await self.open()
+        self._bind_loop()
+        started = time.perf_counter()
+        async with self._write_lock:
+            waited = (time.perf_counter() - started) * 1000
+            self.writes += 1
+            self.write_wait_ms += waited
+            self.max_write_wait_ms = max(self.max_write_wait_ms, waited)
+            try:
+                yield self._writer
+            except BaseException:
+                if self._writer.in_transaction:
+                    self.rollbacks += 1
+                    await self._writer.rollback()
+                raise
+
+    @asynccontextmanager
+    async def reader(self):
+        """A read-only connection from the pool."""
+        if not self._opened:
+            await self.open()
+        self._bind_loop()
+        started = time.perf_counter()
+        async with self._read_slots:
+            waited = (time.perf_counter() - started) * 1000
+            self.reads += 1
+            self.read_wait_ms += waited
+            self.max_read_wait_ms = max(self.max_read_wait_ms, waited)
+            conn = self._free.pop()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    await conn.rollback()
+                self._free.append(conn)
+
+    async def close(self):
+        if not self._opened:
+            return
+        for conn in [self._writer, *self._readers]:
+            try:
+                await conn.close()
+            except Exception as e:
+                log.warning("Failed to close database connection", error=str(e))
+        self._writer = None
+        self._readers = []
+        self._free = []
+        self._opened = False
+        log.info("Database pool closed", path=self.path)
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "open": self._opened,
+            "readers": self.size,
+            "readers_in_use": (self.size - len(self._free)) if self._opened else 0,
+            "writer_busy": bool(self._write_lock and self._write_lock.locked()),
+            "writes": self.writes,
+            "reads": self.reads,
+            "avg_write_wait_ms": (self.write_wait_ms / self.writes) if self.writes else 0.0,
+            "max_write_wait_ms": self.max_write_wait_ms,
+            "avg_read_wait_ms": (self.read_wait_ms / self.reads) if self.reads else 0.0,
+            "max_read_wait_ms": self.max_read_wait_ms,
+            "rollbacks": self.rollbacks,
+        }
+
+
+_pool: Optional[DatabasePool] = None
+
+
+async def get_pool() -> DatabasePool:
+    """Get the shared pool for DB_PATH (reopened if DB_PATH was changed)."""
+    global _pool
+    if _pool is not None and _pool.path != DB_PATH:
+        await _pool.close()
+        _pool = None
+    if _pool is None:
+        _pool = DatabasePool(DB_PATH)
+    return _pool
+
+
+async def close_db():
+    """Close the pooled connections (app shutdown)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_pool_stats() -> dict:
+    return _pool.get_stats() if _pool is not None else {"path": DB_PATH, "open": False}
+
+
 @asynccontextmanager
 async def get_db():
-    async with aiosqlite.connect(DB_PATH) as db:
+    """Connection for writes (and reads that must see them), shared one at a time."""
+    pool = await get_pool()
+    async with pool.writer() as db:
+        yield db
+
+
+@asynccontextmanager
+async def get_read_db():
+    """Read-only connection; may run alongside writes and other reads."""
+    pool = await get_pool()
+    async with pool.reader() as db:
         yield db
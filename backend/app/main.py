@@ -1,4 +1,5 @@
 from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import structlog
 import asyncio
@@ -6,21 +7,88 @@ import os
 import subprocess
 from datetime import datetime, timedelta
 
-from app.database import init_db, get_db
+from app.database import init_db, get_db, close_db, get_pool_stats
 from app.services.mqtt_service import MQTTService
 from app.services.classifier_service import get_classifier
 from app.services.event_processor import EventProcessor
+from app.services.frigate_client import get_frigate_client
+from app.services.clip_reconciler import get_clip_reconciler
+from app.services.detection_writer import get_detection_writer
+from app.services.event_coalescer import EventCoalescer
+from app.services.event_queue import EventQueue
+from app.services.loop_monitor import LoopLagMonitor
+from app.services.metrics import detection_latency, registry
+from app.services.broadcaster import broadcaster
 from app.repositories.detection_repository import DetectionRepository
-from app.routers import events, stream, proxy, settings as settings_router, species, backfill
+from app.routers import events, stream, proxy, settings as settings_router, species, backfill, debug
 from app.config import settings
 from contextlib import asynccontextmanager
 
 # Use shared classifier instance
 classifier_service = get_classifier()
 event_processor = EventProcessor(classifier_service)
+# Bounded queue so MQTT intake never waits on snapshot fetches/classification;
+# its workers feed the event processor's staged pipeline
+event_queue = EventQueue(
+    event_processor.submit_mqtt_message,
+    max_size=settings.processing.queue_max_size,
+    workers=settings.processing.queue_workers
+)
+# Collapses bursts of MQTT messages for the same Frigate event before queueing
+event_coalescer = EventCoalescer(
+    event_queue.put,
+    quiet_window_ms=settings.processing.coalesce_window_ms,
+    max_delay_ms=settings.processing.coalesce_max_delay_ms
+)
 mqtt_service = MQTTService()
+# Finds code that blocks the event loop (inference, PIL, file I/O) in production
+loop_monitor = LoopLagMonitor(
+    interval_ms=settings.diagnostics.loop_monitor_interval_ms,
+    threshold_ms=settings.diagnostics.loop_lag_threshold_ms
+)
 log = structlog.get_logger()
 
+
+def _cache_stat(key: str) -> float:
+    return classifier_service.get_inference_stats()["cache"][key]
+
+
+# Scrape-time views of existing stats (no cost on the hot path)
+registry.gauge("yawamf_sse_subscribers", "Connected SSE clients",
+               callback=lambda: len(broadcaster.queues))
+registry.gauge("yawamf_sse_queued_messages", "Messages waiting in SSE client queues",
+               callback=lambda: sum(q.qsize() for q in list(broadcaster.queues)))
+registry.gauge("yawamf_event_queue_depth", "Events waiting in the intake queue",
+               callback=lambda: event_queue.depth)
+registry.counter("yawamf_event_queue_dropped_total", "Events dropped by the intake queue on overflow",
+                 callback=lambda: event_queue.dropped)
+registry.gauge("yawamf_coalescer_pending_events", "Events held back by the MQTT coalescer",
+               callback=lambda: event_coalescer.get_stats()["pending_events"])
+registry.gauge("yawamf_pipeline_stage_depth", "Events waiting in front of each pipeline stage", ("stage",),
+               callback=lambda: {stage.name: stage.depth for stage in event_processor.pipeline.stages})
+registry.gauge("yawamf_inference_queue_depth", "Inference jobs waiting for a thread",
+               callback=lambda: classifier_service.get_inference_stats()["queue_depth"])
+registry.gauge("yawamf_event_loop_lag_quantile_seconds", "Event loop lag percentiles since startup", ("quantile",),
+               callback=loop_monitor.lag_quantiles)
+registry.counter("yawamf_classification_cache_hits_total", "Classification result cache hits",
+                 callback=lambda: _cache_stat("hits"))
+registry.counter("yawamf_classification_cache_misses_total", "Classification result cache misses",
+                 callback=lambda: _cache_stat("misses"))
+registry.gauge("yawamf_classification_cache_hit_ratio", "Classification result cache hit ratio",
+               callback=lambda: _cache_stat("hit_ratio"))
+registry.gauge("yawamf_db_readers_in_use", "Pooled read connections currently checked out",
+               callback=lambda: get_pool_stats().get("readers_in_use", 0))
+registry.gauge("yawamf_db_writer_busy", "1 while the pooled writer connection is held",
+               callback=lambda: int(get_pool_stats().get("writer_busy", False)))
+registry.gauge("yawamf_db_writes_pending", "Writes queued for the next write-behind batch",
+               callback=lambda: get_detection_writer().pending)
+registry.counter("yawamf_db_write_batches_total", "Transactions committed by the write-behind writer",
+                 callback=lambda: get_detection_writer().batches)
+registry.gauge("yawamf_frigate_circuit_state", "Frigate circuit breaker state (0 closed, 1 half-open, 2 open)",
+               callback=lambda: {"closed": 0, "half_open": 1, "open": 2}[get_frigate_client().breaker.state])
+registry.counter("yawamf_frigate_requests_rejected_total", "Frigate requests rejected by the open circuit",
+                 callback=lambda: get_frigate_client().breaker.rejected)
+
 # Version management
 BASE_VERSION = "2.0.0"
 
@@ -69,6 +137,7 @@ async def cleanup_old_detections():
                     async with get_db() as db:
                         repo = DetectionRepository(db)
                         deleted_count = await repo.delete_older_than(cutoff)
+                        await repo.delete_traces_older_than(cutoff)
                     if deleted_count > 0:
                         log.info("Automatic cleanup completed",
                                 deleted_count=deleted_count,
@@ -87,7 +156,11 @@ async def lifespan(app: FastAPI):
     global cleanup_task, cleanup_running
     # Startup
     await init_db()
-    asyncio.create_task(mqtt_service.start(event_processor.process_mqtt_message))
+    if settings.diagnostics.loop_monitor_enabled:
+        loop_monitor.start()
+    event_queue.start()
+    get_clip_reconciler().start()
+    asyncio.create_task(mqtt_service.start(event_coalescer.submit))
     cleanup_task = asyncio.create_task(cleanup_old_detections())
     log.info("Background cleanup task started",
              retention_days=settings.maintenance.retention_days,
@@ -101,8 +174,18 @@ async def lifespan(app: FastAPI):
             await cleanup_task
         except asyncio.CancelledError:
             pass
-    await event_processor.close()
     await mqtt_service.stop()
+    await event_coalescer.flush_all()
+    await event_queue.stop()
+    await event_processor.close()
+    await get_clip_reconciler().stop()
+    # Commit queued writes before the pool goes away
+    await get_detection_writer().close()
+    await get_frigate_client().aclose()
+    await close_db()
+    await loop_monitor.stop()
+    # Waits for worker processes to exit
+    await asyncio.to_thread(classifier_service.shutdown)
 
 app = FastAPI(title="Yet Another WhosAtMyFeeder API", version=APP_VERSION, lifespan=lifespan)
 
@@ -124,6 +207,7 @@ app.include_router(proxy.router, prefix="/api")
 app.include_router(settings_router.router, prefix="/api")
 app.include_router(species.router, prefix="/api")
 app.include_router(backfill.router, prefix="/api", tags=["backfill"])
+app.include_router(debug.router, prefix="/api", tags=["debug"])
 
 @app.get("/health")
 async def health_check():
@@ -138,6 +222,28 @@ async def get_version():
         "git_hash": GIT_HASH
     }
 
+@app.get("/api/processing/status")
+async def processing_status():
+    """Return MQTT event processing counters."""
+    return {
+        **event_processor.get_stats(),
+        "coalescer": event_coalescer.get_stats(),
+        "queue": event_queue.get_stats(),
+        "latency_ms": detection_latency.get_stats(),
+        "frigate": get_frigate_client().get_stats(),
+        "clip_reconciler": get_clip_reconciler().get_stats(),
+    }
+
+@app.get("/api/diagnostics/event-loop")
+async def event_loop_status():
+    """Return event-loop lag percentiles and the stacks that blocked the loop the longest."""
+    return loop_monitor.get_stats()
+
+@app.get("/api/diagnostics/database")
+async def database_status():
+    """Return health and wait times of the database connection pool and the write-behind queue."""
+    return {**get_pool_stats(), "writer": get_detection_writer().get_stats()}
+
 @app.get("/api/classifier/status")
 async def classifier_status():
     """Return the status of the bird classifier model."""
@@ -174,21 +280,12 @@ async def bird_classifier_debug():
         output_details = bird.output_details[0]
 
         # Create a simple test image
-        target_height, target_width = input_details['shape'][1], input_details['shape'][2]
+        target_width, target_height = bird._target_size()
         test_img = Image.new('RGB', (target_width, target_height), color=(100, 150, 200))
+        img_array = np.expand_dims(np.array(test_img, dtype=np.uint8), axis=0)
 
-        # Prepare input based on model dtype
-        if input_details['dtype'] == np.uint8:
-            img_array = np.array(test_img, dtype=np.uint8)
-        else:
-            img_array = np.array(test_img, dtype=np.float32)
-            img_array = (img_array - 127.0) / 128.0
-        img_array = np.expand_dims(img_array, axis=0)
-
-        # Run inference
-        bird.interpreter.set_tensor(input_details['index'], img_array)
-        bird.interpreter.invoke()
-        raw_output = bird.interpreter.get_tensor(output_details['index'])
+        # Run inference on the inference executor (normalized to the model's input dtype there)
+        raw_output = await classifier_service.invoke_raw_async(bird, img_array)
 
         # Get stats on raw output
         raw_squeezed = np.squeeze(raw_output).astype(np.float32)
@@ -251,13 +348,15 @@ async def test_bird_classifier(image: UploadFile = File(...)):
     try:
         contents = await image.read()
         pil_image = Image.open(io.BytesIO(contents))
+        # Preprocessing may decode the JPEG at reduced size; report the original
+        image_size, image_mode = pil_image.size, pil_image.mode
 
-        results = classifier_service.classify(pil_image)
+        results = await classifier_service.classify_async(pil_image)
 
         return {
             "status": "ok",
-            "image_size": pil_image.size,
-            "image_mode": pil_image.mode,
+            "image_size": image_size,
+            "image_mode": image_mode,
             "results": results
         }
     except Exception as e:
@@ -282,14 +381,11 @@ async def wildlife_classifier_debug():
         output_details = wildlife.output_details[0]
 
         # Create a simple test image (solid red)
-        test_img = Image.new('RGB', (224, 224), color=(255, 0, 0))
-        img_array = np.array(test_img, dtype=np.uint8)
-        img_array = np.expand_dims(img_array, axis=0)
+        test_img = Image.new('RGB', wildlife._target_size(), color=(255, 0, 0))
+        img_array = np.expand_dims(np.array(test_img, dtype=np.uint8), axis=0)
 
-        # Run inference
-        wildlife.interpreter.set_tensor(input_details['index'], img_array)
-        wildlife.interpreter.invoke()
-        raw_output = wildlife.interpreter.get_tensor(output_details['index'])
+        # Run inference on the inference executor
+        raw_output = await classifier_service.invoke_raw_async(wildlife, img_array)
 
         # Get stats on raw output
         raw_squeezed = np.squeeze(raw_output)
@@ -333,13 +429,15 @@ async def test_wildlife_classifier(image: UploadFile = File(...)):
     try:
         contents = await image.read()
         pil_image = Image.open(io.BytesIO(contents))
+        # Preprocessing may decode the JPEG at reduced size; report the original
+        image_size, image_mode = pil_image.size, pil_image.mode
 
-        results = classifier_service.classify_wildlife(pil_image)
+        results = await classifier_service.classify_wildlife_async(pil_image)
 
         return {
             "status": "ok",
-            "image_size": pil_image.size,
-            "image_mode": pil_image.mode,
+            "image_size": image_size,
+            "image_mode": image_mode,
             "results": results
         }
     except Exception as e:
@@ -447,6 +545,8 @@ async def download_wildlife_model():
                 for label in processed_labels:
                     f.write(f"{label}\n")
 
+            await classifier_service.reload_model("wildlife")
+
             log.info("Wildlife model downloaded and ready",
                      labels_count=len(processed_labels),
                      model_size_mb=len(tflite_content) / (1024 * 1024))
@@ -562,7 +662,7 @@ async def download_default_model():
                 f.write(f"{label}\n")
 
         # Reload the classifier
-        classifier_service._load_model()
+        await classifier_service.reload_model("bird")
 
         log.info("Model downloaded and loaded successfully")
         return {
@@ -577,8 +677,8 @@ async def download_default_model():
         log.error("Failed to download model", error=str(e))
         return {"status": "error", "message": str(e)}
 
-@app.get("/metrics")
+@app.get("/metrics", response_class=PlainTextResponse)
 async def metrics():
-    # Placeholder for Prometheus metrics
-    return "events_processed_total 0\n"
+    """Prometheus metrics in the text exposition format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
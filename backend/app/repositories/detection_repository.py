@@ -1,8 +1,12 @@
+import json
+import time
 from typing import Optional
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 import aiosqlite
 
+from app.services.metrics import db_query_duration, instrument_methods
+
 @dataclass
 class Detection:
     detection_time: datetime
@@ -14,47 +18,63 @@ class Detection:
     camera_name: str
     id: Optional[int] = None
     is_hidden: bool = False
+    has_clip: Optional[bool] = None  # None until known from Frigate
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Columns read into a Detection, in _row_to_detection order
+DETECTION_COLUMNS = "id, detection_time, detection_index, score, display_name, category_name, frigate_event, camera_name, is_hidden, has_clip, utc_offset"
+
+# Local wall-clock milliseconds of a row, for bucketing by hour/day as the user saw them
+_LOCAL_MS = "(detection_time + utc_offset * 1000)"
+
 
+def _to_epoch_ms(value: datetime) -> tuple[int, int]:
+    """Epoch milliseconds (UTC) and UTC offset (s) of a datetime; naive values are local time."""
+    aware = value if value.tzinfo is not None else value.astimezone()
+    return round(aware.timestamp() * 1000), int(aware.utcoffset().total_seconds())
 
-def _parse_datetime(value) -> datetime:
-    """Parse datetime from SQLite storage format."""
-    if isinstance(value, datetime):
-        return value
-    if isinstance(value, str):
-        # Try ISO format first, then common SQLite formats
-        for fmt in (None, "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
-            try:
-                if fmt is None:
-                    return datetime.fromisoformat(value)
-                return datetime.strptime(value, fmt)
-            except ValueError:
-                continue
-    # Return current time as fallback (shouldn't happen with valid data)
-    return datetime.now()
+
+def _epoch_ms(value: datetime) -> int:
+    return _to_epoch_ms(value)[0]
+
+
+def _now_ms() -> int:
+    return round(time.time() * 1000)
+
+
+def _from_epoch_ms(epoch_ms: int, utc_offset: Optional[int] = None) -> datetime:
+    """Naive local datetime of a stored time, at its stored offset (or this system's if unknown)."""
+    if utc_offset is None:
+        return datetime.fromtimestamp(epoch_ms / 1000)
+    return _EPOCH + timedelta(milliseconds=epoch_ms + utc_offset * 1000)
 
 
 def _row_to_detection(row) -> Detection:
     """Convert a database row to a Detection object."""
     return Detection(
         id=row[0],
-        detection_time=_parse_datetime(row[1]),
+        detection_time=_from_epoch_ms(row[1], row[10] if len(row) > 10 else None),
         detection_index=row[2],
         score=row[3],
         display_name=row[4],
         category_name=row[5],
         frigate_event=row[6],
         camera_name=row[7],
-        is_hidden=bool(row[8]) if len(row) > 8 else False
+        is_hidden=bool(row[8]) if len(row) > 8 else False,
+        has_clip=bool(row[9]) if len(row) > 9 and row[9] is not None else None
     )
 
 
+@instrument_methods(db_query_duration, "DetectionRepository")
 class DetectionRepository:
     def __init__(self, db: aiosqlite.Connection):
         self.db = db
 
     async def get_by_frigate_event(self, frigate_event: str) -> Optional[Detection]:
         async with self.db.execute(
-            "SELECT id, detection_time, detection_index, score, display_name, category_name, frigate_event, camera_name, is_hidden FROM detections WHERE frigate_event = ?",
+            f"SELECT {DETECTION_COLUMNS} FROM detections WHERE frigate_event = ?",
             (frigate_event,)
         ) as cursor:
             row = await cursor.fetchone()
@@ -62,7 +82,7 @@ class DetectionRepository:
                 return _row_to_detection(row)
             return None
 
-    async def toggle_hidden(self, frigate_event: str) -> Optional[bool]:
+    async def toggle_hidden(self, frigate_event: str, commit: bool = True) -> Optional[bool]:
         """Toggle the hidden status of a detection. Returns new hidden status or None if not found."""
         detection = await self.get_by_frigate_event(frigate_event)
         if not detection:
@@ -73,7 +93,8 @@ class DetectionRepository:
             "UPDATE detections SET is_hidden = ? WHERE frigate_event = ?",
             (1 if new_status else 0, frigate_event)
         )
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
         return new_status
 
     async def get_hidden_count(self) -> int:
@@ -86,30 +107,149 @@ class DetectionRepository:
 
     async def delete_by_id(self, detection_id: int) -> bool:
         """Delete a detection by ID. Returns True if deleted."""
-        await self.db.execute("DELETE FROM detections WHERE id = ?", (detection_id,))
+        cursor = await self.db.execute("DELETE FROM detections WHERE id = ?", (detection_id,))
         await self.db.commit()
-        return self.db.total_changes > 0
+        return cursor.rowcount > 0
 
-    async def delete_by_frigate_event(self, frigate_event: str) -> bool:
+    async def delete_by_frigate_event(self, frigate_event: str, commit: bool = True) -> bool:
         """Delete a detection by Frigate event ID. Returns True if deleted."""
-        await self.db.execute("DELETE FROM detections WHERE frigate_event = ?", (frigate_event,))
-        await self.db.commit()
-        return self.db.total_changes > 0
+        cursor = await self.db.execute("DELETE FROM detections WHERE frigate_event = ?", (frigate_event,))
+        if commit:
+            await self.db.commit()
+        return cursor.rowcount > 0
 
-    async def create(self, detection: Detection):
+    async def create(self, detection: Detection, commit: bool = True):
+        clip_checked_at = _now_ms() if detection.has_clip is not None else None
+        detection_time, utc_offset = _to_epoch_ms(detection.detection_time)
         await self.db.execute("""
-            INSERT INTO detections (detection_time, detection_index, score, display_name, category_name, frigate_event, camera_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (detection.detection_time, detection.detection_index, detection.score, detection.display_name, detection.category_name, detection.frigate_event, detection.camera_name))
-        await self.db.commit()
+            INSERT INTO detections (detection_time, utc_offset, detection_index, score, display_name, category_name, frigate_event, camera_name, has_clip, clip_checked_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (detection_time, utc_offset, detection.detection_index, detection.score, detection.display_name, detection.category_name, detection.frigate_event, detection.camera_name, detection.has_clip, clip_checked_at))
+        if commit:
+            await self.db.commit()
 
-    async def update(self, detection: Detection):
+    async def update(self, detection: Detection, commit: bool = True):
+        # Unknown clip availability (None) keeps the stored value
+        clip_checked_at = _now_ms() if detection.has_clip is not None else None
+        detection_time, utc_offset = _to_epoch_ms(detection.detection_time)
         await self.db.execute("""
             UPDATE detections 
-            SET detection_time = ?, detection_index = ?, score = ?, display_name = ?, category_name = ?
+            SET detection_time = ?, utc_offset = ?, detection_index = ?, score = ?, display_name = ?, category_name = ?,
+                has_clip = COALESCE(?, has_clip), clip_checked_at = COALESCE(?, clip_checked_at)
             WHERE frigate_event = ?
-        """, (detection.detection_time, detection.detection_index, detection.score, detection.display_name, detection.category_name, detection.frigate_event))
-        await self.db.commit()
+        """, (detection_time, utc_offset, detection.detection_index, detection.score, detection.display_name, detection.category_name, detection.has_clip, clip_checked_at, detection.frigate_event))
+        if commit:
+            await self.db.commit()
+
+    async def upsert(self, detection: Detection, commit: bool = True) -> str:
+        """Create the detection, or improve the stored one if the score is higher.
+
+        Returns 'created', 'updated' or 'unchanged'.
+        """
+        return (await self.upsert_many([detection], commit=commit))[0]
+
+    async def upsert_many(self, detections: list[Detection], commit: bool = True) -> list[str]:
+        """Upsert detections with one statement each; returns one outcome per detection.
+
+        Existing rows are only overwritten by a higher score, decided by
+        SQLite in the same statement, so concurrent updates of an event
+        can't undo each other. Rows that keep their score still take on a
+        known clip availability. Inserted and updated rows are told apart by
+        id: new rows get ids above the MAX(id) read beforehand, which holds
+        because all writes go through one connection.
+        """
+        async with self.db.execute("SELECT COALESCE(MAX(id), 0) FROM detections") as cursor:
+            max_id = (await cursor.fetchone())[0]
+
+        now = _now_ms()
+        outcomes = []
+        created = set()  # ids inserted by this call; the same event may come again
+        clip_only = {}
+        for detection in detections:
+            clip_checked_at = now if detection.has_clip is not None else None
+            detection_time, utc_offset = _to_epoch_ms(detection.detection_time)
+            async with self.db.execute("""
+                INSERT INTO detections (detection_time, utc_offset, detection_index, score, display_name, category_name, frigate_event, camera_name, has_clip, clip_checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(frigate_event) DO UPDATE SET
+                    detection_time = excluded.detection_time, utc_offset = excluded.utc_offset, detection_index = excluded.detection_index,
+                    score = excluded.score, display_name = excluded.display_name, category_name = excluded.category_name,
+                    has_clip = COALESCE(excluded.has_clip, has_clip),
+                    clip_checked_at = COALESCE(excluded.clip_checked_at, clip_checked_at)
+                WHERE excluded.score > detections.score
+                RETURNING id
+            """, (detection_time, utc_offset, detection.detection_index, detection.score, detection.display_name, detection.category_name, detection.frigate_event, detection.camera_name, detection.has_clip, clip_checked_at)) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                outcomes.append("unchanged")
+                if detection.has_clip is not None:
+                    clip_only[detection.frigate_event] = detection.has_clip
+            elif row[0] > max_id and row[0] not in created:
+                created.add(row[0])
+                outcomes.append("created")
+            else:
+                outcomes.append("updated")
+
+        if clip_only:
+            await self.set_clip_availability(clip_only, commit=False)
+        if commit:
+            await self.db.commit()
+        return outcomes
+
+    async def set_clip_availability(self, availability: dict[str, bool], commit: bool = True):
+        """Store whether Frigate has a clip for each frigate_event."""
+        now = _now_ms()
+        await self.db.executemany(
+            "UPDATE detections SET has_clip = ?, clip_checked_at = ? WHERE frigate_event = ?",
+            [(1 if has_clip else 0, now, frigate_event) for frigate_event, has_clip in availability.items()]
+        )
+        if commit:
+            await self.db.commit()
+
+    async def mark_clip_check_failed(self, frigate_events: list[str], commit: bool = True):
+        """Stamp clip_checked_at on events whose availability is still unknown after a failed check."""
+        now = _now_ms()
+        await self.db.executemany(
+            "UPDATE detections SET clip_checked_at = ? WHERE frigate_event = ? AND has_clip IS NULL",
+            [(now, frigate_event) for frigate_event in frigate_events]
+        )
+        if commit:
+            await self.db.commit()
+
+    async def get_clip_check_candidates(self, stale_before: datetime, recent_after: datetime, limit: int = 100) -> list[str]:
+        """Events whose clip availability is unknown or was last checked before ``stale_before``.
+
+        Stale rows without a clip are only rechecked for detections after
+        ``recent_after`` (a clip can show up after the event ends); stale
+        clips are always rechecked because Frigate's retention removes them.
+        Never-checked rows come first, then stale rows (most recent first),
+        then rows whose earlier checks failed, least recently tried first, so
+        events Frigate can't answer for rotate instead of crowding out the rest.
+
+        Each case is its own branch so it can use its partial index
+        (idx_detections_clip_*); only up to ``limit`` rows per branch are merged.
+        """
+        async with self.db.execute(
+            """SELECT frigate_event FROM (
+                   SELECT * FROM (SELECT frigate_event, IIF(clip_checked_at IS NULL, 0, 2) AS rank,
+                                         clip_checked_at AS tried_at, detection_time FROM detections
+                                  WHERE has_clip IS NULL
+                                  ORDER BY clip_checked_at, detection_time DESC LIMIT :limit)
+                   UNION ALL
+                   SELECT * FROM (SELECT frigate_event, 1 AS rank, NULL AS tried_at, detection_time FROM detections
+                                  WHERE has_clip = 1 AND clip_checked_at < :stale_before
+                                  ORDER BY detection_time DESC LIMIT :limit)
+                   UNION ALL
+                   SELECT * FROM (SELECT frigate_event, 1 AS rank, NULL AS tried_at, detection_time FROM detections
+                                  WHERE has_clip = 0 AND detection_time >= :recent_after AND clip_checked_at < :stale_before
+                                  ORDER BY detection_time DESC LIMIT :limit)
+               )
+               ORDER BY rank, tried_at, detection_time DESC
+               LIMIT :limit""",
+            {"stale_before": _epoch_ms(stale_before), "recent_after": _epoch_ms(recent_after), "limit": limit}
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [row[0] for row in rows]
 
     async def get_all(
         self,
@@ -122,20 +262,20 @@ class DetectionRepository:
         sort: str = "newest",
         include_hidden: bool = False
     ) -> list[Detection]:
-        query = "SELECT id, detection_time, detection_index, score, display_name, category_name, frigate_event, camera_name, is_hidden FROM detections"
+        query = f"SELECT {DETECTION_COLUMNS} FROM detections"
         params: list = []
         conditions = []
 
         # By default, exclude hidden detections
         if not include_hidden:
-            conditions.append("(is_hidden = 0 OR is_hidden IS NULL)")
+            conditions.append("is_hidden = 0")
 
         if start_date:
             conditions.append("detection_time >= ?")
-            params.append(start_date.isoformat())
+            params.append(_epoch_ms(start_date))
         if end_date:
             conditions.append("detection_time <= ?")
-            params.append(end_date.isoformat())
+            params.append(_epoch_ms(end_date))
         if species:
             conditions.append("display_name = ?")
             params.append(species)
@@ -176,14 +316,14 @@ class DetectionRepository:
 
         # By default, exclude hidden detections
         if not include_hidden:
-            conditions.append("(is_hidden = 0 OR is_hidden IS NULL)")
+            conditions.append("is_hidden = 0")
 
         if start_date:
             conditions.append("detection_time >= ?")
-            params.append(start_date.isoformat())
+            params.append(_epoch_ms(start_date))
         if end_date:
             conditions.append("detection_time <= ?")
-            params.append(end_date.isoformat())
+            params.append(_epoch_ms(end_date))
         if species:
             conditions.append("display_name = ?")
             params.append(species)
@@ -218,7 +358,7 @@ class DetectionRepository:
         """Delete detections older than the cutoff date. Returns count of deleted rows."""
         async with self.db.execute(
             "SELECT COUNT(*) FROM detections WHERE detection_time < ?",
-            (cutoff_date.isoformat(),)
+            (_epoch_ms(cutoff_date),)
         ) as cursor:
             row = await cursor.fetchone()
             count = row[0] if row else 0
@@ -226,7 +366,7 @@ class DetectionRepository:
         if count > 0:
             await self.db.execute(
                 "DELETE FROM detections WHERE detection_time < ?",
-                (cutoff_date.isoformat(),)
+                (_epoch_ms(cutoff_date),)
             )
             await self.db.commit()
 
@@ -235,11 +375,12 @@ class DetectionRepository:
     async def get_oldest_detection_date(self) -> datetime | None:
         """Get the date of the oldest detection."""
         async with self.db.execute(
-            "SELECT MIN(detection_time) FROM detections"
+            # A lone MIN() makes SQLite return utc_offset from the same row
+            "SELECT MIN(detection_time), utc_offset FROM detections"
         ) as cursor:
             row = await cursor.fetchone()
-            if row and row[0]:
-                return _parse_datetime(row[0])
+            if row and row[0] is not None:
+                return _from_epoch_ms(row[0], row[1])
             return None
 
     async def get_species_counts(self) -> list[dict]:
@@ -250,9 +391,12 @@ class DetectionRepository:
             return [{"species": row[0], "count": row[1]} for row in rows]
 
     async def get_species_basic_stats(self, species_name: str) -> dict:
-        """Get basic stats for a species: count, min/max dates, confidence stats."""
+        """Get basic stats for a species: count, min/max dates, confidence stats.
+
+        First/last seen are local wall-clock times at each detection's own UTC offset.
+        """
         async with self.db.execute(
-            """SELECT COUNT(*), MIN(detection_time), MAX(detection_time),
+            f"""SELECT COUNT(*), MIN({_LOCAL_MS}), MAX({_LOCAL_MS}),
                       AVG(score), MAX(score), MIN(score)
                FROM detections WHERE display_name = ?""",
             (species_name,)
@@ -261,8 +405,9 @@ class DetectionRepository:
             if row and row[0] > 0:
                 return {
                     "total": row[0],
-                    "first_seen": _parse_datetime(row[1]) if row[1] else None,
-                    "last_seen": _parse_datetime(row[2]) if row[2] else None,
+                    # Already shifted to local time
+                    "first_seen": _from_epoch_ms(row[1], 0) if row[1] is not None else None,
+                    "last_seen": _from_epoch_ms(row[2], 0) if row[2] is not None else None,
                     "avg_confidence": row[3] or 0.0,
                     "max_confidence": row[4] or 0.0,
                     "min_confidence": row[5] or 0.0,
@@ -298,7 +443,7 @@ class DetectionRepository:
     async def get_hourly_distribution(self, species_name: str) -> list[int]:
         """Get 24-element list of detection counts per hour."""
         async with self.db.execute(
-            """SELECT strftime('%H', detection_time) as hour, COUNT(*)
+            f"""SELECT {_LOCAL_MS} / 3600000 % 24 as hour, COUNT(*)
                FROM detections WHERE display_name = ?
                GROUP BY hour""",
             (species_name,)
@@ -313,7 +458,8 @@ class DetectionRepository:
     async def get_daily_distribution(self, species_name: str) -> list[int]:
         """Get 7-element list of detection counts per day of week (0=Sunday)."""
         async with self.db.execute(
-            """SELECT strftime('%w', detection_time) as dow, COUNT(*)
+            # 1970-01-01 was a Thursday (4)
+            f"""SELECT ({_LOCAL_MS} / 86400000 + 4) % 7 as dow, COUNT(*)
                FROM detections WHERE display_name = ?
                GROUP BY dow""",
             (species_name,)
@@ -328,7 +474,7 @@ class DetectionRepository:
     async def get_monthly_distribution(self, species_name: str) -> list[int]:
         """Get 12-element list of detection counts per month (1-12)."""
         async with self.db.execute(
-            """SELECT strftime('%m', detection_time) as month, COUNT(*)
+            f"""SELECT strftime('%m', {_LOCAL_MS} / 1000, 'unixepoch') as month, COUNT(*)
                FROM detections WHERE display_name = ?
                GROUP BY month""",
             (species_name,)
@@ -343,18 +489,43 @@ class DetectionRepository:
     async def get_recent_by_species(self, species_name: str, limit: int = 5, include_hidden: bool = False) -> list[Detection]:
         """Get most recent detections for a species."""
         if include_hidden:
-            query = """SELECT id, detection_time, detection_index, score, display_name,
-                          category_name, frigate_event, camera_name, is_hidden
+            query = f"""SELECT {DETECTION_COLUMNS}
                    FROM detections WHERE display_name = ?
                    ORDER BY detection_time DESC LIMIT ?"""
             params = (species_name, limit)
         else:
-            query = """SELECT id, detection_time, detection_index, score, display_name,
-                          category_name, frigate_event, camera_name, is_hidden
-                   FROM detections WHERE display_name = ? AND (is_hidden = 0 OR is_hidden IS NULL)
+            query = f"""SELECT {DETECTION_COLUMNS}
+                   FROM detections WHERE display_name = ? AND is_hidden = 0
                    ORDER BY detection_time DESC LIMIT ?"""
             params = (species_name, limit)
 
         async with self.db.execute(query, params) as cursor:
             rows = await cursor.fetchall()
             return [_row_to_detection(row) for row in rows]
+
+    async def save_trace(self, frigate_event: str, trace: dict, commit: bool = True):
+        """Store the per-stage timings of a detection (latest trace per event wins)."""
+        await self.db.execute("""
+            INSERT OR REPLACE INTO detection_traces (frigate_event, source, recorded_at, total_ms, trace)
+            VALUES (?, ?, ?, ?, ?)
+        """, (frigate_event, trace['source'], _now_ms(), trace['total_ms'], json.dumps(trace)))
+        if commit:
+            await self.db.commit()
+
+    async def get_trace(self, frigate_event: str) -> Optional[dict]:
+        """Get the stored per-stage timings of a detection."""
+        async with self.db.execute(
+            "SELECT trace FROM detection_traces WHERE frigate_event = ?",
+            (frigate_event,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return json.loads(row[0]) if row else None
+
+    async def delete_traces_older_than(self, cutoff_date: datetime) -> int:
+        """Delete traces recorded before the cutoff date. Returns count of deleted rows."""
+        cursor = await self.db.execute(
+            "DELETE FROM detection_traces WHERE recorded_at < ?",
+            (_epoch_ms(cutoff_date),)
+        )
+        await self.db.commit()
+        return cursor.rowcount
@@ -0,0 +1,84 @@
+import asyncio
+from typing import List, Literal
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+import structlog
+
+from app.config import settings
+from app.services.profiler import SamplingProfiler
+
+router = APIRouter()
+log = structlog.get_logger()
+
+# Only one profile may run at a time
+_profile_running = False
+
+
+class FunctionStats(BaseModel):
+    function: str
+    self: int
+    total: int
+    self_pct: float
+    total_pct: float
+
+
+class ProfileResponse(BaseModel):
+    """Result of a sampling profile."""
+    seconds: float
+    interval_ms: float
+    samples: int
+    top_functions: List[FunctionStats]
+    collapsed: str
+
+
+@router.post("/debug/profile", response_model=ProfileResponse)
+async def run_profile(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0, description="Sampling interval"),
+    include_idle: bool = Query(False, description="Include threads parked in wait/select/queue.get"),
+    top: int = Query(30, ge=1, le=500, description="Rows in the top-functions table"),
+    format: Literal["json", "collapsed"] = Query("json", description="'collapsed' returns flamegraph input as text")
+):
+    """Sample all thread stacks of the running backend for ``seconds``.
+
+    Returns a top-functions table and stacks in collapsed format, which
+    flamegraph.pl, speedscope or inferno render directly. Disabled unless
+    ``diagnostics.profiler_enabled`` is set in the config file.
+    """
+    global _profile_running
+
+    if not settings.diagnostics.profiler_enabled:
+        raise HTTPException(status_code=403, detail="Profiler is disabled")
+    if seconds > settings.diagnostics.profiler_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be <= {settings.diagnostics.profiler_max_seconds}"
+        )
+    if _profile_running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    _profile_running = True
+    profiler = SamplingProfiler(interval_ms=interval_ms, include_idle=include_idle)
+    log.info("Profiling started", seconds=seconds, interval_ms=interval_ms)
+    try:
+        profiler.start()
+        await asyncio.sleep(seconds)
+    finally:
+        try:
+            # Joining the sampler can take up to one interval; keep that off the loop
+            await asyncio.to_thread(profiler.stop)
+        finally:
+            _profile_running = False
+    log.info("Profiling finished", samples=profiler.samples, stacks=len(profiler.stacks))
+
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+
+    return ProfileResponse(
+        seconds=profiler.duration,
+        interval_ms=interval_ms,
+        samples=profiler.samples,
+        top_functions=[FunctionStats(**row) for row in profiler.top_functions(top)],
+        collapsed=profiler.collapsed()
+    )
@@ -1,67 +1,23 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional, Literal
 from datetime import datetime, date
-from io import BytesIO
 from pydantic import BaseModel, Field
 import httpx
 import structlog
-from PIL import Image
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import DetectionResponse
 from app.repositories.detection_repository import DetectionRepository
 from app.config import settings
 from app.services.classifier_service import get_classifier, ClassifierService
+from app.services.frigate_client import get_frigate_client
+from app.services.clip_reconciler import get_clip_reconciler
+from app.services.detection_writer import get_detection_writer
 
 router = APIRouter()
 log = structlog.get_logger()
 
 
-def get_frigate_headers() -> dict:
-    """Build headers for Frigate requests, including auth token if configured."""
-    headers = {}
-    if settings.frigate.frigate_auth_token:
-        headers['Authorization'] = f'Bearer {settings.frigate.frigate_auth_token}'
-    return headers
-
-
-async def batch_check_clips(event_ids: list[str]) -> dict[str, bool]:
-    """
-    Check clip availability for multiple events from Frigate.
-    Returns a dict mapping event_id -> has_clip boolean.
-    """
-    if not event_ids:
-        return {}
-
-    frigate_url = settings.frigate.frigate_url
-    headers = get_frigate_headers()
-    result = {}
-
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Fetch events from Frigate - it returns all matching events
-            # We'll check each one for has_clip
-            for event_id in event_ids:
-                try:
-                    resp = await client.get(
-                        f"{frigate_url}/api/events/{event_id}",
-                        headers=headers,
-                        timeout=5.0
-                    )
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        result[event_id] = data.get("has_clip", False)
-                    else:
-                        result[event_id] = False
-                except Exception:
-                    result[event_id] = False
-    except Exception as e:
-        log.warning("Failed to batch check clips", error=str(e))
-        # Return empty dict - frontend will show no play buttons
-        return {eid: False for eid in event_ids}
-
-    return result
-
 # get_classifier is now imported from classifier_service
 
 
@@ -80,7 +36,7 @@ class EventsCountResponse(BaseModel):
 @router.get("/events/filters", response_model=EventFilters)
 async def get_event_filters():
     """Get available filter options (species and cameras) from the database."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
         species = await repo.get_unique_species()
         cameras = await repo.get_unique_cameras()
@@ -99,7 +55,7 @@ async def get_events(
     include_hidden: bool = Query(default=False, description="Include hidden/ignored detections")
 ):
     """Get paginated events with optional filters."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
 
         # Convert dates to datetime for filtering
@@ -117,9 +73,11 @@ async def get_events(
             include_hidden=include_hidden
         )
 
-        # Batch fetch clip availability from Frigate (eliminates N individual HEAD requests)
-        event_ids = [e.frigate_event for e in events]
-        clip_availability = await batch_check_clips(event_ids)
+        # Clip availability comes from the database; unknown ones are looked up in the background
+        if settings.frigate.clips_enabled:
+            unknown = [e.frigate_event for e in events if e.has_clip is None]
+            if unknown:
+                get_clip_reconciler().request(unknown)
 
         # Get labels that should be displayed as "Unknown Bird"
         unknown_labels = settings.classification.unknown_bird_labels
@@ -141,7 +99,7 @@ async def get_events(
                 category_name=event.category_name,
                 frigate_event=event.frigate_event,
                 camera_name=event.camera_name,
-                has_clip=clip_availability.get(event.frigate_event, False),
+                has_clip=bool(event.has_clip),
                 is_hidden=event.is_hidden
             )
             response_events.append(response_event)
@@ -157,7 +115,7 @@ class HiddenCountResponse(BaseModel):
 @router.get("/events/hidden-count", response_model=HiddenCountResponse)
 async def get_hidden_count():
     """Get count of hidden detections."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
         count = await repo.get_hidden_count()
         return HiddenCountResponse(hidden_count=count)
@@ -172,7 +130,7 @@ async def get_events_count(
     include_hidden: bool = Query(default=False, description="Include hidden/ignored detections")
 ):
     """Get total count of events (optionally filtered)."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
 
         start_datetime = datetime.combine(start_date, datetime.min.time()) if start_date else None
@@ -194,12 +152,31 @@ async def get_events_count(
 @router.delete("/events/{event_id}")
 async def delete_event(event_id: str):
     """Delete a detection by its Frigate event ID."""
-    async with get_db() as db:
+    deleted = await get_detection_writer().delete(event_id)
+    if deleted:
+        return {"status": "deleted", "event_id": event_id}
+    raise HTTPException(status_code=404, detail="Detection not found")
+
+
+class TraceResponse(BaseModel):
+    """Per-stage timings recorded while a detection was processed."""
+    event_id: str
+    source: str
+    cached: bool
+    total_ms: float
+    spans: dict[str, float]
+    marks: dict[str, float]
+
+
+@router.get("/events/{event_id}/trace", response_model=TraceResponse)
+async def get_event_trace(event_id: str):
+    """Get the stored latency trace of a detection (requires processing.store_traces)."""
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
-        deleted = await repo.delete_by_frigate_event(event_id)
-        if deleted:
-            return {"status": "deleted", "event_id": event_id}
-        raise HTTPException(status_code=404, detail="Detection not found")
+        trace = await repo.get_trace(event_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail="Trace not found")
+        return TraceResponse(event_id=event_id, **trace)
 
 
 class HideResponse(BaseModel):
@@ -212,21 +189,19 @@ class HideResponse(BaseModel):
 @router.post("/events/{event_id}/hide", response_model=HideResponse)
 async def toggle_hide_event(event_id: str):
     """Toggle the hidden/ignored status of a detection."""
-    async with get_db() as db:
-        repo = DetectionRepository(db)
-        new_status = await repo.toggle_hidden(event_id)
+    new_status = await get_detection_writer().toggle_hidden(event_id)
 
-        if new_status is None:
-            raise HTTPException(status_code=404, detail="Detection not found")
+    if new_status is None:
+        raise HTTPException(status_code=404, detail="Detection not found")
 
-        action = "hidden" if new_status else "unhidden"
-        log.info(f"Detection {action}", event_id=event_id, is_hidden=new_status)
+    action = "hidden" if new_status else "unhidden"
+    log.info(f"Detection {action}", event_id=event_id, is_hidden=new_status)
 
-        return HideResponse(
-            status="updated",
-            event_id=event_id,
-            is_hidden=new_status
-        )
+    return HideResponse(
+        status="updated",
+        event_id=event_id,
+        is_hidden=new_status
+    )
 
 
 class UpdateDetectionRequest(BaseModel):
@@ -250,79 +225,65 @@ async def reclassify_event(event_id: str):
     Re-run the classifier on an existing detection.
     Fetches the snapshot from Frigate and runs it through the ML model again.
     """
-    async with get_db() as db:
-        repo = DetectionRepository(db)
-        detection = await repo.get_by_frigate_event(event_id)
+    async with get_read_db() as db:
+        detection = await DetectionRepository(db).get_by_frigate_event(event_id)
 
-        if not detection:
-            raise HTTPException(status_code=404, detail="Detection not found")
+    if not detection:
+        raise HTTPException(status_code=404, detail="Detection not found")
 
-        old_species = detection.display_name
+    old_species = detection.display_name
 
-        # Fetch snapshot from Frigate
-        frigate_url = settings.frigate.frigate_url
-        snapshot_url = f"{frigate_url}/api/events/{event_id}/snapshot.jpg"
-
-        headers = {}
-        if settings.frigate.frigate_auth_token:
-            headers['Authorization'] = f'Bearer {settings.frigate.frigate_auth_token}'
-
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    snapshot_url,
-                    params={"crop": 1, "quality": 95},
-                    headers=headers,
-                    timeout=30.0
-                )
+    # Fetch snapshot from Frigate
+    try:
+        response = await get_frigate_client().get_snapshot(event_id)
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=502,
-                        detail=f"Failed to fetch snapshot from Frigate: {response.status_code}"
-                    )
-
-                # Classify the image
-                image = Image.open(BytesIO(response.content))
-                classifier = get_classifier()
-                results = classifier.classify(image)
-
-                if not results:
-                    raise HTTPException(status_code=500, detail="Classification returned no results")
-
-                top = results[0]
-                new_species = top['label']
-                new_score = top['score']
-
-                # Update if species changed
-                updated = False
-                if new_species != old_species:
-                    # Execute update directly for reliability
-                    await db.execute("""
-                        UPDATE detections
-                        SET display_name = ?, category_name = ?, score = ?, detection_index = ?
-                        WHERE frigate_event = ?
-                    """, (new_species, new_species, new_score, top['index'], event_id))
-                    await db.commit()
-                    updated = True
-                    log.info("Reclassified detection",
-                             event_id=event_id,
-                             old_species=old_species,
-                             new_species=new_species,
-                             score=new_score)
-
-                return ReclassifyResponse(
-                    status="success",
-                    event_id=event_id,
-                    old_species=old_species,
-                    new_species=new_species,
-                    new_score=new_score,
-                    updated=updated
-                )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=502,
+                detail=f"Failed to fetch snapshot from Frigate: {response.status_code}"
+            )
 
-        except httpx.RequestError as e:
-            log.error("Failed to fetch snapshot", event_id=event_id, error=str(e))
-            raise HTTPException(status_code=502, detail=f"Failed to connect to Frigate: {str(e)}")
+        # Classify the image
+        classifier = get_classifier()
+        results = await classifier.classify_snapshot_async(response.content)
+
+        if not results:
+            raise HTTPException(status_code=500, detail="Classification returned no results")
+
+        top = results[0]
+        new_species = top['label']
+        new_score = top['score']
+
+        # Update if species changed
+        updated = False
+        if new_species != old_species:
+            # Execute update directly for reliability
+            async with get_db() as db:
+                await db.execute("""
+                    UPDATE detections
+                    SET display_name = ?, category_name = ?, score = ?, detection_index = ?
+                    WHERE frigate_event = ?
+                """, (new_species, new_species, new_score, top['index'], event_id))
+                await db.commit()
+            updated = True
+            log.info("Reclassified detection",
+                     event_id=event_id,
+                     old_species=old_species,
+                     new_species=new_species,
+                     score=new_score)
+
+        return ReclassifyResponse(
+            status="success",
+            event_id=event_id,
+            old_species=old_species,
+            new_species=new_species,
+            new_score=new_score,
+            updated=updated
+        )
+
+    except httpx.RequestError as e:
+        log.error("Failed to fetch snapshot", event_id=event_id, error=str(e))
+        raise HTTPException(status_code=502, detail=f"Failed to connect to Frigate: {str(e)}")
 
 
 @router.patch("/events/{event_id}")
@@ -400,69 +361,56 @@ async def classify_wildlife(event_id: str):
     Fetches the snapshot from Frigate and runs it through the wildlife classifier.
     Does NOT update the database - user can manually tag if desired.
     """
-    async with get_db() as db:
-        repo = DetectionRepository(db)
-        detection = await repo.get_by_frigate_event(event_id)
+    async with get_read_db() as db:
+        detection = await DetectionRepository(db).get_by_frigate_event(event_id)
 
-        if not detection:
-            raise HTTPException(status_code=404, detail="Detection not found")
+    if not detection:
+        raise HTTPException(status_code=404, detail="Detection not found")
 
-        # Fetch snapshot from Frigate
-        frigate_url = settings.frigate.frigate_url
-        snapshot_url = f"{frigate_url}/api/events/{event_id}/snapshot.jpg"
+    # Fetch snapshot from Frigate
+    try:
+        response = await get_frigate_client().get_snapshot(event_id)
 
-        headers = get_frigate_headers()
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=502,
+                detail=f"Failed to fetch snapshot from Frigate: {response.status_code}"
+            )
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    snapshot_url,
-                    params={"crop": 1, "quality": 95},
-                    headers=headers,
-                    timeout=30.0
+        # Classify with wildlife model
+        classifier = get_classifier()
+        results = await classifier.classify_wildlife_snapshot_async(response.content)
+
+        if not results:
+            # Wildlife model not available or no results
+            wildlife_status = classifier.get_wildlife_status()
+            if not wildlife_status.get("enabled"):
+                raise HTTPException(
+                    status_code=503,
+                    detail="Wildlife model not available. Please download the wildlife model first."
                 )
+            raise HTTPException(status_code=500, detail="Classification returned no results")
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=502,
-                        detail=f"Failed to fetch snapshot from Frigate: {response.status_code}"
-                    )
-
-                # Classify with wildlife model
-                image = Image.open(BytesIO(response.content))
-                classifier = get_classifier()
-                results = classifier.classify_wildlife(image)
-
-                if not results:
-                    # Wildlife model not available or no results
-                    wildlife_status = classifier.get_wildlife_status()
-                    if not wildlife_status.get("enabled"):
-                        raise HTTPException(
-                            status_code=503,
-                            detail="Wildlife model not available. Please download the wildlife model first."
-                        )
-                    raise HTTPException(status_code=500, detail="Classification returned no results")
-
-                classifications = [
-                    WildlifeClassification(
-                        label=r['label'],
-                        score=r['score'],
-                        index=r['index']
-                    )
-                    for r in results
-                ]
-
-                log.info("Wildlife classification complete",
-                         event_id=event_id,
-                         top_result=results[0]['label'] if results else None,
-                         top_score=results[0]['score'] if results else None)
-
-                return WildlifeClassifyResponse(
-                    status="success",
-                    event_id=event_id,
-                    classifications=classifications
-                )
+        classifications = [
+            WildlifeClassification(
+                label=r['label'],
+                score=r['score'],
+                index=r['index']
+            )
+            for r in results
+        ]
+
+        log.info("Wildlife classification complete",
+                 event_id=event_id,
+                 top_result=results[0]['label'] if results else None,
+                 top_score=results[0]['score'] if results else None)
+
+        return WildlifeClassifyResponse(
+            status="success",
+            event_id=event_id,
+            classifications=classifications
+        )
 
-        except httpx.RequestError as e:
-            log.error("Failed to fetch snapshot for wildlife classification", event_id=event_id, error=str(e))
-            raise HTTPException(status_code=502, detail=f"Failed to connect to Frigate: {str(e)}")
+    except httpx.RequestError as e:
+        log.error("Failed to fetch snapshot for wildlife classification", event_id=event_id, error=str(e))
+        raise HTTPException(status_code=502, detail=f"Failed to connect to Frigate: {str(e)}")
@@ -4,25 +4,10 @@ from fastapi.responses import StreamingResponse
 from starlette.background import BackgroundTask
 import httpx
 from app.config import settings
+from app.services.frigate_client import get_frigate_client
 
 router = APIRouter()
 
-# Shared HTTP client for better connection pooling
-_http_client: httpx.AsyncClient | None = None
-
-def get_http_client() -> httpx.AsyncClient:
-    global _http_client
-    if _http_client is None:
-        _http_client = httpx.AsyncClient(timeout=30.0)
-    return _http_client
-
-def get_frigate_headers() -> dict:
-    """Build headers for Frigate requests, including auth token if configured."""
-    headers = {}
-    if settings.frigate.frigate_auth_token:
-        headers['Authorization'] = f'Bearer {settings.frigate.frigate_auth_token}'
-    return headers
-
 # Validate event_id format (Frigate uses UUIDs, numeric IDs, or timestamp-based IDs with dots)
 EVENT_ID_PATTERN = re.compile(r'^[a-zA-Z0-9\-_.]+$')
 
@@ -32,11 +17,8 @@ def validate_event_id(event_id: str) -> bool:
 @router.get("/frigate/test")
 async def test_frigate_connection():
     """Test connection to Frigate and return status with details."""
-    url = f"{settings.frigate.frigate_url}/api/version"
-    client = get_http_client()
-    headers = get_frigate_headers()
     try:
-        resp = await client.get(url, headers=headers, timeout=10.0)
+        resp = await get_frigate_client().get("/api/version", "version")
         resp.raise_for_status()
         version = resp.text.strip().strip('"')
         return {
@@ -55,11 +37,8 @@ async def test_frigate_connection():
 
 @router.get("/frigate/config")
 async def proxy_config():
-    url = f"{settings.frigate.frigate_url}/api/config"
-    client = get_http_client()
-    headers = get_frigate_headers()
     try:
-        resp = await client.get(url, headers=headers)
+        resp = await get_frigate_client().get("/api/config", "config")
         resp.raise_for_status()
         return Response(content=resp.content, media_type=resp.headers.get("content-type", "application/json"))
     except httpx.TimeoutException:
@@ -75,11 +54,8 @@ async def proxy_config():
 async def proxy_snapshot(event_id: str = Path(..., min_length=1, max_length=64)):
     if not validate_event_id(event_id):
         raise HTTPException(status_code=400, detail="Invalid event ID format")
-    url = f"{settings.frigate.frigate_url}/api/events/{event_id}/snapshot.jpg"
-    client = get_http_client()
-    headers = get_frigate_headers()
     try:
-        resp = await client.get(url, headers=headers)
+        resp = await get_frigate_client().get(f"/api/events/{event_id}/snapshot.jpg", "snapshot")
         if resp.status_code == 404:
             raise HTTPException(status_code=404, detail="Snapshot not found")
         resp.raise_for_status()
@@ -100,11 +76,8 @@ async def check_clip_exists(event_id: str = Path(..., min_length=1, max_length=6
     if not validate_event_id(event_id):
         raise HTTPException(status_code=400, detail="Invalid event ID format")
     # Frigate doesn't support HEAD for clips, so check event exists instead
-    url = f"{settings.frigate.frigate_url}/api/events/{event_id}"
-    client = get_http_client()
-    headers = get_frigate_headers()
     try:
-        resp = await client.get(url, headers=headers, timeout=10.0)
+        resp = await get_frigate_client().get_event(event_id)
         if resp.status_code == 404:
             raise HTTPException(status_code=404, detail="Event not found")
         resp.raise_for_status()
@@ -134,22 +107,18 @@ async def proxy_clip(
     if not validate_event_id(event_id):
         raise HTTPException(status_code=400, detail="Invalid event ID format")
 
-    clip_url = f"{settings.frigate.frigate_url}/api/events/{event_id}/clip.mp4"
-    headers = get_frigate_headers()
-    
+    headers = {}
+
     # Forward Range header if present
     range_header = request.headers.get("range")
     if range_header:
         headers["Range"] = range_header
 
-    client = httpx.AsyncClient(timeout=120.0)
     try:
-        req = client.build_request("GET", clip_url, headers=headers)
-        r = await client.send(req, stream=True)
+        r = await get_frigate_client().stream(f"/api/events/{event_id}/clip.mp4", headers=headers)
 
         if r.status_code == 404:
             await r.aclose()
-            await client.aclose()
             raise HTTPException(status_code=404, detail="Clip not found")
 
         # Forward specific headers
@@ -167,30 +136,22 @@ async def proxy_clip(
         else:
             response_headers["Content-Type"] = "video/mp4"
 
-        async def cleanup():
-            await r.aclose()
-            await client.aclose()
-
         return StreamingResponse(
             r.aiter_bytes(),
             status_code=r.status_code,
             headers=response_headers,
-            background=BackgroundTask(cleanup)
+            background=BackgroundTask(r.aclose)
         )
 
     except httpx.RequestError:
-        await client.aclose()
         raise HTTPException(status_code=502, detail="Failed to connect to Frigate")
 
 @router.get("/frigate/{event_id}/thumbnail.jpg")
 async def proxy_thumb(event_id: str = Path(..., min_length=1, max_length=64)):
     if not validate_event_id(event_id):
         raise HTTPException(status_code=400, detail="Invalid event ID format")
-    url = f"{settings.frigate.frigate_url}/api/events/{event_id}/thumbnail.jpg"
-    client = get_http_client()
-    headers = get_frigate_headers()
     try:
-        resp = await client.get(url, headers=headers)
+        resp = await get_frigate_client().get(f"/api/events/{event_id}/thumbnail.jpg", "thumbnail")
         if resp.status_code == 404:
             raise HTTPException(status_code=404, detail="Thumbnail not found")
         resp.raise_for_status()
@@ -5,7 +5,7 @@ from pydantic import BaseModel, Field, field_validator
 import structlog
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.repositories.detection_repository import DetectionRepository
 
 router = APIRouter()
@@ -69,7 +69,7 @@ async def update_settings(update: SettingsUpdate):
 @router.get("/maintenance/stats")
 async def get_maintenance_stats():
     """Get database maintenance statistics."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
         total_count = await repo.get_count()
         oldest_date = await repo.get_oldest_detection_date()
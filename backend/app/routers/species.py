@@ -4,7 +4,7 @@ from urllib.parse import quote
 import httpx
 import structlog
 
-from app.database import get_db
+from app.database import get_read_db
 from app.repositories.detection_repository import DetectionRepository
 from app.models import SpeciesStats, SpeciesInfo, CameraStats, Detection
 from app.config import settings
@@ -88,7 +88,7 @@ def _is_bird_article(data: dict) -> bool:
 @router.get("/species")
 async def get_species_list():
     """Get list of all species with counts."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
         stats = await repo.get_species_counts()
 
@@ -114,7 +114,7 @@ async def get_species_list():
 @router.get("/species/{species_name}/stats", response_model=SpeciesStats)
 async def get_species_stats(species_name: str):
     """Get comprehensive statistics for a species."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         repo = DetectionRepository(db)
 
         # For "Unknown Bird" queries, we need to aggregate stats from all unknown labels
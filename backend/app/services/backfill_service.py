@@ -1,18 +1,25 @@
+import asyncio
+import time
 import structlog
-import httpx
 from datetime import datetime
 from dataclasses import dataclass
-from io import BytesIO
-from PIL import Image
+from typing import Optional
 
 from app.config import settings
 from app.services.classifier_service import ClassifierService
 from app.services.broadcaster import broadcaster
-from app.database import get_db
+from app.services.frigate_client import FrigateClient, FrigateUnavailableError, get_frigate_client
+from app.services.tracing import DetectionTrace
+from app.services.metrics import snapshot_fetch_duration, snapshot_fetches
+from app.services.detection_writer import DetectionWriter, get_detection_writer
+from app.database import get_read_db
 from app.repositories.detection_repository import DetectionRepository, Detection
 
 log = structlog.get_logger()
 
+# Events fetched and classified concurrently per chunk during backfill
+BACKFILL_BATCH_SIZE = 16
+
 
 @dataclass
 class BackfillResult:
@@ -26,16 +33,15 @@ class BackfillResult:
 class BackfillService:
     """Service to fetch and process historical detections from Frigate."""
 
-    def __init__(self, classifier: ClassifierService):
+    def __init__(
+        self,
+        classifier: ClassifierService,
+        frigate: Optional[FrigateClient] = None,
+        writer: Optional[DetectionWriter] = None,
+    ):
         self.classifier = classifier
-        self.http_client = httpx.AsyncClient()
-
-    def _get_frigate_headers(self) -> dict:
-        """Build headers for Frigate requests, including auth token if configured."""
-        headers = {}
-        if settings.frigate.frigate_auth_token:
-            headers['Authorization'] = f'Bearer {settings.frigate.frigate_auth_token}'
-        return headers
+        self.frigate = frigate or get_frigate_client()
+        self.writer = writer or get_detection_writer()
 
     async def fetch_frigate_events(self, after_ts: float, before_ts: float, cameras: list[str] = None) -> list[dict]:
         """
@@ -43,8 +49,6 @@ class BackfillService:
         Handles pagination automatically.
         """
         all_events = []
-        frigate_url = settings.frigate.frigate_url
-        headers = self._get_frigate_headers()
 
         # Build base params
         params = {
@@ -62,11 +66,11 @@ class BackfillService:
             # Fetch for each configured camera
             for camera in camera_list:
                 camera_params = {**params, "camera": camera}
-                events = await self._fetch_events_paginated(frigate_url, camera_params, headers)
+                events = await self._fetch_events_paginated(camera_params)
                 all_events.extend(events)
         else:
             # Fetch all cameras
-            events = await self._fetch_events_paginated(frigate_url, params, headers)
+            events = await self._fetch_events_paginated(params)
             all_events.extend(events)
 
         # Remove duplicates by event ID (in case same event appears for multiple cameras)
@@ -81,13 +85,12 @@ class BackfillService:
         log.info("Fetched events from Frigate", count=len(unique_events), after=after_ts, before=before_ts)
         return unique_events
 
-    async def _fetch_events_paginated(self, frigate_url: str, params: dict, headers: dict) -> list[dict]:
+    async def _fetch_events_paginated(self, params: dict) -> list[dict]:
         """Fetch events with pagination support."""
         events = []
-        url = f"{frigate_url}/api/events"
 
         try:
-            response = await self.http_client.get(url, params=params, headers=headers, timeout=30.0)
+            response = await self.frigate.get_events(params)
             if response.status_code == 200:
                 batch = response.json()
                 events.extend(batch)
@@ -102,108 +105,207 @@ class BackfillService:
 
         return events
 
-    async def process_historical_event(self, event: dict) -> str:
-        """
-        Process a single historical event.
-        Returns: 'new', 'skipped', or 'error'
+    async def _fetch_snapshot(self, frigate_event: str, trace: Optional[DetectionTrace] = None) -> Optional[bytes]:
+        """Fetch the cropped snapshot for an event. Returns None on failure."""
+        started = time.perf_counter()
+        try:
+            response = await self.frigate.get_snapshot(frigate_event)
+        except FrigateUnavailableError:
+            snapshot_fetches.inc("backfill", "rejected")
+            return None
+        except Exception as e:
+            log.error("Error fetching snapshot", event_id=frigate_event, error=str(e))
+            snapshot_fetches.inc("backfill", "error")
+            return None
+        snapshot_fetch_duration.observe(time.perf_counter() - started, "backfill")
+        snapshot_fetches.inc("backfill", response.status_code)
+
+        if response.status_code != 200:
+            log.warning("Failed to fetch snapshot", event_id=frigate_event, status=response.status_code)
+            return None
+        if trace is not None:
+            trace.mark("fetched")
+        return response.content
+
+    async def _classify_snapshot(self, frigate_event: str, content: bytes, trace: Optional[DetectionTrace] = None) -> list[dict]:
+        """Decode (off the event loop) and classify one snapshot. Returns [] on failure.
+
+        Concurrent calls share batched invokes through the classifier's batch scheduler.
         """
-        frigate_event = event.get('id')
-        if not frigate_event:
-            return 'error'
-
         try:
-            # Check if already exists in database
-            async with get_db() as db:
-                repo = DetectionRepository(db)
-                existing = await repo.get_by_frigate_event(frigate_event)
-                if existing:
-                    log.debug("Event already exists, skipping", event_id=frigate_event)
-                    return 'skipped'
-
-            # Fetch snapshot from Frigate
-            frigate_url = settings.frigate.frigate_url
-            snapshot_url = f"{frigate_url}/api/events/{frigate_event}/snapshot.jpg"
-            headers = self._get_frigate_headers()
-
-            response = await self.http_client.get(
-                snapshot_url,
-                params={"crop": 1, "quality": 95},
-                headers=headers,
-                timeout=30.0
-            )
-
-            if response.status_code != 200:
-                log.warning("Failed to fetch snapshot", event_id=frigate_event, status=response.status_code)
-                return 'error'
-
-            # Classify the image
-            image = Image.open(BytesIO(response.content))
-            results = self.classifier.classify(image)
-
-            if not results:
-                log.debug("No classification results", event_id=frigate_event)
-                return 'error'
-
-            top = results[0]
-            score = top['score']
-            label = top['label']
-
-            # Relabel unknown bird classifications (e.g., "background" -> "Unknown Bird")
-            if label in settings.classification.unknown_bird_labels:
-                log.info("Relabeled to Unknown Bird", original=label, event_id=frigate_event)
-                label = "Unknown Bird"
-                top = {**top, 'label': label}
-
-            # Apply same filters as real-time processing
-            if label in settings.classification.blocked_labels:
-                log.debug("Filtered blocked label", label=label, event_id=frigate_event)
-                return 'skipped'
-
-            if score < settings.classification.min_confidence:
-                log.debug("Below minimum confidence", score=score, event_id=frigate_event)
-                return 'skipped'
-
-            if score <= settings.classification.threshold:
-                log.debug("Below threshold", score=score, event_id=frigate_event)
-                return 'skipped'
-
-            # Save to database
-            timestamp = datetime.fromtimestamp(event.get('start_time', datetime.now().timestamp()))
-            camera_name = event.get('camera', 'unknown')
-
-            detection = Detection(
-                detection_time=timestamp,
-                detection_index=top['index'],
-                score=score,
-                display_name=label,
-                category_name=label,
-                frigate_event=frigate_event,
-                camera_name=camera_name
-            )
-
-            async with get_db() as db:
-                repo = DetectionRepository(db)
-                await repo.create(detection)
+            prepared = await asyncio.to_thread(self.classifier.prepare_snapshot, content, trace)
+            results = await self.classifier.classify_prepared_async(prepared)
+        except Exception as e:
+            log.error("Error classifying historical event", event_id=frigate_event, error=str(e))
+            return []
+        if trace is not None:
+            trace.mark("inferred")
+        return results
+
+    def _build_detection(self, event: dict, results: list[dict]) -> tuple[str, Optional[Detection]]:
+        """Apply filters to classification results.
+        Returns ('new', detection) for a detection worth saving, else ('skipped' or 'error', None).
+        """
+        frigate_event = event['id']
+
+        if not results:
+            log.debug("No classification results", event_id=frigate_event)
+            return 'error', None
+
+        top = results[0]
+        score = top['score']
+        label = top['label']
+
+        # Relabel unknown bird classifications (e.g., "background" -> "Unknown Bird")
+        if label in settings.classification.unknown_bird_labels:
+            log.info("Relabeled to Unknown Bird", original=label, event_id=frigate_event)
+            label = "Unknown Bird"
+            top = {**top, 'label': label}
+
+        # Apply same filters as real-time processing
+        if label in settings.classification.blocked_labels:
+            log.debug("Filtered blocked label", label=label, event_id=frigate_event)
+            return 'skipped', None
+
+        if score < settings.classification.min_confidence:
+            log.debug("Below minimum confidence", score=score, event_id=frigate_event)
+            return 'skipped', None
+
+        if score <= settings.classification.threshold:
+            log.debug("Below threshold", score=score, event_id=frigate_event)
+            return 'skipped', None
+
+        detection = Detection(
+            detection_time=datetime.fromtimestamp(event.get('start_time', datetime.now().timestamp())),
+            detection_index=top['index'],
+            score=score,
+            display_name=label,
+            category_name=label,
+            frigate_event=frigate_event,
+            camera_name=event.get('camera', 'unknown'),
+            has_clip=bool(event['has_clip']) if event.get('has_clip') is not None else None
+        )
+        return 'new', detection
+
+    async def _save_detections(self, detections: list[Detection], traces: list[Optional[DetectionTrace]]) -> list[str]:
+        """Save a chunk's detections with one batched upsert and announce the new ones.
+        Returns one status per detection: 'new' or 'skipped'
+        """
+        # Upsert: live processing may have stored an event since the existence check
+        outcomes = await self.writer.upsert_many(detections)
+        for trace in traces:
+            if trace is not None:
+                trace.mark("persisted")
 
-            log.info("Backfilled detection", event_id=frigate_event, species=label, score=score)
+        async def announce(detection: Detection, trace: Optional[DetectionTrace]):
+            log.info("Backfilled detection", event_id=detection.frigate_event,
+                     species=detection.display_name, score=detection.score)
 
             # Broadcast to connected clients
             await broadcaster.broadcast({
                 "type": "detection",
                 "data": {
-                    "frigate_event": frigate_event,
-                    "display_name": label,
-                    "score": score,
-                    "timestamp": timestamp.isoformat(),
-                    "camera": camera_name
+                    "frigate_event": detection.frigate_event,
+                    "display_name": detection.display_name,
+                    "score": detection.score,
+                    "timestamp": detection.detection_time.isoformat(),
+                    "camera": detection.camera_name
                 }
             })
 
-            return 'new'
+            if trace is not None:
+                trace.mark("broadcast")
+                if settings.processing.store_traces:
+                    await self.writer.save_trace(detection.frigate_event, trace.to_dict())
+
+        statuses = []
+        announcements = []
+        for detection, trace, outcome in zip(detections, traces, outcomes):
+            if outcome != "created":
+                log.debug("Event stored meanwhile, skipping", event_id=detection.frigate_event, outcome=outcome)
+                statuses.append('skipped')
+                continue
+            statuses.append('new')
+            announcements.append(announce(detection, trace))
+
+        # Trace writes share the writer's next batch instead of one commit each;
+        # the detections are saved already, so a failed announcement is only logged
+        for error in await asyncio.gather(*announcements, return_exceptions=True):
+            if isinstance(error, Exception):
+                log.warning("Failed to announce backfilled detection", error=str(error))
+        return statuses
+
+    async def process_historical_event(self, event: dict) -> str:
+        """
+        Process a single historical event.
+        Returns: 'new', 'skipped', or 'error'
+        """
+        return (await self.process_historical_batch([event]))[0]
 
+    async def process_historical_batch(self, events: list[dict]) -> list[str]:
+        """
+        Process a chunk of historical events.
+        Snapshots are fetched, decoded and classified concurrently, so the
+        classifier can batch the chunk's invokes, and the chunk's detections
+        are saved with one batched upsert. Each event gets a latency trace.
+        Returns one status per event: 'new', 'skipped', or 'error'
+        """
+        statuses = ['error'] * len(events)
+        pending: list[int] = []
+
+        try:
+            # Check which events already exist in the database
+            async with get_read_db() as db:
+                repo = DetectionRepository(db)
+                for i, event in enumerate(events):
+                    frigate_event = event.get('id')
+                    if not frigate_event:
+                        continue
+                    if await repo.get_by_frigate_event(frigate_event):
+                        log.debug("Event already exists, skipping", event_id=frigate_event)
+                        statuses[i] = 'skipped'
+                    else:
+                        pending.append(i)
         except Exception as e:
-            log.error("Error processing historical event", event_id=frigate_event, error=str(e))
-            return 'error'
+            log.error("Error checking existing events", error=str(e))
+            return statuses
+
+        traces = {i: DetectionTrace(events[i]['id'], source="backfill") for i in pending}
+
+        # Fetch snapshots from Frigate concurrently
+        snapshots = await asyncio.gather(*(self._fetch_snapshot(events[i]['id'], traces[i]) for i in pending))
+
+        classify_indices = [i for i, content in zip(pending, snapshots) if content is not None]
+        contents = [content for content in snapshots if content is not None]
+
+        # Classify the chunk concurrently; the classifier's batch scheduler
+        # groups the invokes, and one bad snapshot can't fail the rest
+        batch_results = await asyncio.gather(*(
+            self._classify_snapshot(events[i]['id'], content, traces[i])
+            for i, content in zip(classify_indices, contents)
+        ))
+
+        save_indices: list[int] = []
+        detections: list[Detection] = []
+        for i, results in zip(classify_indices, batch_results):
+            statuses[i], detection = self._build_detection(events[i], results)
+            if detection is not None:
+                save_indices.append(i)
+                detections.append(detection)
+
+        if detections:
+            try:
+                saved = await self._save_detections(detections, [traces[i] for i in save_indices])
+            except Exception as e:
+                log.error("Error saving historical events", count=len(detections), error=str(e))
+                saved = ['error'] * len(detections)
+            for i, status in zip(save_indices, saved):
+                statuses[i] = status
+
+        for trace in traces.values():
+            trace.finish()
+
+        return statuses
 
     async def run_backfill(self, start: datetime, end: datetime, cameras: list[str] = None) -> BackfillResult:
         """
@@ -221,15 +323,16 @@ class BackfillService:
         events = await self.fetch_frigate_events(after_ts, before_ts, cameras)
         result.processed = len(events)
 
-        # Process each event
-        for event in events:
-            status = await self.process_historical_event(event)
-            if status == 'new':
-                result.new_detections += 1
-            elif status == 'skipped':
-                result.skipped += 1
-            else:
-                result.errors += 1
+        # Process events in batches
+        for start_idx in range(0, len(events), BACKFILL_BATCH_SIZE):
+            chunk = events[start_idx:start_idx + BACKFILL_BATCH_SIZE]
+            for status in await self.process_historical_batch(chunk):
+                if status == 'new':
+                    result.new_detections += 1
+                elif status == 'skipped':
+                    result.skipped += 1
+                else:
+                    result.errors += 1
 
         log.info("Backfill complete",
                  processed=result.processed,
@@ -0,0 +1,96 @@
+import asyncio
+import structlog
+from typing import Any, Awaitable, Callable
+
+log = structlog.get_logger()
+
+
+class BatchScheduler:
+    """Deadline-based micro-batching in front of a batched classify call.
+
+    Requests are collected until either ``max_batch_size`` items are pending or
+    the oldest one has waited ``max_wait_ms``; the whole group is then handed
+    to ``dispatch`` in one call and each caller's future is resolved with its
+    own result. Under burst load this turns many single invokes into a few
+    batched ones, while the deadline keeps single-event latency bounded.
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[list], Awaitable[list]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+    ):
+        self._dispatch = dispatch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Dispatch everything pending as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        # Drop requests whose callers have gone away
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        self.max_seen_batch = max(self.max_seen_batch, len(batch))
+
+        try:
+            results = await self._dispatch([item for item, _ in batch])
+        except Exception as e:
+            log.error("Batched dispatch failed", batch_size=len(batch), error=str(e))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def get_stats(self) -> dict:
+        """Return batch counts and sizes."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "max_batch_seen": self.max_seen_batch,
+        }
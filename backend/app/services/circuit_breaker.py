@@ -0,0 +1,110 @@
+import threading
+import time
+import structlog
+
+log = structlog.get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its circuit is open."""
+
+
+class CircuitBreaker:
+    """Fails fast while a dependency is down, then probes it until it recovers.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every call is rejected immediately. Once ``reset_timeout`` seconds have
+    passed it goes half-open and lets ``half_open_max_calls`` probe calls
+    through: a successful probe closes the circuit again, a failed one
+    reopens it for another ``reset_timeout``.
+
+    Callers wrap each call in ``acquire()`` and then exactly one of
+    ``record_success()``, ``record_failure()`` or ``release()`` (the call
+    was abandoned, e.g. cancelled, and proves nothing either way).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        error_class: type = CircuitOpenError,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.error_class = error_class
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+            log.info("Circuit half-open, probing", circuit=self.name)
+
+    def acquire(self):
+        """Admit a call or raise ``error_class`` if the circuit is not letting calls through."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise self.error_class(f"{self.name} unavailable (circuit open, retry in {retry_in:.0f}s)")
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                log.info("Circuit closed", circuit=self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                    log.warning("Circuit opened", circuit=self.name, failures=self._failures,
+                                reset_timeout=self.reset_timeout)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
+
+    def release(self):
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def get_stats(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
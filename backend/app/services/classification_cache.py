@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+def snapshot_digest(data: bytes) -> bytes:
+    """Fast 128-bit content hash of snapshot bytes."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class ClassificationCache:
+    """Bounded LRU cache of classification results keyed by snapshot content.
+
+    Keys combine the model identity with a hash of the raw snapshot bytes, so
+    Frigate re-publishing the same snapshot (or reclassify/backfill
+    re-fetching it) skips inference, while a reloaded model never sees
+    results computed by its predecessor.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, bytes], list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, model_key: str, digest: bytes) -> Optional[list[dict]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            results = self._entries.get((model_key, digest))
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((model_key, digest))
+            self.hits += 1
+        # Callers may rework the dicts (e.g. relabeling); hand out copies
+        return [dict(c) for c in results]
+
+    def put(self, model_key: str, digest: bytes, results: list[dict]):
+        if not self.enabled or not results:
+            return
+        with self._lock:
+            self._entries[(model_key, digest)] = [dict(c) for c in results]
+            self._entries.move_to_end((model_key, digest))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, model_name: Optional[str] = None):
+        """Drop cached results for one model (all models if None)."""
+        with self._lock:
+            if model_name is None:
+                self._entries.clear()
+            else:
+                prefix = f"{model_name}:"
+                for key in [k for k in self._entries if k[0].startswith(prefix)]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
@@ -1,6 +1,14 @@
+import asyncio
+import itertools
 import structlog
 import numpy as np
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
 from PIL import Image, ImageOps
 from typing import Optional
 try:
@@ -13,9 +21,18 @@ except ImportError:
         tflite = None
 
 from app.config import settings
+from app.services.inference_executor import InferenceExecutor
+from app.services.batch_scheduler import BatchScheduler
+from app.services.process_inference import ProcessInferencePool
+from app.services.image_preprocessing import decode_for_input, resize_to_input
+from app.services.classification_cache import ClassificationCache, snapshot_digest
+from app.services.metrics import inference_duration
 
 log = structlog.get_logger()
 
+# Distinguishes successive loads of the same model file
+_load_counter = itertools.count(1)
+
 # Global singleton instance
 _classifier_instance: Optional['ClassifierService'] = None
 
@@ -28,25 +45,79 @@ def get_classifier() -> 'ClassifierService':
     return _classifier_instance
 
 
+@dataclass
+class PreparedSnapshot:
+    """A snapshot decoded ahead of inference, or already answered from the cache."""
+    model_key: Optional[str]
+    digest: bytes
+    image: Optional[Image.Image] = None
+    results: Optional[list[dict]] = None
+
+
+def default_pool_size() -> int:
+    """Bird model interpreters (and inference threads): configured value, or one per CPU core."""
+    configured = settings.classification.interpreter_pool_size
+    if configured:
+        return configured
+    return os.cpu_count() or 1
+
+
+def wildlife_pool_size(pool_size: int) -> int:
+    """Interpreters for the wildlife model, which is only used on demand: a quarter of the bird pool."""
+    return max(1, pool_size // 4)
+
+
+def interpreter_threads(concurrency: int) -> int:
+    """TFLite threads per interpreter so ``concurrency`` parallel invokes don't oversubscribe the CPU."""
+    return max(1, (os.cpu_count() or 1) // max(1, concurrency))
+
+
+def _batch_bucket(n: int) -> int:
+    """Input tensor batch size used for ``n`` images: the next power of two."""
+    return 1 << (max(1, n) - 1).bit_length()
+
+
 class ModelInstance:
-    """Represents a loaded TFLite model with its labels."""
+    """Represents a loaded TFLite model with its labels.
+
+    tflite.Interpreter is not thread-safe, so the model keeps a pool of
+    ``pool_size`` interpreters. Each classification checks one out for the
+    duration of the invoke, letting several images run in parallel. Each
+    interpreter uses ``num_threads`` TFLite threads (None: TFLite's default).
+    """
 
-    def __init__(self, name: str, model_path: str, labels_path: str):
+    def __init__(self, name: str, model_path: str, labels_path: str, pool_size: int = 1,
+                 num_threads: Optional[int] = None):
         self.name = name
         self.model_path = model_path
         self.labels_path = labels_path
-        self.interpreter = None
+        self.pool_size = max(1, pool_size)
+        self.num_threads = num_threads
+        self.interpreter = None  # First interpreter of the pool (legacy/debug access)
+        self._interpreters: list = []
+        self._pool: queue.Queue = queue.Queue()
+        self._load_lock = threading.Lock()
+        self._scratch: dict[int, np.ndarray] = {}  # Per-interpreter pixel staging buffers
         self.labels: list[str] = []
         self.loaded = False
         self.error: Optional[str] = None
         self.input_details = None
         self.output_details = None
+        self.identity: Optional[str] = None  # Changes on every (re)load; used as cache key
 
     def load(self) -> bool:
         """Load the model and labels. Returns True if successful."""
         if self.loaded:
             return True
 
+        # Lazily loaded models may be requested from several inference threads at once
+        with self._load_lock:
+            return self._load()
+
+    def _load(self) -> bool:
+        if self.loaded:
+            return True
+
         # Load labels first
         if os.path.exists(self.labels_path):
             try:
@@ -67,79 +138,87 @@ class ModelInstance:
             return False
 
         try:
-            self.interpreter = tflite.Interpreter(model_path=self.model_path)
-            self.interpreter.allocate_tensors()
+            interpreters = []
+            for _ in range(self.pool_size):
+                interpreter = tflite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+                interpreter.allocate_tensors()
+                interpreters.append(interpreter)
+
+            self._interpreters = interpreters
+            self._scratch = {}
+            self._pool = queue.Queue()
+            for interpreter in interpreters:
+                self._pool.put(interpreter)
+
+            self.interpreter = interpreters[0]
+            self.identity = f"{self.name}:{self.model_path}:{os.stat(self.model_path).st_mtime_ns}:{next(_load_counter)}"
             self.input_details = self.interpreter.get_input_details()
             self.output_details = self.interpreter.get_output_details()
             self.loaded = True
             self.error = None
-            log.info(f"{self.name} model loaded successfully")
+            log.info(f"{self.name} model loaded successfully", pool_size=self.pool_size, num_threads=self.num_threads)
             return True
         except Exception as e:
             self.error = f"Failed to load model: {str(e)}"
             log.error(f"Failed to load {self.name} model", error=str(e))
             return False
 
-    def classify(self, image: Image.Image) -> list[dict]:
-        """Classify an image using this model.
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Borrow an interpreter from the pool, returning it when done.
 
-        Preprocessing for EfficientNet-Lite4:
-        - Input: 300x300 (or model-specified size) RGB float32
-        - Normalization: (pixel - 127) / 128 → range [-1, 1]
-        - Output: Apply softmax to convert logits to probabilities
+        Blocks until one is free; raises queue.Empty if ``timeout`` expires.
         """
-        if not self.loaded or not self.interpreter:
-            log.warning(f"{self.name} model not loaded, cannot classify")
-            return []
+        interpreter = self._pool.get(timeout=timeout)
+        try:
+            yield interpreter
+        finally:
+            self._pool.put(interpreter)
 
-        # Get expected input size from model
-        input_details = self.input_details[0]
-        input_shape = input_details['shape']
+    def _target_size(self) -> tuple[int, int]:
+        """Return the (width, height) the model expects."""
+        input_shape = self.input_details[0]['shape']
 
         # Shape is typically [1, height, width, 3] for image models
         if len(input_shape) == 4:
-            target_height, target_width = input_shape[1], input_shape[2]
-        else:
-            target_height, target_width = 300, 300  # EfficientNet-Lite4 default
-
-        log.info(f"{self.name} classify: input image mode={image.mode}, size={image.size}, "
-                 f"target={target_width}x{target_height}, model_dtype={input_details['dtype']}")
+            return int(input_shape[2]), int(input_shape[1])
+        return 300, 300  # EfficientNet-Lite4 default
 
-        # Step 1: Convert to RGB (handles RGBA, grayscale, palette, etc.)
-        image = image.convert('RGB')
+    def _resize(self, image: Image.Image, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decode and resize a PIL image to a (height, width, 3) uint8 RGB array.
 
-        # Step 2: Resize to exact target size using high-quality resampling
-        image = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+        Uses the reduced-resolution JPEG decode fast path; writes into ``out`` if given.
+        """
+        size = self._target_size()
+        log.debug(f"{self.name} preprocess: input image mode={image.mode}, size={image.size}, "
+                  f"target={size[0]}x{size[1]}")
+        return resize_to_input(image, size, out)
 
-        # Step 3: Convert to numpy array (uint8, range 0-255)
-        input_data = np.array(image, dtype=np.float32)
+    def _normalize_into(self, pixels: np.ndarray, out: np.ndarray):
+        """Write uint8 RGB pixels into ``out`` in the model's input dtype, in place.
 
-        # Step 4: Normalize based on model input type
-        if input_details['dtype'] == np.float32:
-            # EfficientNet-Lite normalization: (pixel - 127) / 128 → range [-1, 1]
-            input_data = (input_data - 127.0) / 128.0
-            log.debug(f"{self.name}: Normalized to [-1,1], range=[{input_data.min():.2f}, {input_data.max():.2f}]")
-        elif input_details['dtype'] == np.uint8:
+        Preprocessing for EfficientNet-Lite4:
+        - Input: 300x300 (or model-specified size) RGB float32
+        - Normalization: (pixel - 127) / 128 → range [-1, 1]
+        """
+        if out.dtype == np.uint8:
             # Quantized models: keep as uint8
-            input_data = np.array(image, dtype=np.uint8)
-
-        # Step 5: Add batch dimension - shape becomes (1, height, width, 3)
-        input_data = np.expand_dims(input_data, axis=0)
+            out[...] = pixels
+            return
 
-        log.debug(f"{self.name}: input_data shape={input_data.shape}, dtype={input_data.dtype}")
+        # EfficientNet-Lite normalization: (pixel - 127) / 128 → range [-1, 1]
+        np.subtract(pixels, 127.0, out=out, dtype=out.dtype)
+        np.multiply(out, 1.0 / 128.0, out=out)
 
-        # Run inference
-        self.interpreter.set_tensor(input_details['index'], input_data)
-        self.interpreter.invoke()
+    def _postprocess(self, output_data: np.ndarray, top_k: int = 5) -> list[list[dict]]:
+        """Turn a raw (batch, classes) output block into top-k results per image.
 
-        # Get output
+        Dequantization, probability normalisation/softmax and top-k selection
+        all run as matrix operations over the whole batch.
+        """
         output_details = self.output_details[0]
-        output_data = self.interpreter.get_tensor(output_details['index'])
-
-        log.debug(f"{self.name}: output shape={output_data.shape}, dtype={output_data.dtype}")
-
-        # Process output
-        results = np.squeeze(output_data).astype(np.float32)
+        # No copy for float32 outputs; nothing below modifies ``results`` in place
+        results = output_data.reshape(output_data.shape[0], -1).astype(np.float32, copy=False)
 
         # Dequantize if output is uint8
         if output_details['dtype'] == np.uint8:
@@ -155,52 +234,155 @@ class ModelInstance:
             else:
                 results = results / 255.0
 
-        # Check if output is already probabilities vs logits
-        # Probabilities: all values in [0, 1] range (post-softmax)
-        # Logits: can have negative values or values > 1.0, need softmax
-        output_sum = float(results.sum())
-        output_min = float(results.min())
-        output_max = float(results.max())
-        log.info(f"{self.name}: Raw output stats - min={output_min:.6f}, max={output_max:.6f}, sum={output_sum:.6f}")
-
-        # Detect if output looks like probabilities (post-softmax)
-        # Key insight: probabilities are always in [0, 1] range
-        # Logits can be negative or > 1.0 (typically in range [-10, 10])
-        # For quantized models, sum may be < 1.0 due to precision loss, so we don't rely on sum
-        is_probability = output_min >= 0 and output_max <= 1.0
-
-        if is_probability:
-            # Already probabilities - normalize to ensure they sum to 1.0
-            # This handles quantization error without incorrectly applying softmax
-            if output_sum > 0:
-                log.info(f"{self.name}: Normalizing probabilities (sum={output_sum:.4f})")
-                results = results / output_sum
-            else:
-                log.warning(f"{self.name}: Output sum is zero, cannot normalize")
-        else:
-            # Logits - apply softmax to convert to probabilities
-            log.info(f"{self.name}: Applying softmax to logits (min={output_min:.4f}, max={output_max:.4f})")
-            exp_results = np.exp(results - np.max(results))
-            results = exp_results / np.sum(exp_results)
-            log.info(f"{self.name}: After softmax - max={float(results.max()):.6f}")
-
-        # Get top-5 predictions
-        top_k = results.argsort()[-5:][::-1]
-
-        classifications = []
-        for i in top_k:
-            score = float(results[i])
-            label = self.labels[i] if i < len(self.labels) else f"Class {i}"
-            classifications.append({
-                "index": int(i),
-                "score": score,
-                "label": label
-            })
-
-        top_results = [(c['label'], f"{c['score']*100:.1f}%") for c in classifications[:3]]
-        log.info(f"{self.name} classify results: {top_results}")
-
-        return classifications
+        # Detect per row whether output looks like probabilities (post-softmax) or logits.
+        # Probabilities are always in [0, 1]; logits can be negative or > 1.0.
+        # For quantized models, sum may be < 1.0 due to precision loss, so we don't rely on sum.
+        row_min = results.min(axis=1, keepdims=True)
+        row_max = results.max(axis=1, keepdims=True)
+        row_sum = results.sum(axis=1, keepdims=True)
+        is_probability = (row_min >= 0) & (row_max <= 1.0)
+
+        log.debug(f"{self.name}: Raw output stats - min={row_min.ravel()}, max={row_max.ravel()}, sum={row_sum.ravel()}")
+
+        # Probabilities: renormalise to sum to 1.0 (handles quantization error)
+        normalized = np.divide(results, row_sum, out=results.copy(), where=row_sum > 0)
+        # Logits: apply softmax
+        exp_results = np.exp(results - row_max)
+        softmaxed = exp_results / exp_results.sum(axis=1, keepdims=True)
+        probs = np.where(is_probability, normalized, softmaxed)
+
+        # Top-k per row without a full sort
+        k = min(top_k, probs.shape[1])
+        top_idx = np.argpartition(probs, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(probs, top_idx, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top_idx = np.take_along_axis(top_idx, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        batch_results = []
+        for indices, scores in zip(top_idx, top_scores):
+            classifications = []
+            for i, score in zip(indices, scores):
+                label = self.labels[i] if i < len(self.labels) else f"Class {i}"
+                classifications.append({
+                    "index": int(i),
+                    "score": float(score),
+                    "label": label
+                })
+            batch_results.append(classifications)
+        return batch_results
+
+    def _scratch_pixels(self, interpreter, n: int) -> np.ndarray:
+        """Return a reusable (n, H, W, 3) uint8 staging buffer owned by ``interpreter``."""
+        buffer = self._scratch.get(id(interpreter))
+        if buffer is None or buffer.shape[0] < n:
+            target_width, target_height = self._target_size()
+            buffer = np.empty((n, target_height, target_width, 3), dtype=np.uint8)
+            self._scratch[id(interpreter)] = buffer
+        return buffer[:n]
+
+    def _invoke(self, interpreter, pixels: np.ndarray) -> np.ndarray:
+        """Run one invoke over (N, H, W, 3) uint8 pixels.
+
+        The input tensor's batch dimension is padded up to the next power of
+        two, so varying batch sizes only reallocate tensors when they cross
+        into another bucket; padding rows hold stale pixels and their outputs
+        are sliced off. Normalized pixels are written straight into the
+        interpreter's input tensor and the output is returned as a view of
+        its output tensor, so no intermediate copies are made. The returned
+        view is only valid until the interpreter is invoked, resized or
+        handed back to the pool.
+        """
+        input_index = self.input_details[0]['index']
+        n = pixels.shape[0]
+        bucket = _batch_bucket(n)
+
+        current = interpreter.get_input_details()[0]['shape']
+        if int(current[0]) != bucket:
+            interpreter.resize_tensor_input(input_index, [bucket, *pixels.shape[1:]])
+            interpreter.allocate_tensors()
+
+        input_view = interpreter.tensor(input_index)()
+        self._normalize_into(pixels, input_view[:n])
+        # TFLite refuses to invoke while numpy views of its buffers are alive
+        del input_view
+
+        interpreter.invoke()
+        return interpreter.tensor(self.output_details[0]['index'])()[:n]
+
+    def _run(self, interpreter, pixels: np.ndarray) -> list[list[dict]]:
+        """Invoke ``interpreter`` over a pixel block and post-process the results."""
+        n = pixels.shape[0]
+        started = time.perf_counter()
+
+        try:
+            output_view = self._invoke(interpreter, pixels)
+            log.debug(f"{self.name}: output shape={output_view.shape}, dtype={output_view.dtype}")
+            batch_results = self._postprocess(output_view)
+            del output_view
+        except (ValueError, RuntimeError) as e:
+            if n == 1:
+                raise
+            log.warning(f"{self.name}: batched invoke unsupported, falling back to single images", error=str(e))
+            batch_results = []
+            for i in range(n):
+                output_view = self._invoke(interpreter, pixels[i:i + 1])
+                batch_results.extend(self._postprocess(output_view))
+                del output_view
+
+        inference_duration.observe(time.perf_counter() - started, self.name)
+
+        for classifications in batch_results:
+            top_results = [(c['label'], f"{c['score']*100:.1f}%") for c in classifications[:3]]
+            log.info(f"{self.name} classify results: {top_results}")
+        return batch_results
+
+    def classify_batch(self, images: list[Image.Image]) -> list[list[dict]]:
+        """Classify several images with a single interpreter invoke.
+
+        The input tensor is sized to a power-of-two bucket covering the batch.
+        Models with a fixed batch dimension fall back to one invoke per image.
+        """
+        if not images:
+            return []
+        if not self.loaded or not self.interpreter:
+            log.warning(f"{self.name} model not loaded, cannot classify")
+            return [[] for _ in images]
+
+        with self.checkout() as interpreter:
+            pixels = self._scratch_pixels(interpreter, len(images))
+            for i, image in enumerate(images):
+                self._resize(image, out=pixels[i])
+            return self._run(interpreter, pixels)
+
+    def classify_pixels(self, pixels: np.ndarray) -> list[list[dict]]:
+        """Classify a (N, height, width, 3) block of resized uint8 RGB pixels.
+
+        Used directly by process-pool workers, which receive pixels that were
+        already decoded and resized by the parent process.
+        """
+        if not self.loaded or not self.interpreter:
+            log.warning(f"{self.name} model not loaded, cannot classify")
+            return [[] for _ in range(len(pixels))]
+
+        with self.checkout() as interpreter:
+            return self._run(interpreter, pixels)
+
+    def classify(self, image: Image.Image) -> list[dict]:
+        """Classify a single image using this model."""
+        return self.classify_batch([image])[0]
+
+    def invoke_raw(self, pixels: np.ndarray) -> np.ndarray:
+        """Invoke over (N, height, width, 3) uint8 pixels and return a copy of the raw output.
+
+        Goes through the same input handling as classification (tensor resize
+        and normalization); used by the debug endpoints.
+        """
+        with self.checkout() as interpreter:
+            output_view = self._invoke(interpreter, pixels)
+            raw = np.array(output_view)
+            del output_view
+        return raw
 
     def get_status(self) -> dict:
         """Return the current status of this model."""
@@ -210,6 +392,9 @@ class ModelInstance:
             "labels_count": len(self.labels),
             "enabled": self.interpreter is not None,
             "model_path": self.model_path,
+            "pool_size": len(self._interpreters),
+            "num_threads": self.num_threads,
+            "interpreters_available": self._pool.qsize(),
         }
 
 
@@ -218,7 +403,24 @@ class ClassifierService:
 
     def __init__(self):
         self._models: dict[str, ModelInstance] = {}
-        self._init_bird_model()
+        self.pool_size = default_pool_size()
+        # At most pool_size invokes run at once (one per inference thread, across
+        # both models), so their TFLite threads together fit the CPU count
+        self.num_threads = interpreter_threads(self.pool_size)
+        # One inference thread per pooled bird interpreter
+        self._executor = InferenceExecutor(
+            max_workers=self.pool_size,
+            max_queue=settings.classification.inference_queue_size
+        )
+        # Groups concurrent bird classify requests (MQTT, backfill, reclassify) into batches
+        self._batcher = BatchScheduler(
+            self.classify_batch_async,
+            max_batch_size=settings.classification.batch_max_size,
+            max_wait_ms=settings.classification.batch_max_wait_ms
+        )
+        self._process_pool: Optional[ProcessInferencePool] = None
+        self._cache = ClassificationCache(settings.classification.result_cache_size)
+        self._setup_bird_model()
 
     def _get_model_paths(self, model_file: str, labels_file: str) -> tuple[str, str]:
         """Get full paths for model and labels files."""
@@ -238,17 +440,106 @@ class ClassifierService:
 
         return model_path, labels_path
 
-    def _init_bird_model(self):
+    def _init_bird_model(self, pool_size: Optional[int] = None):
         """Initialize the bird classification model (loaded at startup)."""
         model_path, labels_path = self._get_model_paths(
             settings.classification.model,
             "labels.txt"
         )
 
-        bird_model = ModelInstance("bird", model_path, labels_path)
+        bird_model = ModelInstance("bird", model_path, labels_path, pool_size=pool_size or self.pool_size,
+                                   num_threads=self.num_threads)
         bird_model.load()  # Load immediately for bird model
         self._models["bird"] = bird_model
 
+    def _setup_bird_model(self):
+        """Load the bird model and, in process mode, its worker processes."""
+        if settings.classification.inference_mode == "process":
+            # Workers run the inference; the parent only needs one interpreter (debug endpoint)
+            self._init_bird_model(pool_size=1)
+            if self._start_process_pool() or not self._models["bird"].loaded:
+                return
+        self._init_bird_model()
+
+    def _start_process_pool(self) -> bool:
+        """Start worker processes for the bird model (inference_mode = "process").
+
+        Returns False if the pool could not be started.
+        """
+        bird = self._models.get("bird")
+        if not bird or not bird.loaded:
+            log.warning("Bird model not loaded, staying in thread inference mode")
+            return False
+
+        target_width, target_height = bird._target_size()
+        workers = settings.classification.process_workers or os.cpu_count() or 1
+        try:
+            self._process_pool = ProcessInferencePool(
+                "bird",
+                bird.model_path,
+                bird.labels_path,
+                image_shape=(target_height, target_width, 3),
+                workers=workers,
+                max_batch_size=settings.classification.batch_max_size,
+                num_threads=interpreter_threads(workers)
+            )
+        except Exception as e:
+            log.error("Failed to start process inference pool, using threads", error=str(e))
+            self._process_pool = None
+            return False
+        return True
+
+    def _fill_slot(self, bird: ModelInstance, images: list[Image.Image]):
+        """Decode and resize images straight into a shared-memory slot."""
+        slot = self._process_pool.acquire_slot()
+        try:
+            view = slot.view(len(images))
+            for i, image in enumerate(images):
+                bird._resize(image, out=view[i])
+            del view
+        except Exception:
+            self._process_pool.release_slot(slot)
+            raise
+        return slot
+
+    async def _fill_slot_async(self, bird: ModelInstance, images: list[Image.Image]):
+        """Fill a shared-memory slot on an inference thread.
+
+        The fill is shielded from cancellation: if the caller goes away while
+        a thread is filling, the slot is handed back once the fill finishes
+        instead of leaking.
+        """
+        pool = self._process_pool
+        fill = asyncio.ensure_future(self._executor.run(self._fill_slot, bird, images))
+
+        def release_abandoned(done: asyncio.Future):
+            if not done.cancelled() and done.exception() is None and done.result() is not None:
+                pool.release_slot(done.result())
+
+        try:
+            return await asyncio.shield(fill)
+        except asyncio.CancelledError:
+            fill.add_done_callback(release_abandoned)
+            raise
+
+    async def _classify_batch_process(self, images: list[Image.Image]) -> list[list[dict]]:
+        """Classify on worker processes, handing pixels over via shared memory."""
+        bird = self._models["bird"]
+        pool = self._process_pool
+        results: list[list[dict]] = []
+        for start in range(0, len(images), pool.max_batch_size):
+            chunk = images[start:start + pool.max_batch_size]
+            # Decode/resize on an inference thread, then run the model on a worker
+            slot = await self._fill_slot_async(bird, chunk)
+            try:
+                started = time.perf_counter()
+                results.extend(await pool.classify_slot(slot, len(chunk)))
+                # Worker processes can't report to this registry; time the round trip here
+                inference_duration.observe(time.perf_counter() - started, bird.name)
+            finally:
+                pool.release_slot(slot)
+        return results
+
     def _get_wildlife_model(self) -> ModelInstance:
         """Get or lazily load the wildlife model."""
         if "wildlife" not in self._models:
@@ -256,7 +547,9 @@ class ClassifierService:
                 settings.classification.wildlife_model,
                 settings.classification.wildlife_labels
             )
-            self._models["wildlife"] = ModelInstance("wildlife", model_path, labels_path)
+            self._models["wildlife"] = ModelInstance("wildlife", model_path, labels_path,
+                                                     pool_size=wildlife_pool_size(self.pool_size),
+                                                     num_threads=self.num_threads)
 
         model = self._models["wildlife"]
         if not model.loaded:
@@ -285,14 +578,26 @@ class ClassifierService:
         """Return the current status of the bird classifier (legacy)."""
         bird = self._models.get("bird")
         if bird:
-            return bird.get_status()
+            return {**bird.get_status(), "inference": self.get_inference_stats()}
         return {
             "loaded": False,
             "error": "Bird model not initialized",
             "labels_count": 0,
             "enabled": False,
+            "inference": self.get_inference_stats(),
         }
 
+    def get_inference_stats(self) -> dict:
+        """Return queue depth and wait-time stats of the inference executor."""
+        stats = {
+            **self._executor.get_stats(),
+            "batching": self._batcher.get_stats(),
+            "cache": self._cache.get_stats(),
+        }
+        if self._process_pool:
+            stats["process_pool"] = self._process_pool.get_stats()
+        return stats
+
     def get_wildlife_status(self) -> dict:
         """Return the current status of the wildlife classifier."""
         wildlife = self._models.get("wildlife")
@@ -332,11 +637,147 @@ class ClassifierService:
             return bird.classify(image)
         return []
 
+    def classify_batch(self, images: list[Image.Image]) -> list[list[dict]]:
+        """Classify several images with the bird model in one invoke."""
+        bird = self._models.get("bird")
+        if bird:
+            return bird.classify_batch(images)
+        return [[] for _ in images]
+
     def classify_wildlife(self, image: Image.Image) -> list[dict]:
         """Classify an image using the wildlife model."""
         wildlife = self._get_wildlife_model()
         return wildlife.classify(image)
 
+    async def classify_async(self, image: Image.Image) -> list[dict]:
+        """Classify an image with the bird model on the inference executor.
+
+        Decoding, resizing and interpreter.invoke() all run off the event loop.
+        Concurrent requests are micro-batched into a single invoke.
+        """
+        if self._batcher.max_batch_size <= 1:
+            return (await self.classify_batch_async([image]))[0]
+        return await self._batcher.submit(image)
+
+    async def classify_batch_async(self, images: list[Image.Image]) -> list[list[dict]]:
+        """Classify several images with the bird model on the inference executor."""
+        if self._process_pool:
+            return await self._classify_batch_process(images)
+        return await self._executor.run(self.classify_batch, images)
+
+    async def classify_wildlife_async(self, image: Image.Image) -> list[dict]:
+        """Classify an image with the wildlife model on the inference executor."""
+        return await self._executor.run(self.classify_wildlife, image)
+
+    async def invoke_raw_async(self, model: ModelInstance, pixels: np.ndarray) -> np.ndarray:
+        """Run ModelInstance.invoke_raw on the inference executor."""
+        return await self._executor.run(model.invoke_raw, pixels)
+
+    def _model_key(self, name: str) -> Optional[str]:
+        """Identity of a loaded model for cache keys (None if not loaded)."""
+        model = self._models.get(name)
+        return model.identity if model and model.loaded else None
+
+    async def _classify_snapshots_cached(self, name: str, snapshots: list[bytes], classify) -> list[list[dict]]:
+        """Serve snapshots from the result cache, classifying only the misses."""
+        model_key = self._model_key(name)
+        digests = [snapshot_digest(data) for data in snapshots]
+        results: list[Optional[list[dict]]] = [
+            self._cache.get(model_key, digest) if model_key else None for digest in digests
+        ]
+
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            images = [Image.open(BytesIO(snapshots[i])) for i in misses]
+            fresh = await classify(images)
+            # The model may have been swapped while we were classifying
+            if self._model_key(name) == model_key and model_key:
+                for i, classifications in zip(misses, fresh):
+                    self._cache.put(model_key, digests[i], classifications)
+            for i, classifications in zip(misses, fresh):
+                results[i] = classifications
+        return results
+
+    async def classify_snapshot_async(self, snapshot: bytes) -> list[dict]:
+        """Classify raw snapshot bytes with the bird model, using the result cache."""
+        async def classify(images):
+            return [await self.classify_async(images[0])]
+        return (await self._classify_snapshots_cached("bird", [snapshot], classify))[0]
+
+    async def classify_snapshots_async(self, snapshots: list[bytes]) -> list[list[dict]]:
+        """Batch variant of classify_snapshot_async; misses share one batched invoke."""
+        return await self._classify_snapshots_cached("bird", snapshots, self.classify_batch_async)
+
+    async def classify_wildlife_snapshot_async(self, snapshot: bytes) -> list[dict]:
+        """Classify raw snapshot bytes with the wildlife model, using the result cache."""
+        async def classify(images):
+            return [await self.classify_wildlife_async(images[0])]
+        return (await self._classify_snapshots_cached("wildlife", [snapshot], classify))[0]
+
+    def prepare_snapshot(self, snapshot: bytes, trace=None) -> PreparedSnapshot:
+        """Cache-check and decode snapshot bytes for the bird model (blocking).
+
+        On a cache miss the JPEG is decoded and downscaled to the model input
+        size here, so the later inference only copies pixels into the input
+        tensor. Lets callers decode on separate threads from inference.
+        ``trace`` (a DetectionTrace) gets 'decoded'/'preprocessed' marks.
+        """
+        model_key = self._model_key("bird")
+        digest = snapshot_digest(snapshot)
+        cached = self._cache.get(model_key, digest) if model_key else None
+        if cached is not None:
+            if trace is not None:
+                trace.cached = True
+                trace.mark("decoded")
+                trace.mark("preprocessed")
+            return PreparedSnapshot(model_key, digest, results=cached)
+
+        image = Image.open(BytesIO(snapshot))
+        bird = self._models.get("bird")
+        if bird and bird.loaded:
+            size = bird._target_size()
+            image = decode_for_input(image, size)
+            if trace is not None:
+                trace.mark("decoded")
+            image = Image.fromarray(resize_to_input(image, size))
+        if trace is not None:
+            trace.mark("preprocessed")
+        return PreparedSnapshot(model_key, digest, image=image)
+
+    async def classify_prepared_async(self, prepared: PreparedSnapshot) -> list[dict]:
+        """Classify a snapshot from prepare_snapshot, filling the result cache."""
+        if prepared.results is not None:
+            return prepared.results
+        results = await self.classify_async(prepared.image)
+        # The model may have been swapped while we were classifying
+        if prepared.model_key and self._model_key("bird") == prepared.model_key:
+            self._cache.put(prepared.model_key, prepared.digest, results)
+        return results
+
+    async def reload_model(self, name: str):
+        """Reload a model after its files changed and drop its cached results.
+
+        Stopping worker processes and loading interpreters block, so both run
+        on a thread rather than the event loop.
+        """
+        if name == "bird":
+            pool, self._process_pool = self._process_pool, None
+            if pool:
+                await asyncio.to_thread(pool.shutdown)
+            await asyncio.to_thread(self._setup_bird_model)
+        else:
+            # Lazily loaded models are re-created on next use
+            self._models.pop(name, None)
+        self._cache.invalidate(name)
+        log.info("Model reloaded", model=name)
+
+    def shutdown(self):
+        """Stop the inference executor and any worker processes."""
+        if self._process_pool:
+            self._process_pool.shutdown()
+            self._process_pool = None
+        self._executor.shutdown(wait=False)
+
     def get_wildlife_labels(self) -> list[str]:
         """Get the list of wildlife labels."""
         wildlife = self._get_wildlife_model()
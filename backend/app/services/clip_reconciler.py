@@ -0,0 +1,297 @@
+import asyncio
+import time
+import structlog
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.database import get_read_db
+from app.repositories.detection_repository import DetectionRepository
+from app.services.detection_writer import get_detection_writer
+from app.services.frigate_client import FrigateClient, FrigateUnavailableError, get_frigate_client
+
+log = structlog.get_logger()
+
+# Missing clips of detections younger than this are rechecked; older misses are final
+MISSING_CLIP_WINDOW = timedelta(days=7)
+
+# Fallback lookups of single events running at once
+CLIP_CHECK_CONCURRENCY = 8
+# Longest time window covered by one bulk /api/events query, and its max page size
+BULK_WINDOW_SECONDS = 6 * 3600
+BULK_QUERY_LIMIT = 1000
+
+
+class ClipCache:
+    """Short-lived memory of clip lookups so repeated checks don't hit Frigate again."""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 4096):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+
+    def get(self, event_id: str) -> Optional[bool]:
+        entry = self._entries.get(event_id)
+        if entry is None:
+            return None
+        has_clip, expires = entry
+        if time.monotonic() >= expires:
+            del self._entries[event_id]
+            return None
+        return has_clip
+
+    def put(self, availability: dict[str, bool]):
+        expires = time.monotonic() + self.ttl
+        for event_id, has_clip in availability.items():
+            self._entries.pop(event_id, None)
+            self._entries[event_id] = (has_clip, expires)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+clip_cache = ClipCache()
+
+
+def _event_start_time(event_id: str) -> Optional[float]:
+    """Frigate event ids start with the event's start timestamp ("1700000000.123456-abc123")."""
+    try:
+        return float(event_id.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def _time_windows(event_ids: list[str]) -> list[tuple[float, float, set[str]]]:
+    """Group events with parseable ids into (after, before, ids) windows of at most BULK_WINDOW_SECONDS."""
+    timed = sorted(
+        (start, event_id) for event_id in event_ids
+        if (start := _event_start_time(event_id)) is not None
+    )
+    windows = []
+    for start, event_id in timed:
+        if windows and start - windows[-1][0] <= BULK_WINDOW_SECONDS:
+            first, _, ids = windows[-1]
+            windows[-1] = (first, start, ids | {event_id})
+        else:
+            windows.append((start, start, {event_id}))
+    return windows
+
+
+async def _bulk_check(frigate: FrigateClient, event_ids: list[str]) -> dict[str, bool]:
+    """Look events up with one /api/events query per time window."""
+    result = {}
+    for after, before, ids in _time_windows(event_ids):
+        params = {
+            "after": after - 1,
+            "before": before + 1,
+            "label": "bird",
+            "limit": min(BULK_QUERY_LIMIT, max(100, len(ids) * 4)),
+        }
+        try:
+            resp = await frigate.get_events(params)
+        except FrigateUnavailableError:
+            break
+        except Exception as e:
+            log.debug("Bulk clip check failed", error=str(e))
+            continue
+        if resp.status_code != 200:
+            continue
+        for event in resp.json():
+            if event.get("id") in ids:
+                result[event["id"]] = bool(event.get("has_clip", False))
+    return result
+
+
+async def _check_one(frigate: FrigateClient, event_id: str, limit: asyncio.Semaphore) -> Optional[bool]:
+    async with limit:
+        try:
+            resp = await frigate.get_event(event_id)
+        except FrigateUnavailableError:
+            return None
+        except Exception as e:
+            log.debug("Failed to check clip", event_id=event_id, error=str(e))
+            return None
+    if resp.status_code == 200:
+        return bool(resp.json().get("has_clip", False))
+    if resp.status_code == 404:
+        # Frigate no longer knows the event, so there is no clip either
+        return False
+    return None
+
+
+async def batch_check_clips(event_ids: list[str], frigate: Optional[FrigateClient] = None) -> dict[str, bool]:
+    """
+    Check clip availability for multiple events from Frigate.
+    Returns a dict mapping event_id -> has_clip boolean; events whose
+    availability could not be determined are left out.
+
+    Recently checked events are answered from ``clip_cache``. The rest are
+    fetched in bulk with one /api/events query per time window (the start
+    time is encoded in the event id); events the bulk query did not return
+    are looked up one by one, CLIP_CHECK_CONCURRENCY at a time.
+    """
+    if not event_ids:
+        return {}
+
+    frigate = frigate or get_frigate_client()
+    result = {}
+    missing = []
+    for event_id in dict.fromkeys(event_ids):
+        cached = clip_cache.get(event_id)
+        if cached is None:
+            missing.append(event_id)
+        else:
+            result[event_id] = cached
+    if not missing:
+        return result
+
+    found = await _bulk_check(frigate, missing)
+    remaining = [event_id for event_id in missing if event_id not in found]
+    if remaining:
+        limit = asyncio.Semaphore(CLIP_CHECK_CONCURRENCY)
+        outcomes = await asyncio.gather(*(_check_one(frigate, event_id, limit) for event_id in remaining))
+        found.update({
+            event_id: has_clip for event_id, has_clip in zip(remaining, outcomes) if has_clip is not None
+        })
+
+    clip_cache.put(found)
+    result.update(found)
+    return result
+
+
+class ClipReconciler:
+    """Keeps the stored clip availability (detections.has_clip) in line with Frigate.
+
+    ``/events`` answers from the database alone; detections whose
+    availability is not known yet are handed to ``request()`` and checked
+    here in the background. Every ``interval_seconds`` the reconciler also
+    rechecks stale values, since clips appear after an event ends and
+    disappear with Frigate's retention.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 600.0,
+        recheck_hours: float = 24.0,
+        batch_size: int = 100,
+        frigate: Optional[FrigateClient] = None,
+    ):
+        self.interval = interval_seconds
+        self.recheck_after = timedelta(hours=recheck_hours)
+        self.batch_size = max(1, batch_size)
+        self.frigate = frigate
+        self._pending: dict[str, None] = {}  # insertion-ordered set
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.runs = 0
+        self.checked = 0
+        self.last_run: Optional[datetime] = None
+
+    def request(self, event_ids: list[str]):
+        """Ask for these events to be checked soon (no-op for ones already pending)."""
+        for event_id in event_ids:
+            if len(self._pending) >= self.batch_size * 10:
+                break  # the periodic pass picks up the rest from the database
+            self._pending.setdefault(event_id)
+        if self._wake is not None and self._pending:
+            self._wake.set()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        if self._pending:
+            self._wake.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wake = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.reconcile_once()
+            except Exception as e:
+                log.error("Clip reconciliation failed", error=str(e))
+
+    def _take_pending(self) -> list[str]:
+        event_ids = list(self._pending)[:self.batch_size]
+        for event_id in event_ids:
+            del self._pending[event_id]
+        return event_ids
+
+    async def reconcile_once(self) -> int:
+        """Check requested and stale detections against Frigate. Returns the number stored."""
+        if not settings.frigate.clips_enabled:
+            self._pending.clear()
+            return 0
+
+        event_ids = self._take_pending()
+        if len(event_ids) < self.batch_size:
+            now = datetime.now()
+            async with get_read_db() as db:
+                candidates = await DetectionRepository(db).get_clip_check_candidates(
+                    now - self.recheck_after, now - MISSING_CLIP_WINDOW, limit=self.batch_size - len(event_ids))
+            event_ids.extend(event_id for event_id in candidates if event_id not in event_ids)
+
+        availability = await batch_check_clips(event_ids, self.frigate)
+        writer = get_detection_writer()
+        if availability:
+            await writer.set_clip_availability(availability)
+        failed = [event_id for event_id in event_ids if event_id not in availability]
+        if failed:
+            # Moves them behind other candidates until they are tried again
+            await writer.mark_clip_check_failed(failed)
+
+        self.runs += 1
+        self.checked += len(availability)
+        self.last_run = datetime.now()
+        if availability:
+            log.debug("Reconciled clip availability", checked=len(availability), requested=len(event_ids))
+        return len(availability)
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pending": len(self._pending),
+            "runs": self.runs,
+            "checked": self.checked,
+            "cached": len(clip_cache),
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+
+_clip_reconciler: Optional[ClipReconciler] = None
+
+
+def get_clip_reconciler() -> ClipReconciler:
+    """Get the shared clip reconciler instance."""
+    global _clip_reconciler
+    if _clip_reconciler is None:
+        _clip_reconciler = ClipReconciler(
+            interval_seconds=settings.maintenance.clip_reconcile_interval_seconds,
+            recheck_hours=settings.maintenance.clip_recheck_hours,
+            batch_size=settings.maintenance.clip_reconcile_batch_size,
+        )
+    return _clip_reconciler
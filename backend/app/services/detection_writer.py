@@ -0,0 +1,198 @@
+import asyncio
+import time
+import structlog
+from typing import Any, Awaitable, Callable, Optional
+
+from app.config import settings
+from app.database import get_db
+from app.repositories.detection_repository import Detection, DetectionRepository
+
+log = structlog.get_logger()
+
+WriteOp = Callable[[DetectionRepository], Awaitable[Any]]
+
+
+class DetectionWriter:
+    """Write-behind persistence: many small writes, one transaction.
+
+    Every commit takes the writer connection and appends a commit to the
+    WAL, so writing detections one commit at a time caps throughput under
+    MQTT bursts and backfill. Writes are queued instead and applied together
+    once ``max_batch_size`` are pending or the oldest has waited
+    ``max_wait_ms``. A failing write is rolled back and reported to its
+    caller alone while the rest of the batch commits. Callers await a future
+    that resolves once their write is committed; batches are applied in
+    submission order.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._pending: list[tuple[WriteOp, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last: Optional[asyncio.Task] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0
+        self.max_seen_batch = 0
+        self.commit_ms = 0.0
+
+    async def submit(self, op: WriteOp) -> Any:
+        """Queue ``op(repo)`` for the next batch and wait until it is committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((op, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        # Shielded: a caller that gives up must not take its write with it
+        return await asyncio.shield(future)
+
+    # Writes used across the app
+
+    async def insert(self, detection: Detection):
+        await self.submit(lambda repo: repo.create(detection, commit=False))
+
+    async def upsert(self, detection: Detection) -> str:
+        """Create or improve a detection. Returns 'created', 'updated' or 'unchanged'."""
+        return await self.submit(lambda repo: repo.upsert(detection, commit=False))
+
+    async def upsert_many(self, detections: list[Detection]) -> list[str]:
+        return await self.submit(lambda repo: repo.upsert_many(detections, commit=False))
+
+    async def set_clip_availability(self, availability: dict[str, bool]):
+        await self.submit(lambda repo: repo.set_clip_availability(availability, commit=False))
+
+    async def mark_clip_check_failed(self, frigate_events: list[str]):
+        await self.submit(lambda repo: repo.mark_clip_check_failed(frigate_events, commit=False))
+
+    async def save_trace(self, frigate_event: str, trace: dict):
+        await self.submit(lambda repo: repo.save_trace(frigate_event, trace, commit=False))
+
+    async def toggle_hidden(self, frigate_event: str) -> Optional[bool]:
+        return await self.submit(lambda repo: repo.toggle_hidden(frigate_event, commit=False))
+
+    async def delete(self, frigate_event: str) -> bool:
+        return await self.submit(lambda repo: repo.delete_by_frigate_event(frigate_event, commit=False))
+
+    def _flush(self):
+        """Hand everything pending to a batch task (chained after the previous one)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch, self._last))
+        self._last = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[WriteOp, asyncio.Future]], previous: Optional[asyncio.Task]):
+        if previous is not None and not previous.done() and previous.get_loop() is asyncio.get_running_loop():
+            await asyncio.wait([previous])
+
+        self.batches += 1
+        self.writes += len(batch)
+        self.max_seen_batch = max(self.max_seen_batch, len(batch))
+        started = time.perf_counter()
+
+        try:
+            outcomes = await self._apply([op for op, _ in batch])
+        except Exception as e:
+            log.error("Batched write failed", batch_size=len(batch), error=str(e))
+            self.failed += len(batch)
+            outcomes = [e] * len(batch)
+        self.commit_ms += (time.perf_counter() - started) * 1000
+
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    async def _apply(self, ops: list[WriteOp]) -> list[Any]:
+        """Run the writes in one transaction.
+
+        If one of them raises, the transaction is rolled back and retried
+        with a savepoint around each write, so only the failing ones are lost.
+        """
+        async with get_db() as db:
+            repo = DetectionRepository(db)
+            try:
+                outcomes = [await op(repo) for op in ops]
+            except Exception:
+                await db.rollback()
+            else:
+                await db.commit()
+                return outcomes
+
+            outcomes = []
+            # Explicit, so releasing a savepoint doesn't commit on its own
+            await db.execute("BEGIN")
+            for op in ops:
+                await db.execute("SAVEPOINT write_op")
+                try:
+                    outcomes.append(await op(repo))
+                except Exception as e:
+                    await db.execute("ROLLBACK TO write_op")
+                    self.failed += 1
+                    log.warning("Queued write failed", error=str(e))
+                    outcomes.append(e)
+                await db.execute("RELEASE write_op")
+            await db.commit()
+        return outcomes
+
+    async def flush(self):
+        """Write everything queued so far and wait until it is committed."""
+        self._flush()
+        tasks = [task for task in self._tasks if task.get_loop() is asyncio.get_running_loop()]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def close(self):
+        """Flush on shutdown; writes submitted later are still applied."""
+        pending = len(self._pending)
+        await self.flush()
+        log.info("Detection writer flushed", pending=pending, writes=self.writes)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def get_stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "writes": self.writes,
+            "failed": self.failed,
+            "avg_batch_size": (self.writes / self.batches) if self.batches else 0.0,
+            "max_batch_seen": self.max_seen_batch,
+            "avg_commit_ms": (self.commit_ms / self.batches) if self.batches else 0.0,
+        }
+
+
+_detection_writer: Optional[DetectionWriter] = None
+
+
+def get_detection_writer() -> DetectionWriter:
+    """Get the shared detection writer instance."""
+    global _detection_writer
+    if _detection_writer is None:
+        _detection_writer = DetectionWriter(
+            max_batch_size=settings.processing.write_batch_size,
+            max_wait_ms=settings.processing.write_max_wait_ms,
+        )
+    return _detection_writer
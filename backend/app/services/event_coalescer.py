@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+import structlog
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+log = structlog.get_logger()
+
+
+@dataclass
+class EventMessage:
+    """A Frigate event payload from MQTT, parsed once at intake.
+
+    The coalescer, intake queue and event processor all work on this
+    instead of decoding the JSON again.
+    """
+    payload: bytes
+    data: Optional[dict]  # None if the payload isn't a JSON object
+    received_at: float  # perf_counter time the message arrived
+
+    @classmethod
+    def parse(cls, payload: bytes, received_at: Optional[float] = None) -> 'EventMessage':
+        if received_at is None:
+            received_at = time.perf_counter()
+        try:
+            data = json.loads(payload)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        return cls(payload, data if isinstance(data, dict) else None, received_at)
+
+    @property
+    def after(self) -> dict:
+        return (self.data or {}).get('after') or {}
+
+    @property
+    def event_id(self) -> Optional[str]:
+        return self.after.get('id')
+
+    @property
+    def msg_type(self) -> Optional[str]:
+        return (self.data or {}).get('type')
+
+
+class EventCoalescer:
+    """Coalesces bursts of MQTT messages per Frigate event id.
+
+    Only the latest payload for an event is kept; it is handed on once no new
+    message for that event has arrived for ``quiet_window_ms`` (or after
+    ``max_delay_ms`` at the latest, so a constantly updating event still gets
+    processed). An 'end' message replaces anything pending and is dispatched
+    immediately. The handler gets the parsed EventMessage, which carries the
+    time (perf_counter) it was received from MQTT.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[EventMessage], Awaitable[None]],
+        quiet_window_ms: float = 250.0,
+        max_delay_ms: float = 2000.0,
+    ):
+        self._handler = handler
+        self.quiet_window = quiet_window_ms / 1000.0
+        self.max_delay = max(max_delay_ms, quiet_window_ms) / 1000.0
+        # event id -> (latest message, first seen, timer)
+        self._pending: dict[str, tuple[EventMessage, float, asyncio.TimerHandle]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self.received = 0
+        self.coalesced = 0
+        self.dispatched = 0
+
+    async def submit(self, payload: bytes, received_at: Optional[float] = None):
+        """Accept a raw MQTT payload. Never waits on downstream processing.
+
+        ``received_at`` is the perf_counter time the message arrived (default: now).
+        """
+        self.received += 1
+        message = EventMessage.parse(payload, received_at)
+        event_id = message.event_id
+
+        if event_id is None or self.quiet_window <= 0:
+            # Nothing to coalesce on; pass straight through
+            self._dispatch(message)
+            return
+
+        pending = self._pending.pop(event_id, None)
+        if pending is not None:
+            pending[2].cancel()
+            self.coalesced += 1
+
+        if message.msg_type == 'end':
+            self._dispatch(message)
+            return
+
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        first_seen = pending[1] if pending is not None else now
+        delay = min(self.quiet_window, max(0.0, first_seen + self.max_delay - now))
+        timer = loop.call_later(delay, self._flush, event_id)
+        self._pending[event_id] = (message, first_seen, timer)
+
+    def _flush(self, event_id: str):
+        pending = self._pending.pop(event_id, None)
+        if pending is not None:
+            self._dispatch(pending[0])
+
+    def _dispatch(self, message: EventMessage):
+        self.dispatched += 1
+        task = asyncio.get_running_loop().create_task(self._run(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, message: EventMessage):
+        try:
+            await self._handler(message)
+        except Exception as e:
+            log.error("Error handling coalesced event", error=str(e))
+
+    async def flush_all(self):
+        """Dispatch everything pending right away (used on shutdown)."""
+        for event_id in list(self._pending):
+            self._pending[event_id][2].cancel()
+            self._flush(event_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "dispatched": self.dispatched,
+            "pending_events": len(self._pending),
+            "in_flight": len(self._tasks),
+        }
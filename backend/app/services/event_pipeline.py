@@ -0,0 +1,179 @@
+import asyncio
+import time
+import structlog
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+log = structlog.get_logger()
+
+
+@dataclass
+class EventJob:
+    """One Frigate event message moving through the pipeline."""
+    frigate_event: str
+    after: dict
+    msg_type: Optional[str]
+    future: asyncio.Future
+    created_at: float = field(default_factory=time.monotonic)
+    # Event-state entry recorded at admission (EventStateTable)
+    snapshot_state: Any = None
+    # Filled in by the stages
+    snapshot: Optional[bytes] = None
+    prepared: Any = None
+    classification: Optional[dict] = None
+    label: Optional[str] = None
+    trace: Any = None
+
+
+class Stage:
+    """A pipeline stage: a bounded queue drained by ``concurrency`` workers.
+
+    ``handler(job)`` returns True to pass the job on to the next stage, or
+    False when the job is finished. Putting into a full stage waits, so a
+    slow stage pushes back on the ones before it instead of buffering
+    without bound.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[bool]],
+        concurrency: int,
+        max_queue: int,
+    ):
+        self.name = name
+        self._handler = handler
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(1, max_queue)
+        self.next_stage: Optional['Stage'] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._active = 0
+
+        # Stats
+        self.processed = 0
+        self.failed = 0
+        self._total_time = 0.0
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(self.max_queue)
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def put(self, job: EventJob):
+        await self._queue.put(job)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            await self._handle(job)
+
+    async def _handle(self, job: EventJob):
+        self._active += 1
+        started = time.perf_counter()
+        try:
+            keep = await self._handler(job)
+        except Exception as e:
+            self.failed += 1
+            log.error("Error processing event", stage=self.name, event_id=job.frigate_event, error=str(e))
+            keep = False
+        finally:
+            self._active -= 1
+            self._total_time += time.perf_counter() - started
+            self.processed += 1
+
+        if keep and self.next_stage is not None:
+            await self.next_stage.put(job)
+        elif not job.future.done():
+            job.future.set_result(None)
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def get_stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queued": self.depth,
+            "active": self._active,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_ms": (self._total_time / self.processed * 1000) if self.processed else 0.0,
+        }
+
+
+class EventPipeline:
+    """Chains stages so each event flows fetch -> decode -> classify -> persist -> notify.
+
+    Every stage has its own queue and concurrency limit, so snapshot
+    downloads for some events overlap with decoding and inference of others
+    instead of each event running all steps back-to-back.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+        self._started = False
+        self._started_at = 0.0
+        self._in_flight: set[asyncio.Future] = set()
+        self.submitted = 0
+        self.completed = 0
+
+    def start(self):
+        """Start all stage workers (idempotent)."""
+        if self._started:
+            return
+        for stage in self.stages:
+            stage.start()
+        self._started = True
+        self._started_at = time.monotonic()
+
+    async def submit(self, job: EventJob) -> asyncio.Future:
+        """Admit a job into the first stage; waits only while that stage is full.
+
+        The returned future resolves once the job has left the pipeline.
+        """
+        self.start()
+        self.submitted += 1
+        self._in_flight.add(job.future)
+        job.future.add_done_callback(lambda future: self._on_done(future, job))
+        await self.stages[0].put(job)
+        return job.future
+
+    def _on_done(self, future: asyncio.Future, job: EventJob):
+        self._in_flight.discard(future)
+        self.completed += 1
+        if job.trace is not None:
+            job.trace.finish()
+
+    async def stop(self, timeout: float = 10.0):
+        """Let in-flight jobs finish (up to ``timeout`` seconds), then stop all stages.
+
+        Jobs still in the pipeline after that are cancelled.
+        """
+        if self._in_flight:
+            await asyncio.wait(list(self._in_flight), timeout=timeout)
+        for stage in self.stages:
+            await stage.stop()
+        for future in list(self._in_flight):
+            future.cancel()
+        self._started = False
+
+    def get_stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self._started else 0.0
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "in_flight": len(self._in_flight),
+            "events_per_second": (self.completed / elapsed) if elapsed > 0 else 0.0,
+            "stages": {stage.name: stage.get_stats() for stage in self.stages},
+        }
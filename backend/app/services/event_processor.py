@@ -1,151 +1,356 @@
-import json
+import asyncio
+import os
+import time
 import structlog
-import httpx
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from io import BytesIO
-from PIL import Image
+from typing import Optional
 
 from app.config import settings
 from app.services.classifier_service import ClassifierService
 from app.services.broadcaster import broadcaster
-from app.database import get_db
-from app.repositories.detection_repository import DetectionRepository, Detection
+from app.services.frigate_client import FrigateClient, FrigateUnavailableError, get_frigate_client
+from app.services.event_coalescer import EventMessage
+from app.services.event_pipeline import EventJob, EventPipeline, Stage
+from app.services.tracing import DetectionTrace
+from app.services.metrics import mqtt_messages_filtered, snapshot_fetch_duration, snapshot_fetches
+from app.services.detection_writer import DetectionWriter, get_detection_writer
+from app.repositories.detection_repository import Detection
 
 log = structlog.get_logger()
 
+
+@dataclass
+class SnapshotState:
+    """Best-snapshot info from the last admitted Frigate message for an event."""
+    snapshot_time: Optional[float]
+    top_score: Optional[float]
+    seen_at: float
+    # Until the snapshot has been classified: the state to fall back to if it fails
+    previous: Optional['SnapshotState'] = None
+    settled: bool = False
+
+
+class EventStateTable:
+    """Small expiring table of the last snapshot admitted per Frigate event.
+
+    Frigate publishes many 'update' messages per event while its best
+    snapshot stays the same; comparing against this table lets us skip the
+    snapshot fetch and classification for those. Snapshots are recorded when
+    admitted, so repeats arriving while the first is still in the pipeline
+    are skipped too; a snapshot that fails is rolled back.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 2048):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._states: OrderedDict[str, SnapshotState] = OrderedDict()
+
+    def _expire(self, now: float):
+        while self._states:
+            event_id, state = next(iter(self._states.items()))
+            if now - state.seen_at < self.ttl and len(self._states) <= self.max_entries:
+                break
+            del self._states[event_id]
+
+    def snapshot_improved(self, event_id: str, after: dict) -> bool:
+        """Return True if ``after`` carries a newer/better snapshot than last processed."""
+        self._expire(time.monotonic())
+        previous = self._states.get(event_id)
+        if previous is None:
+            return True
+
+        snapshot_time = after.get('snapshot_time')
+        if snapshot_time is not None and previous.snapshot_time is not None:
+            return snapshot_time != previous.snapshot_time
+
+        # Older Frigate versions don't report snapshot_time; fall back to top_score
+        top_score = after.get('top_score')
+        if top_score is not None and previous.top_score is not None:
+            return top_score > previous.top_score
+        return True
+
+    def record(self, event_id: str, after: dict) -> SnapshotState:
+        """Remember the snapshot that was just admitted for fetching and classification."""
+        previous = self._states.pop(event_id, None)
+        state = SnapshotState(
+            snapshot_time=after.get('snapshot_time'),
+            top_score=after.get('top_score'),
+            seen_at=time.monotonic(),
+            previous=previous,
+        )
+        self._states[event_id] = state
+        self._expire(time.monotonic())
+        return state
+
+    def settle(self, state: SnapshotState):
+        """Mark a recorded snapshot as classified; it can no longer be rolled back."""
+        state.settled = True
+        state.previous = None
+
+    def rollback(self, event_id: str, state: SnapshotState):
+        """Forget a recorded snapshot that could not be processed.
+
+        The event falls back to the state before it, so the next message for
+        the same snapshot is admitted again. No-op once the state has settled.
+        """
+        if state.settled:
+            return
+        current = self._states.get(event_id)
+        if current is state:
+            del self._states[event_id]
+            if state.previous is not None:
+                state.previous.seen_at = time.monotonic()
+                self._states[event_id] = state.previous
+            return
+        # A newer snapshot was admitted meanwhile; unlink this one from its fallbacks
+        while current is not None:
+            if current.previous is state:
+                current.previous = state.previous
+                return
+            current = current.previous
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
 class EventProcessor:
-    def __init__(self, classifier: ClassifierService):
+    def __init__(
+        self,
+        classifier: ClassifierService,
+        frigate: Optional[FrigateClient] = None,
+        writer: Optional[DetectionWriter] = None,
+    ):
         self.classifier = classifier
-        self.http_client = httpx.AsyncClient()
+        self.frigate = frigate or get_frigate_client()
+        self.writer = writer or get_detection_writer()
         self.broadcaster = broadcaster
+        self.event_states = EventStateTable()
+        self.messages_processed = 0
+        self.snapshots_skipped = 0
 
-    def _get_frigate_headers(self) -> dict:
-        """Build headers for Frigate requests, including auth token if configured."""
-        headers = {}
-        if settings.frigate.frigate_auth_token:
-            headers['Authorization'] = f'Bearer {settings.frigate.frigate_auth_token}'
-        return headers
+        processing = settings.processing
+        self.pipeline = EventPipeline([
+            Stage("fetch", self._fetch_stage, processing.fetch_concurrency, processing.stage_queue_size),
+            Stage("decode", self._decode_stage, processing.decode_concurrency or os.cpu_count() or 1,
+                  processing.stage_queue_size),
+            Stage("classify", self._classify_stage, processing.classify_concurrency, processing.stage_queue_size),
+            # The detection writer groups concurrent writes into transactions
+            Stage("persist", self._persist_stage, processing.persist_concurrency, processing.stage_queue_size),
+            Stage("notify", self._notify_stage, processing.notify_concurrency, processing.stage_queue_size),
+        ])
 
-    async def process_mqtt_message(self, payload: bytes):
-        try:
-            data = json.loads(payload)
-            after = data.get('after', {})
-            
-            if not after:
-                return
+    def get_stats(self) -> dict:
+        """Return message counts, including updates short-circuited by the state table."""
+        return {
+            "messages_processed": self.messages_processed,
+            "snapshots_skipped": self.snapshots_skipped,
+            "tracked_events": len(self.event_states),
+            "pipeline": self.pipeline.get_stats(),
+        }
 
-            if after.get('label') != 'bird':
-                return
+    async def process_mqtt_message(self, payload: bytes, received_at: Optional[float] = None):
+        """Process one raw MQTT payload and wait until it has left the pipeline."""
+        future = await self.submit_mqtt_message(EventMessage.parse(payload, received_at))
+        if future is not None:
+            await future
 
-            camera = after.get('camera')
-            if settings.frigate.camera and camera not in settings.frigate.camera:
-                return
+    async def submit_mqtt_message(self, message: EventMessage) -> Optional[asyncio.Future]:
+        """Filter a parsed MQTT message and hand it to the pipeline.
 
-            frigate_event = after['id']
-            # Only process if valid event? Original logic processes on every message? 
-            # Original: "if not firstmessage ... (after_data['camera'] in config ...)"
-            # It processes updates. We typically want the best snapshot.
-            
-            # Logic: Get snapshot.
-            frigate_url = settings.frigate.frigate_url
-            snapshot_url = f"{frigate_url}/api/events/{frigate_event}/snapshot.jpg"
-            
-            # TODO: Add specific params logic (crop=1)
-            params = {"crop": 1, "quality": 95}
-            
-            try:
-                headers = self._get_frigate_headers()
-                response = await self.http_client.get(snapshot_url, params=params, headers=headers, timeout=30.0)
-                if response.status_code == 200:
-                   image = Image.open(BytesIO(response.content))
-                   
-                   # Classify
-                   results = self.classifier.classify(image)
-                   if not results:
-                       return
-
-                   top = results[0]
-                   score = top['score']
-                   label = top['label']
-
-                   # Relabel unknown bird classifications (e.g., "background" -> "Unknown Bird")
-                   if label in settings.classification.unknown_bird_labels:
-                       log.info("Relabeled to Unknown Bird", original=label, event=frigate_event)
-                       label = "Unknown Bird"
-                       top = {**top, 'label': label}
-
-                   # Filter out blocked labels (if any configured)
-                   if label in settings.classification.blocked_labels:
-                       log.debug("Filtered blocked label", label=label, event=frigate_event)
-                       return
-
-                   # Check minimum confidence floor
-                   if score < settings.classification.min_confidence:
-                       log.debug("Below minimum confidence", score=score, min=settings.classification.min_confidence)
-                       return
-
-                   if score > settings.classification.threshold:
-                       await self._save_detection(after, top, frigate_event)
-                       await self._set_sublabel(frigate_event, label)
-                       
-                else:
-                    log.warning("Failed to fetch snapshot", url=snapshot_url, status=response.status_code)
-
-            except Exception as e:
-                log.error("Error processing event", event=frigate_event, error=str(e))
-
-        except json.JSONDecodeError:
+        Returns once the fetch stage has accepted the event (or None if the
+        message needs no processing), without waiting for the rest of it.
+        The message's receive time starts the event's trace.
+        """
+        data = message.data
+        if data is None:
             log.error("Invalid JSON payload")
+            mqtt_messages_filtered.inc("invalid")
+            return None
+
+        after = data.get('after', {})
+        if not after:
+            mqtt_messages_filtered.inc("invalid")
+            return None
+
+        if after.get('label') != 'bird':
+            mqtt_messages_filtered.inc("not_bird")
+            return None
+
+        camera = after.get('camera')
+        if settings.frigate.camera and camera not in settings.frigate.camera:
+            mqtt_messages_filtered.inc("camera")
+            return None
+
+        frigate_event = after['id']
+        self.messages_processed += 1
 
-    async def _save_detection(self, after, classification, frigate_event):
-        async with get_db() as db:
-            repo = DetectionRepository(db)
-            existing = await repo.get_by_frigate_event(frigate_event)
-            
-            score = classification['score']
-            display_name = classification['label']
-            category_name = classification['label'] # Simplify for now
-            timestamp = datetime.fromtimestamp(after['start_time'])
-            
-            detection = Detection(
-                detection_time=timestamp,
+        # Frigate sends many 'update' messages per event; only fetch and
+        # classify when its best snapshot actually changed
+        if after.get('has_snapshot') is False or not self.event_states.snapshot_improved(frigate_event, after):
+            self.snapshots_skipped += 1
+            mqtt_messages_filtered.inc("unchanged_snapshot")
+            log.debug("Snapshot unchanged, skipping", event_id=frigate_event, type=data.get('type'))
+            if data.get('type') == 'end' and after.get('has_clip') is not None:
+                # The end message settles clip availability even when its snapshot is old news
+                await self._save_clip_availability(frigate_event, after['has_clip'])
+            return None
+
+        state = self.event_states.record(frigate_event, after)
+        job = EventJob(
+            frigate_event=frigate_event,
+            after=after,
+            msg_type=data.get('type'),
+            future=asyncio.get_running_loop().create_future(),
+            trace=DetectionTrace(frigate_event, source="live", received_at=message.received_at),
+            snapshot_state=state,
+        )
+        # Dropped before inference (fetch failure, error, shutdown): let the snapshot be retried
+        job.future.add_done_callback(lambda _: self.event_states.rollback(frigate_event, state))
+        try:
+            return await self.pipeline.submit(job)
+        except BaseException:
+            self.event_states.rollback(frigate_event, state)
+            raise
+
+    async def _fetch_stage(self, job: EventJob) -> bool:
+        """Download the event's snapshot from Frigate."""
+        started = time.perf_counter()
+        try:
+            response = await self.frigate.get_snapshot(job.frigate_event)
+        except FrigateUnavailableError:
+            # Frigate is down; drop the event quickly instead of queueing behind it
+            snapshot_fetches.inc("live", "rejected")
+            log.debug("Frigate unavailable, skipping snapshot", event_id=job.frigate_event)
+            return False
+        except Exception:
+            snapshot_fetches.inc("live", "error")
+            raise
+        snapshot_fetch_duration.observe(time.perf_counter() - started, "live")
+        snapshot_fetches.inc("live", response.status_code)
+        if response.status_code != 200:
+            log.warning("Failed to fetch snapshot", event_id=job.frigate_event, status=response.status_code)
+            return False
+        job.snapshot = response.content
+        job.trace.mark("fetched")
+        return True
+
+    async def _decode_stage(self, job: EventJob) -> bool:
+        """Decode and downscale the snapshot (or find it in the result cache) off the event loop."""
+        job.prepared = await asyncio.to_thread(self.classifier.prepare_snapshot, job.snapshot, job.trace)
+        job.snapshot = None
+        return True
+
+    async def _classify_stage(self, job: EventJob) -> bool:
+        """Run inference and decide whether the result is worth saving."""
+        results = await self.classifier.classify_prepared_async(job.prepared)
+        job.prepared = None
+        job.trace.mark("inferred")
+        self.event_states.settle(job.snapshot_state)
+        if not results:
+            return False
+
+        top = results[0]
+        score = top['score']
+        label = top['label']
+
+        # Relabel unknown bird classifications (e.g., "background" -> "Unknown Bird")
+        if label in settings.classification.unknown_bird_labels:
+            log.info("Relabeled to Unknown Bird", original=label, event_id=job.frigate_event)
+            label = "Unknown Bird"
+            top = {**top, 'label': label}
+
+        # Filter out blocked labels (if any configured)
+        if label in settings.classification.blocked_labels:
+            log.debug("Filtered blocked label", label=label, event_id=job.frigate_event)
+            return False
+
+        # Check minimum confidence floor
+        if score < settings.classification.min_confidence:
+            log.debug("Below minimum confidence", score=score, min=settings.classification.min_confidence)
+            return False
+
+        if score <= settings.classification.threshold:
+            return False
+
+        job.classification = top
+        job.label = label
+        return True
+
+    async def _persist_stage(self, job: EventJob) -> bool:
+        """Hand the detection to the detection writer and wait for its commit."""
+        await self._save_detections([(job.after, job.classification, job.frigate_event)])
+        job.trace.mark("persisted")
+        return True
+
+    async def _notify_stage(self, job: EventJob) -> bool:
+        """Tell Frigate and connected clients about the detection."""
+        async def broadcast():
+            await self._broadcast_detection(job.after, job.classification, job.frigate_event)
+            job.trace.mark("broadcast")
+
+        async def sublabel():
+            await self._set_sublabel(job.frigate_event, job.label)
+            job.trace.mark("sublabel_set")
+
+        await asyncio.gather(broadcast(), sublabel())
+        if settings.processing.store_traces:
+            await self._save_trace(job.frigate_event, job.trace)
+        return False
+
+    async def _save_detections(self, items: list[tuple[dict, dict, str]]):
+        """Create or improve detections for (after, classification, frigate_event) items."""
+        detections = [
+            Detection(
+                detection_time=datetime.fromtimestamp(after['start_time']),
                 detection_index=classification['index'],
-                score=score,
-                display_name=display_name,
-                category_name=category_name,
+                score=classification['score'],
+                display_name=classification['label'],
+                category_name=classification['label'], # Simplify for now
                 frigate_event=frigate_event,
-                camera_name=after['camera']
+                camera_name=after['camera'],
+                has_clip=after.get('has_clip')
             )
-            
-            if existing:
-                if score > existing.score:
-                    await repo.update(detection)
-                    log.info("Updated detection", event=frigate_event, species=display_name, score=score)
-            else:
-                await repo.create(detection)
-                log.info("New detection", event=frigate_event, species=display_name, score=score)
-            
-            # Broadcast event
-            await self.broadcaster.broadcast({
-                "type": "detection",
-                "data": {
-                    "frigate_event": frigate_event,
-                    "display_name": display_name,
-                    "score": score,
-                    "timestamp": timestamp.isoformat(),
-                    "camera": after['camera']
-                }
-            })
+            for after, classification, frigate_event in items
+        ]
+        outcomes = await self.writer.upsert_many(detections)
+        for detection, outcome in zip(detections, outcomes):
+            if outcome == "created":
+                log.info("New detection", event_id=detection.frigate_event, species=detection.display_name, score=detection.score)
+            elif outcome == "updated":
+                log.info("Updated detection", event_id=detection.frigate_event, species=detection.display_name, score=detection.score)
+
+    async def _save_clip_availability(self, frigate_event: str, has_clip: bool):
+        try:
+            await self.writer.set_clip_availability({frigate_event: bool(has_clip)})
+        except Exception as e:
+            log.warning("Failed to store clip availability", event_id=frigate_event, error=str(e))
+
+    async def _save_trace(self, frigate_event: str, trace: DetectionTrace):
+        try:
+            await self.writer.save_trace(frigate_event, trace.to_dict())
+        except Exception as e:
+            log.warning("Failed to store detection trace", event_id=frigate_event, error=str(e))
+
+    async def _broadcast_detection(self, after: dict, classification: dict, frigate_event: str):
+        await self.broadcaster.broadcast({
+            "type": "detection",
+            "data": {
+                "frigate_event": frigate_event,
+                "display_name": classification['label'],
+                "score": classification['score'],
+                "timestamp": datetime.fromtimestamp(after['start_time']).isoformat(),
+                "camera": after['camera']
+            }
+        })
 
     async def _set_sublabel(self, event_id: str, sublabel: str):
-        url = f"{settings.frigate.frigate_url}/api/events/{event_id}/sub_label"
-        payload = {"subLabel": sublabel[:20]}
         try:
-            headers = self._get_frigate_headers()
-            await self.http_client.post(url, json=payload, headers=headers, timeout=10.0)
+            await self.frigate.set_sub_label(event_id, sublabel)
         except Exception as e:
             log.error("Failed to set sublabel", error=str(e))
 
     async def close(self):
-        """Close the HTTP client resource."""
-        await self.http_client.aclose()
+        """Stop the pipeline; the shared Frigate client is closed by the app."""
+        await self.pipeline.stop()
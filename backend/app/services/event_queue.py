@@ -0,0 +1,146 @@
+import asyncio
+import time
+import structlog
+from collections import deque
+from typing import Awaitable, Callable
+
+from app.services.event_coalescer import EventMessage
+
+log = structlog.get_logger()
+
+
+class EventQueue:
+    """Bounded work queue between MQTT intake and event processing.
+
+    ``put`` never waits on processing, so the MQTT loop keeps draining the
+    broker while a slow snapshot fetch is in progress; a fixed number of
+    workers pull events off the queue. When the queue is full the oldest
+    queued non-'end' message is dropped to make room. 'end' messages are
+    never dropped - if the queue holds nothing but 'end' messages an incoming
+    update is dropped instead, and an incoming 'end' is queued past the bound.
+    The handler gets each parsed message, MQTT receive time included.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[EventMessage], Awaitable[None]],
+        max_size: int = 256,
+        workers: int = 4,
+    ):
+        self._handler = handler
+        self.max_size = max(1, max_size)
+        self.workers = max(1, workers)
+        # (message, is_end, enqueued at)
+        self._items: deque[tuple[EventMessage, bool, float]] = deque()
+        self._available: asyncio.Semaphore | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._active = 0
+
+        # Stats
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    def start(self):
+        """Start the worker tasks (idempotent)."""
+        if self._worker_tasks:
+            return
+        self._available = asyncio.Semaphore(len(self._items))
+        loop = asyncio.get_running_loop()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        log.info("Event queue started", workers=self.workers, max_size=self.max_size)
+
+    async def put(self, message: EventMessage) -> bool:
+        """Queue a message for processing. Returns False if it was dropped."""
+        self.start()
+        is_end = message.msg_type == 'end'
+
+        replaced = False
+        if len(self._items) >= self.max_size:
+            replaced = self._drop_oldest_update()
+            if not replaced and not is_end:
+                # Only 'end' messages queued; the incoming update is the one to go
+                self.dropped += 1
+                log.warning("Event queue full, dropping update", depth=len(self._items))
+                return False
+            # An incoming 'end' is queued past the bound rather than lost
+
+        self._items.append((message, is_end, time.monotonic()))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        if not replaced:
+            # A replaced item's semaphore count carries over to the new one
+            self._available.release()
+        return True
+
+    def _drop_oldest_update(self) -> bool:
+        """Drop the oldest queued non-'end' message. Returns False if there is none."""
+        for i, (_, queued_end, _) in enumerate(self._items):
+            if not queued_end:
+                del self._items[i]
+                self.dropped += 1
+                log.warning("Event queue full, dropped oldest update", depth=len(self._items))
+                return True
+        return False
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            message, _, enqueued_at = self._items.popleft()
+
+            lag = time.monotonic() - enqueued_at
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._total_lag += lag
+
+            self._active += 1
+            try:
+                await self._handler(message)
+            except Exception as e:
+                self.failed += 1
+                log.error("Error processing queued event", error=str(e))
+            finally:
+                self._active -= 1
+                self.processed += 1
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    async def stop(self, timeout: float = 10.0):
+        """Let workers drain the queue (up to ``timeout`` seconds), then stop them."""
+        if not self._worker_tasks:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._items or self._active) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._items:
+            log.warning("Event queue stopped with events pending", pending=len(self._items))
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._items.clear()
+
+    def get_stats(self) -> dict:
+        oldest_age = (time.monotonic() - self._items[0][2]) if self._items else 0.0
+        return {
+            "depth": len(self._items),
+            "max_size": self.max_size,
+            "max_depth": self.max_depth,
+            "workers": self.workers,
+            "active": self._active,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "lag_ms": self.last_lag * 1000,
+            "avg_lag_ms": (self._total_lag / self.processed * 1000) if self.processed else 0.0,
+            "max_lag_ms": self.max_lag * 1000,
+            "oldest_age_ms": oldest_age * 1000,
+        }
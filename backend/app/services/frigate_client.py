@@ -0,0 +1,222 @@
+import importlib.util
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Upper bounds of the read timeouts (s) per kind of Frigate request; connecting is always quick or hopeless
+CONNECT_TIMEOUT = 5.0
+ENDPOINT_TIMEOUTS = {
+    "default": 30.0,
+    "version": 10.0,
+    "config": 30.0,
+    "event": 5.0,
+    "events": 30.0,
+    "snapshot": 30.0,
+    "thumbnail": 15.0,
+    "clip": 120.0,
+    "sub_label": 10.0,
+}
+
+# Streamed downloads are timed per chunk, so their timeout is never adapted
+STREAMING_ENDPOINTS = {"clip"}
+
+# Adaptive timeouts: p99 of recent latencies times a safety factor, never below the floor
+ADAPTIVE_WINDOW = 200
+ADAPTIVE_MIN_SAMPLES = 20
+ADAPTIVE_MULTIPLIER = 3.0
+ADAPTIVE_MIN_TIMEOUT = 2.0
+
+# Parameters Frigate uses to render the classifier's input
+SNAPSHOT_PARAMS = {"crop": 1, "quality": 95}
+
+
+class FrigateUnavailableError(CircuitOpenError, httpx.RequestError):
+    """Frigate was not called because its circuit is open.
+
+    Subclasses ``httpx.RequestError`` so existing "cannot reach Frigate"
+    handling covers the fail-fast case as well.
+    """
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class FrigateClient:
+    """The one HTTP client every subsystem uses to talk to Frigate.
+
+    Live processing, backfill and the API routers share a single pooled
+    ``httpx.AsyncClient``, so connections stay alive between requests
+    instead of every caller paying for its own TCP (and TLS) setup. URL and
+    auth token are read from settings on each call, which keeps changes
+    made through the settings API effective immediately. HTTP/2 is used
+    when the ``h2`` package is installed.
+
+    All requests go through a circuit breaker: once Frigate keeps failing
+    (connection errors, timeouts, 5xx) calls fail immediately with
+    ``FrigateUnavailableError`` until a probe request succeeds, so an
+    outage costs callers nothing instead of a full timeout each. Read
+    timeouts shrink to a multiple of the recently observed p99 latency,
+    capped by ``ENDPOINT_TIMEOUTS``.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        keepalive_expiry: float = 30.0,
+        http2: Optional[bool] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        adaptive_timeouts: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = _http2_available() if http2 is None else http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(
+            "frigate",
+            failure_threshold=failure_threshold,
+            reset_timeout=reset_timeout,
+            error_class=FrigateUnavailableError,
+        )
+        self.adaptive_timeouts = adaptive_timeouts
+        # endpoint -> recent successful latencies (s)
+        self._latencies: dict[str, deque] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client, created on first use (and again after ``aclose``)."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout("default"),
+            )
+        return self._client
+
+    def headers(self, extra: Optional[dict] = None) -> dict:
+        """Build headers for Frigate requests, including auth token if configured."""
+        headers = {}
+        if settings.frigate.frigate_auth_token:
+            headers['Authorization'] = f'Bearer {settings.frigate.frigate_auth_token}'
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def url(self, path: str) -> str:
+        return f"{settings.frigate.frigate_url}{path}"
+
+    def timeout(self, endpoint: str) -> httpx.Timeout:
+        read = ENDPOINT_TIMEOUTS.get(endpoint, ENDPOINT_TIMEOUTS["default"])
+        latencies = self._latencies.get(endpoint)
+        if (self.adaptive_timeouts and endpoint not in STREAMING_ENDPOINTS
+                and latencies and len(latencies) >= ADAPTIVE_MIN_SAMPLES):
+            ordered = sorted(latencies)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            read = min(read, max(ADAPTIVE_MIN_TIMEOUT, p99 * ADAPTIVE_MULTIPLIER))
+        return httpx.Timeout(read, connect=min(CONNECT_TIMEOUT, read))
+
+    def _record_latency(self, endpoint: str, seconds: float):
+        latencies = self._latencies.get(endpoint)
+        if latencies is None:
+            latencies = self._latencies.setdefault(endpoint, deque(maxlen=ADAPTIVE_WINDOW))
+        latencies.append(seconds)
+
+    async def _send(self, endpoint: str, send) -> httpx.Response:
+        """Run ``send()`` through the circuit breaker and record its latency."""
+        self.breaker.acquire()
+        started = time.perf_counter()
+        outcome_recorded = False
+        try:
+            response = await send()
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                self._record_latency(endpoint, time.perf_counter() - started)
+            outcome_recorded = True
+            return response
+        except httpx.RequestError:
+            self.breaker.record_failure()
+            outcome_recorded = True
+            raise
+        finally:
+            if not outcome_recorded:
+                self.breaker.release()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        endpoint: str = "default",
+        headers: Optional[dict] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a request to ``path`` on Frigate using the endpoint's timeout.
+
+        Raises ``FrigateUnavailableError`` without calling Frigate while the circuit is open.
+        """
+        kwargs.setdefault("timeout", self.timeout(endpoint))
+        return await self._send(endpoint, lambda: self.client.request(
+            method, self.url(path), headers=self.headers(headers), **kwargs))
+
+    async def get(self, path: str, endpoint: str = "default", **kwargs) -> httpx.Response:
+        return await self.request("GET", path, endpoint, **kwargs)
+
+    async def post(self, path: str, endpoint: str = "default", **kwargs) -> httpx.Response:
+        return await self.request("POST", path, endpoint, **kwargs)
+
+    async def stream(self, path: str, endpoint: str = "clip", headers: Optional[dict] = None) -> httpx.Response:
+        """Start a streamed GET; the caller must ``aclose()`` the response."""
+        client = self.client
+        req = client.build_request(
+            "GET", self.url(path), headers=self.headers(headers), timeout=self.timeout(endpoint))
+        return await self._send(endpoint, lambda: client.send(req, stream=True))
+
+    # Frigate endpoints used by more than one subsystem
+
+    async def get_snapshot(self, event_id: str) -> httpx.Response:
+        return await self.get(f"/api/events/{event_id}/snapshot.jpg", "snapshot", params=SNAPSHOT_PARAMS)
+
+    async def get_event(self, event_id: str) -> httpx.Response:
+        return await self.get(f"/api/events/{event_id}", "event")
+
+    async def get_events(self, params: dict) -> httpx.Response:
+        return await self.get("/api/events", "events", params=params)
+
+    async def set_sub_label(self, event_id: str, sub_label: str) -> httpx.Response:
+        return await self.post(f"/api/events/{event_id}/sub_label", "sub_label", json={"subLabel": sub_label[:20]})
+
+    def get_stats(self) -> dict:
+        return {
+            "circuit": self.breaker.get_stats(),
+            "timeouts_s": {
+                endpoint: self.timeout(endpoint).read
+                for endpoint in sorted(ENDPOINT_TIMEOUTS)
+            },
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_frigate_client: Optional[FrigateClient] = None
+
+
+def get_frigate_client() -> FrigateClient:
+    """Get the shared Frigate client instance."""
+    global _frigate_client
+    if _frigate_client is None:
+        _frigate_client = FrigateClient()
+    return _frigate_client
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+import structlog
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+log = structlog.get_logger()
+
+
+class InferenceExecutor:
+    """Bounded thread pool that runs model inference off the asyncio event loop.
+
+    TFLite invokes and PIL decode/resize are CPU-bound and release the GIL for
+    most of their work, so running them in dedicated threads keeps SSE, API and
+    proxy traffic responsive while birds are being classified.
+
+    At most ``max_queue`` jobs may be pending (queued + running); further callers
+    wait for a slot instead of piling unbounded work onto the pool.
+    """
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 32):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(self.max_workers, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference"
+        )
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+        # Stats (guarded by _lock)
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+        self._last_wait = 0.0
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Return the admission semaphore for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_queue)
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run ``func(*args)`` on an inference thread and await its result."""
+        slots = self._get_slots()
+        submitted = time.perf_counter()
+        # "queued" until a thread picks the job up or its caller gives up, whichever comes first
+        job = {"state": "queued"}
+        with self._lock:
+            self._queued += 1
+
+        try:
+            async with slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._executor, self._run_job, job, submitted, func, args
+                )
+        finally:
+            with self._lock:
+                if job["state"] == "queued":
+                    # Cancelled while waiting for a slot or a thread
+                    job["state"] = "abandoned"
+                    self._queued -= 1
+
+    def _run_job(self, job: dict, submitted: float, func: Callable[..., Any], args: tuple) -> Any:
+        started = time.perf_counter()
+        wait = started - submitted
+        with self._lock:
+            if job["state"] == "abandoned":
+                return None  # nobody is waiting for the result
+            job["state"] = "started"
+            self._queued -= 1
+            self._active += 1
+            self._total_wait += wait
+            self._last_wait = wait
+            self._max_wait = max(self._max_wait, wait)
+
+        ok = False
+        try:
+            result = func(*args)
+            ok = True
+            return result
+        finally:
+            run_time = time.perf_counter() - started
+            with self._lock:
+                self._active -= 1
+                self._total_run += run_time
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by an inference thread."""
+        return self._queued
+
+    def get_stats(self) -> dict:
+        """Return queue depth and wait/run time statistics."""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": (self._total_wait / finished * 1000) if finished else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+                "last_wait_ms": self._last_wait * 1000,
+                "avg_run_ms": (self._total_run / finished * 1000) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the inference threads."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        log.info("Inference executor stopped")
@@ -0,0 +1,162 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import structlog
+from typing import Optional
+
+from app.services.metrics import Histogram, registry
+
+log = structlog.get_logger()
+
+# Frames kept per captured stack (innermost last)
+STACK_DEPTH = 12
+
+loop_lag_seconds = registry.histogram(
+    "yawamf_event_loop_lag_seconds", "Scheduling delay of the event loop lag probe")
+loop_stalls = registry.counter(
+    "yawamf_event_loop_stalls_total", "Times the event loop lag exceeded the threshold")
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling delay and catches the code that blocks it.
+
+    A probe task sleeps for ``interval_ms`` and records how late it woke up.
+    A watchdog thread watches the probe's heartbeat; once the loop has been
+    unresponsive for longer than ``threshold_ms`` it grabs the loop thread's
+    current stack with ``sys._current_frames``, i.e. the code that is
+    blocking it right now. Stalls are logged and aggregated by stack so the
+    worst offenders can be listed.
+    """
+
+    def __init__(self, interval_ms: float = 100.0, threshold_ms: float = 100.0, max_offenders: int = 50):
+        self.interval = interval_ms / 1000.0
+        self.threshold = threshold_ms / 1000.0
+        self.max_offenders = max_offenders
+        self.lag = Histogram()  # ms
+        self.stalls = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._heartbeat = 0.0
+        # Stack captured by the watchdog during the current stall
+        self._stall_stack: Optional[list[str]] = None
+        # stack signature -> aggregate
+        self._offenders: dict[tuple, dict] = {}
+
+    def lag_quantiles(self) -> dict[str, float]:
+        """Lag percentiles in seconds, keyed by quantile."""
+        return {q: self.lag.quantile(float(q)) / 1000 for q in ("0.5", "0.95", "0.99")}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the probe on the running loop and the watchdog thread."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        log.info("Event loop monitor started",
+                 interval_ms=self.interval * 1000, threshold_ms=self.threshold * 1000)
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _probe(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._heartbeat = now
+                stack, self._stall_stack = self._stall_stack, None
+
+            self.lag.observe(lag * 1000)
+            loop_lag_seconds.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag, stack)
+
+    def _watch(self):
+        """Watchdog thread: capture the loop thread's stack while it is blocked."""
+        poll = min(self.interval, self.threshold) / 2
+        captured_for = None
+        while not self._stop.wait(poll):
+            with self._lock:
+                heartbeat = self._heartbeat
+            # The probe should beat every ``interval``; anything beyond that is lag
+            if time.perf_counter() - heartbeat < self.interval + self.threshold:
+                continue
+            if captured_for == heartbeat:
+                continue  # already captured this stall
+            captured_for = heartbeat
+            stack = self._capture_loop_stack()
+            with self._lock:
+                if self._heartbeat == heartbeat:
+                    self._stall_stack = stack
+
+    def _capture_loop_stack(self) -> Optional[list[str]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        summary = traceback.extract_stack(frame)[-STACK_DEPTH:]
+        return [f"{f.filename}:{f.lineno} in {f.name}" for f in summary]
+
+    def _record_stall(self, lag: float, stack: Optional[list[str]]):
+        self.stalls += 1
+        loop_stalls.inc()
+        lag_ms = lag * 1000
+        key = tuple(stack) if stack else ("<stack not captured: stall shorter than watchdog poll>",)
+
+        with self._lock:
+            offender = self._offenders.get(key)
+            if offender is None:
+                if len(self._offenders) >= self.max_offenders:
+                    # Forget the least significant offender
+                    weakest = min(self._offenders, key=lambda k: self._offenders[k]["total_ms"])
+                    del self._offenders[weakest]
+                offender = self._offenders[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": list(key)}
+            offender["count"] += 1
+            offender["total_ms"] += lag_ms
+            offender["max_ms"] = max(offender["max_ms"], lag_ms)
+
+        log.warning("Event loop blocked",
+                    lag_ms=round(lag_ms, 1),
+                    blocking_call=key[-1],
+                    blocking_stack=list(key) if stack else None)
+
+    def top_offenders(self, limit: int = 10) -> list[dict]:
+        """Blocking stacks ordered by total time they stalled the loop."""
+        with self._lock:
+            offenders = sorted(self._offenders.values(), key=lambda o: o["total_ms"], reverse=True)
+            return [dict(o, stack=list(o["stack"])) for o in offenders[:limit]]
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": self.lag.get_stats(),
+            "stalls": self.stalls,
+            "top_offenders": self.top_offenders(),
+        }
@@ -0,0 +1,346 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Optional
+
+# Upper bounds (ms) for latency histograms; covers cache hits through slow Frigate fetches
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and estimated percentiles.
+
+    Observations are O(log buckets) and memory stays constant no matter how
+    many events are recorded, so it is safe to keep one per stage forever.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        # Last slot counts observations above the largest bound
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by interpolating within its bucket."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for i, bucket_count in enumerate(self._counts):
+                if seen + bucket_count >= rank and bucket_count:
+                    lower = self.buckets[i - 1] if i > 0 else 0.0
+                    upper = self.buckets[i] if i < len(self.buckets) else self.max
+                    return lower + (upper - lower) * (rank - seen) / bucket_count
+                seen += bucket_count
+            return self.max
+
+    def cumulative_counts(self) -> list[tuple[float, int]]:
+        """Return (upper bound, observations <= bound) pairs, ending with +Inf."""
+        with self._lock:
+            pairs = []
+            total = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), self._counts):
+                total += bucket_count
+                pairs.append((bound, total))
+            return pairs
+
+    def get_stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": (self.sum / self.count) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class LatencyHistograms:
+    """Histograms of detection stage latencies (ms), keyed by (source, stage)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self._buckets = buckets
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str, stage: str) -> Histogram:
+        key = (source, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self._buckets))
+        return histogram
+
+    def observe(self, source: str, stage: str, value_ms: float):
+        self.get(source, stage).observe(value_ms)
+
+    def items(self) -> list[tuple[tuple[str, str], Histogram]]:
+        with self._lock:
+            return list(self._histograms.items())
+
+    def get_stats(self, source: Optional[str] = None) -> dict:
+        """Return {source: {stage: stats}}, optionally for one source only."""
+        stats: dict[str, dict] = {}
+        for (hist_source, stage), histogram in sorted(self.items()):
+            if source is None or hist_source == source:
+                stats.setdefault(hist_source, {})[stage] = histogram.get_stats()
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# Global latency histograms shared by live processing and backfill
+detection_latency = LatencyHistograms()
+
+
+# ---------------------------------------------------------------------------
+# Prometheus exposition
+# ---------------------------------------------------------------------------
+
+# Upper bounds (s) for Prometheus latency histograms
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        if not self.labelnames:
+            # Unlabeled metrics report 0 before the first update
+            self._values[()] = 0.0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def _key(self, labels: tuple) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(value) for value in labels)
+
+    def value(self, *labels) -> float:
+        return self._current().get(self._key(labels), 0.0)
+
+    def _current(self) -> dict[tuple, float]:
+        if self._callback is None:
+            with self._lock:
+                return dict(self._values)
+        result = self._callback()
+        if isinstance(result, dict):
+            return {
+                tuple(str(v) for v in (key if isinstance(key, tuple) else (key,))): value
+                for key, value in result.items()
+            }
+        return {(): result}
+
+    def collect(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._current().items())
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels.
+
+    Like Gauge it may instead read an existing counter through ``callback``.
+    """
+    type_name = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or read from ``callback`` at scrape time.
+
+    A callback returns a number, or a dict of label values (a tuple, or a
+    plain value for one label) to numbers, so existing stats (queue sizes,
+    cache counters) are exported without adding any work to the hot path.
+    """
+    type_name = "gauge"
+
+    def set(self, value: float, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class HistogramMetric(_Metric):
+    """Prometheus histogram (seconds), one fixed-bucket Histogram per label set."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._histograms: dict[tuple, Histogram] = {}
+
+    def labels(self, *labels) -> Histogram:
+        key = self._key(labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, value: float, *labels):
+        self.labels(*labels).observe(value)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._histograms.items())
+        lines = self.header()
+        for key, histogram in items:
+            lines.extend(_histogram_lines(self.name, self.labelnames, key, histogram))
+        return lines
+
+
+def _histogram_lines(name: str, labelnames: tuple, key: tuple, histogram: Histogram, scale: float = 1.0) -> list[str]:
+    lines = []
+    for bound, count in histogram.cumulative_counts():
+        le = f'le="{_format_value(bound * scale)}"'
+        lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {count}")
+    labels = _format_labels(labelnames, key)
+    lines.append(f"{name}_sum{labels} {_format_value(histogram.sum * scale)}")
+    lines.append(f"{name}_count{labels} {histogram.count}")
+    return lines
+
+
+class LatencyHistogramsCollector(_Metric):
+    """Exports a LatencyHistograms (ms) as a Prometheus histogram in seconds."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, histograms: LatencyHistograms):
+        super().__init__(name, documentation, ("source", "stage"))
+        self._histograms = histograms
+
+    def collect(self) -> list[str]:
+        lines = self.header()
+        for key, histogram in sorted(self._histograms.items()):
+            lines.extend(_histogram_lines(self.name, self.labelnames, key, histogram, scale=0.001))
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format (0.0.4)."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric, replacing any previous one with the same name."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = (), callback=None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = SECONDS_BUCKETS) -> HistogramMetric:
+        return self.register(HistogramMetric(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception:
+                # A broken callback must not take down the whole scrape
+                continue
+        return "\n".join(lines) + "\n"
+
+
+def instrument_methods(histogram: HistogramMetric, prefix: str):
+    """Class decorator: time every public coroutine method into ``histogram``.
+
+    The method label is ``<prefix>.<method name>``. Costs two perf_counter
+    calls and one bucket increment per call.
+    """
+    def decorate(cls):
+        for attr, func in list(vars(cls).items()):
+            if attr.startswith("_") or not inspect.iscoroutinefunction(func):
+                continue
+            setattr(cls, attr, _timed(func, histogram, f"{prefix}.{attr}"))
+        return cls
+    return decorate
+
+
+def _timed(func, histogram: HistogramMetric, label: str):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            # Series appear on first call, so unused methods don't clutter the scrape
+            histogram.observe(time.perf_counter() - started, label)
+    return wrapper
+
+
+# Global registry behind GET /metrics
+registry = MetricsRegistry()
+
+mqtt_messages_received = registry.counter(
+    "yawamf_mqtt_messages_received_total", "MQTT event messages received from Frigate")
+mqtt_messages_filtered = registry.counter(
+    "yawamf_mqtt_messages_filtered_total", "MQTT event messages not processed further", ("reason",))
+snapshot_fetches = registry.counter(
+    "yawamf_snapshot_fetches_total", "Snapshot downloads from Frigate by HTTP status", ("source", "status"))
+snapshot_fetch_duration = registry.histogram(
+    "yawamf_snapshot_fetch_duration_seconds", "Snapshot download latency", ("source",))
+inference_duration = registry.histogram(
+    "yawamf_inference_duration_seconds", "Model invoke latency per batch", ("model",))
+db_query_duration = registry.histogram(
+    "yawamf_db_query_duration_seconds", "Latency of repository methods", ("method",))
+registry.register(LatencyHistogramsCollector(
+    "yawamf_detection_stage_duration_seconds", "Per-stage latency of detections", detection_latency))
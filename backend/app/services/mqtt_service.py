@@ -1,8 +1,10 @@
 import asyncio
 import json
+import time
 import structlog
 from aiomqtt import Client, MqttError
 from app.config import settings
+from app.services.metrics import mqtt_messages_received
 
 log = structlog.get_logger()
 
@@ -37,7 +39,10 @@ class MQTTService:
                     log.info("Connected to MQTT", topic=topic)
 
                     async for message in client.messages:
-                        await message_callback(message.payload)
+                        # Receive time (perf_counter) is carried through to the detection trace
+                        received_at = time.perf_counter()
+                        mqtt_messages_received.inc()
+                        await message_callback(message.payload, received_at)
             except MqttError as e:
                 log.error("MQTT connection lost", error=str(e))
                 await asyncio.sleep(5)  # Reconnect delay
@@ -0,0 +1,138 @@
+import asyncio
+import multiprocessing
+import queue
+import structlog
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+log = structlog.get_logger()
+
+# Model loaded once per worker process (set by _init_worker)
+_worker_model = None
+
+
+def _init_worker(name: str, model_path: str, labels_path: str, num_threads: Optional[int] = None):
+    """Process-pool initializer: load the model once per worker."""
+    global _worker_model
+    from app.services.classifier_service import ModelInstance
+
+    _worker_model = ModelInstance(name, model_path, labels_path, pool_size=1, num_threads=num_threads)
+    _worker_model.load()
+
+
+def _classify_shared(shm_name: str, shape: tuple) -> list[list[dict]]:
+    """Worker entry point: classify pixels the parent placed in shared memory.
+
+    Only the top-k results are pickled back to the parent.
+    """
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # doesn't transfer ownership; the parent unlinks the block on shutdown.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    pixels = None
+    try:
+        pixels = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        return _worker_model.classify_pixels(pixels)
+    finally:
+        # Views must be dropped before the mapping can be closed
+        del pixels
+        shm.close()
+
+
+class SharedSlot:
+    """A reusable shared-memory block holding up to ``capacity`` input images."""
+
+    def __init__(self, capacity: int, image_shape: tuple):
+        self.capacity = capacity
+        self.image_shape = image_shape
+        size = capacity * int(np.prod(image_shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+
+    def view(self, n: int) -> np.ndarray:
+        return np.ndarray((n, *self.image_shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferencePool:
+    """Runs TFLite inference in worker processes to get past the GIL.
+
+    The parent decodes and resizes images straight into a pre-allocated
+    shared-memory slot; workers read the pixels without copying or pickling
+    them and send back only the top-k classifications.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model_path: str,
+        labels_path: str,
+        image_shape: tuple,
+        workers: int,
+        max_batch_size: int = 8,
+        slot_timeout: float = 30.0,
+        num_threads: Optional[int] = None,
+    ):
+        self.name = name
+        self.workers = max(1, workers)
+        self.image_shape = tuple(int(x) for x in image_shape)
+        self.max_batch_size = max(1, max_batch_size)
+        self.slot_timeout = slot_timeout
+
+        # spawn: never fork a parent that already runs inference/event-loop threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(name, model_path, labels_path, num_threads),
+        )
+
+        # One slot per worker plus one being filled while the others run
+        self._all_slots = [SharedSlot(self.max_batch_size, self.image_shape) for _ in range(self.workers + 1)]
+        self._slots: queue.Queue = queue.Queue()
+        for slot in self._all_slots:
+            self._slots.put(slot)
+
+        self.jobs = 0
+        log.info("Process inference pool started", model=name, workers=self.workers, num_threads=num_threads)
+
+    def acquire_slot(self, timeout: Optional[float] = None) -> SharedSlot:
+        """Take a free slot, waiting at most ``timeout`` (default: slot_timeout) seconds.
+
+        Raises TimeoutError if every slot stays in use, e.g. when workers hang.
+        """
+        timeout = self.slot_timeout if timeout is None else timeout
+        try:
+            return self._slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free inference slot for {self.name} after {timeout:.1f}s") from None
+
+    def release_slot(self, slot: SharedSlot):
+        self._slots.put(slot)
+
+    async def classify_slot(self, slot: SharedSlot, n: int) -> list[list[dict]]:
+        """Classify the first ``n`` images written into ``slot`` on a worker process."""
+        self.jobs += 1
+        future = self._executor.submit(_classify_shared, slot.shm.name, (n, *self.image_shape))
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> dict:
+        return {
+            "mode": "process",
+            "workers": self.workers,
+            "jobs": self.jobs,
+            "free_slots": self._slots.qsize(),
+        }
+
+    def shutdown(self):
+        """Stop workers and free shared memory (blocking; waits for the workers to exit)."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for slot in self._all_slots:
+            try:
+                slot.release()
+            except FileNotFoundError:
+                pass
+        log.info("Process inference pool stopped", model=self.name)
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Leaf frames of threads that are parked rather than doing work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Keep app paths readable; libraries by file name only
+    marker = f"{os.sep}app{os.sep}"
+    if marker in filename:
+        filename = "app" + os.sep + filename.split(marker, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    qualname = getattr(code, "co_qualname", code.co_name)
+    return f"{qualname} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples the stacks of all threads in-process.
+
+    A background thread reads ``sys._current_frames()`` every
+    ``interval_ms`` and counts identical stacks. Nothing is instrumented, so
+    the running backend is unaffected apart from the sampler itself
+    (roughly a millisecond of GIL time per sample).
+    """
+
+    def __init__(self, interval_ms: float = 5.0, include_idle: bool = False):
+        self.interval = interval_ms / 1000.0
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+    def _sample(self, own_ident: int, thread_names: dict[int, str]):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if not self.include_idle and self._is_idle(frame):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(thread_names.get(ident, f"thread-{ident}"))
+            labels.reverse()
+            self.stacks[tuple(labels)] += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            self._sample(own_ident, thread_names)
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self.duration = time.perf_counter() - started
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        """Stacks in Brendan Gregg's collapsed format (flamegraph.pl / speedscope input)."""
+        lines = [
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def top_functions(self, limit: int = 30) -> list[dict]:
+        """Functions by self samples (leaf frame) and total samples (anywhere on the stack)."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack[1:]  # drop the thread name
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+
+        total_samples = sum(self.stacks.values()) or 1
+        ranked = sorted(total_counts, key=lambda f: (self_counts[f], total_counts[f]), reverse=True)
+        return [
+            {
+                "function": label,
+                "self": self_counts[label],
+                "total": total_counts[label],
+                "self_pct": self_counts[label] / total_samples * 100,
+                "total_pct": total_counts[label] / total_samples * 100,
+            }
+            for label in ranked[:limit]
+        ]
+
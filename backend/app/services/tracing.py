@@ -0,0 +1,72 @@
+import time
+from typing import Optional
+
+from app.services.metrics import LatencyHistograms, detection_latency
+
+# (span, starts at milestone, ends at milestone); sublabel and broadcast run side by side
+SPANS = (
+    ("intake", "received", "admitted"),
+    ("fetch", "admitted", "fetched"),
+    ("decode", "fetched", "decoded"),
+    ("preprocess", "decoded", "preprocessed"),
+    ("inference", "preprocessed", "inferred"),
+    ("persist", "inferred", "persisted"),
+    ("sublabel", "persisted", "sublabel_set"),
+    ("broadcast", "persisted", "broadcast"),
+)
+
+
+class DetectionTrace:
+    """Timeline of one event through fetch, decode, inference, persist and notify.
+
+    Stages call ``mark(milestone)`` as they finish; ``finish()`` turns the
+    milestones into per-stage spans and records them in the latency
+    histograms. Marks may come from worker threads. ``received_at`` is the
+    perf_counter time the MQTT message arrived (default: now); the time
+    until the trace is created, spent in the coalescer and intake queue,
+    is the intake span.
+    """
+
+    def __init__(self, frigate_event: str, source: str = "live", received_at: Optional[float] = None):
+        self.frigate_event = frigate_event
+        self.source = source
+        self.cached = False
+        now = time.perf_counter()
+        self._started = now if received_at is None else received_at
+        self.marks: dict[str, float] = {"received": 0.0, "admitted": (now - self._started) * 1000}
+        self._finished = False
+
+    def mark(self, milestone: str):
+        """Record that ``milestone`` was reached now."""
+        self.marks[milestone] = (time.perf_counter() - self._started) * 1000
+
+    def spans(self) -> dict[str, float]:
+        """Durations (ms) of the stages whose start and end milestones were both reached."""
+        return {
+            name: self.marks[end] - self.marks[start]
+            for name, start, end in SPANS
+            if start in self.marks and end in self.marks
+        }
+
+    @property
+    def total_ms(self) -> float:
+        return max(self.marks.values())
+
+    def finish(self, histograms: Optional[LatencyHistograms] = None):
+        """Record the spans and total in the latency histograms (once)."""
+        if self._finished:
+            return
+        self._finished = True
+        histograms = histograms or detection_latency
+        for name, duration in self.spans().items():
+            histograms.observe(self.source, name, duration)
+        histograms.observe(self.source, "total", self.total_ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "cached": self.cached,
+            "total_ms": self.total_ms,
+            "spans": self.spans(),
+            "marks": dict(self.marks),
+        }
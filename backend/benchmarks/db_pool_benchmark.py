@@ -0,0 +1,132 @@
+"""Latency benchmark: pooled SQLite connections vs a new connection per call.
+
+Usage (from backend/):
+    python -m benchmarks.db_pool_benchmark --rows 20000 --rate 200 --seconds 5 --write-ratio 0.2
+
+Seeds a temporary database, then issues requests at a fixed arrival rate
+(open loop, like API clients and MQTT events arriving independently): reads
+fetch an /events page plus its count, writes insert a detection and commit.
+"connect" opens aiosqlite.connect() for every request, as get_db() used to;
+"pool" goes through DatabasePool's writer and readers.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import aiosqlite
+
+import app.database as database
+from app.repositories.detection_repository import Detection, DetectionRepository
+from app.services.metrics import Histogram
+
+
+def detection(n: int) -> Detection:
+    return Detection(
+        detection_time=datetime(2024, 1, 1) + timedelta(minutes=n),
+        detection_index=n % 900,
+        score=0.5 + (n % 50) / 100,
+        display_name=f"Species {n % 40}",
+        category_name=f"Species {n % 40}",
+        frigate_event=f"{1704067200 + n * 60}.0-{n:08x}",
+        camera_name=f"cam{n % 3}",
+    )
+
+
+async def seed(rows: int):
+    await database.init_db()
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        repo = DetectionRepository(db)
+        for n in range(rows):
+            await repo.create(detection(n), commit=False)
+        await db.commit()
+
+
+@asynccontextmanager
+async def connect_per_call():
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        yield db
+
+
+async def run(mode: str, args, first_id: int) -> tuple[Histogram, Histogram, float, int]:
+    if mode == "connect":
+        read_db = write_db = connect_per_call
+    else:
+        read_db, write_db = database.get_read_db, database.get_db
+
+    reads, writes = Histogram(), Histogram()
+    rng = random.Random(1)
+    next_id = first_id
+    errors = 0
+
+    async def read():
+        started = time.perf_counter()
+        async with read_db() as db:
+            repo = DetectionRepository(db)
+            await repo.get_all(limit=50, offset=rng.randrange(0, 500), species=f"Species {rng.randrange(40)}")
+            await repo.get_count()
+        reads.observe((time.perf_counter() - started) * 1000)
+
+    async def write(n: int):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            async with write_db() as db:
+                await DetectionRepository(db).create(detection(n))
+        except aiosqlite.OperationalError:
+            errors += 1  # "database is locked" once concurrent writers exceed the busy timeout
+            return
+        writes.observe((time.perf_counter() - started) * 1000)
+
+    tasks = []
+    interval = 1 / args.rate
+    started = time.perf_counter()
+    for i in range(int(args.rate * args.seconds)):
+        # Open loop: requests arrive on schedule whether or not earlier ones finished
+        delay = started + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if rng.random() < args.write_ratio:
+            tasks.append(asyncio.create_task(write(next_id)))
+            next_id += 1
+        else:
+            tasks.append(asyncio.create_task(read()))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await database.close_db()
+    return reads, writes, elapsed, errors
+
+
+def report(mode: str, reads: Histogram, writes: Histogram, elapsed: float, requests: int, errors: int):
+    print(f"{mode:<8} {requests / elapsed:7.1f} req/s, {errors} failed writes")
+    for name, histogram in (("reads", reads), ("writes", writes)):
+        stats = histogram.get_stats()
+        print(f"  {name:<6} n={stats['count']:<5} p50 {stats['p50']:7.2f} ms  "
+              f"p95 {stats['p95']:7.2f} ms  p99 {stats['p99']:7.2f} ms  max {stats['max']:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=200.0, help="Requests per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "benchmark.db")
+        asyncio.run(seed(args.rows))
+        requests = int(args.rate * args.seconds)
+        first_id = args.rows
+        for mode in ("connect", "pool"):
+            reads, writes, elapsed, errors = asyncio.run(run(mode, args, first_id))
+            first_id += requests
+            report(mode, reads, writes, elapsed, requests, errors)
+
+
+if __name__ == "__main__":
+    main()
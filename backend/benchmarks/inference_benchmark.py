@@ -0,0 +1,104 @@
+"""Compare in-process (thread) and multi-process bird inference throughput.
+
+Usage (from backend/):
+    python -m benchmarks.inference_benchmark --model /data/models/model.tflite \
+        --labels /data/models/labels.txt --images 200 --concurrency 16
+
+Synthetic 640x480 JPEG snapshots (quality 95, like Frigate's crop) are pushed
+through ClassifierService.classify_async with the requested concurrency, once
+per inference mode.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.services.classifier_service import ClassifierService
+
+
+def make_snapshots(count: int, size=(640, 480)) -> list[bytes]:
+    rng = np.random.default_rng(42)
+    snapshots = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=95)
+        snapshots.append(buffer.getvalue())
+    return snapshots
+
+
+class BenchmarkClassifier(ClassifierService):
+    """ClassifierService reading the model from explicit paths."""
+
+    def __init__(self, model_path: str, labels_path: str):
+        self._bench_paths = (model_path, labels_path)
+        super().__init__()
+
+    def _get_model_paths(self, model_file: str, labels_file: str) -> tuple[str, str]:
+        return self._bench_paths
+
+
+async def run_mode(mode: str, args, snapshots: list[bytes]) -> dict:
+    settings.classification.inference_mode = mode
+    settings.classification.interpreter_pool_size = args.workers
+    settings.classification.process_workers = args.workers
+    settings.classification.batch_max_size = args.batch_size
+
+    classifier = BenchmarkClassifier(args.model, args.labels)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def one(data: bytes):
+        async with semaphore:
+            started = time.perf_counter()
+            await classifier.classify_async(Image.open(BytesIO(data)))
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        # Warm up interpreters / worker processes
+        await asyncio.gather(*(one(s) for s in snapshots[:args.workers]))
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(s) for s in snapshots))
+        elapsed = time.perf_counter() - started
+    finally:
+        classifier.shutdown()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "images": len(snapshots),
+        "seconds": elapsed,
+        "images_per_sec": len(snapshots) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--labels", required=True)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--modes", nargs="+", default=["thread", "process"], choices=["thread", "process"])
+    args = parser.parse_args()
+
+    snapshots = make_snapshots(args.images)
+    print(f"{'mode':<8} {'images':>7} {'seconds':>8} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in args.modes:
+        r = await run_mode(mode, args, snapshots)
+        print(f"{r['mode']:<8} {r['images']:>7} {r['seconds']:>8.2f} {r['images_per_sec']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
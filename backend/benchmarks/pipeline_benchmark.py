@@ -0,0 +1,102 @@
+"""Throughput benchmark for the staged event pipeline.
+
+Usage (from backend/):
+    python -m benchmarks.pipeline_benchmark --events 200 --fetch-ms 80 --decode-ms 8 --classify-ms 15
+
+Simulates per-event stage costs (network wait for the snapshot fetch, CPU
+time for decode and inference, a commit per database write) and compares the
+old strictly serial path with EventPipeline's overlapping stages, whose
+writes are grouped into shared commits by the DetectionWriter.
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.detection_writer import DetectionWriter
+from app.services.event_pipeline import EventJob, EventPipeline, Stage
+
+
+def busy(ms: float):
+    """Burn CPU on a worker thread, as decode/inference would."""
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+async def run_serial(args) -> float:
+    started = time.perf_counter()
+    for _ in range(args.events):
+        await asyncio.sleep(args.fetch_ms / 1000)
+        await asyncio.to_thread(busy, args.decode_ms)
+        await asyncio.to_thread(busy, args.classify_ms)
+        await asyncio.sleep(args.commit_ms / 1000)
+    return time.perf_counter() - started
+
+
+async def run_pipeline(args) -> tuple[float, dict]:
+    async def fetch(job):
+        await asyncio.sleep(args.fetch_ms / 1000)
+        return True
+
+    async def decode(job):
+        await asyncio.to_thread(busy, args.decode_ms)
+        return True
+
+    async def classify(job):
+        await asyncio.to_thread(busy, args.classify_ms)
+        return True
+
+    writer = DetectionWriter(max_batch_size=64, max_wait_ms=5)
+
+    async def commit(ops):
+        # One commit per writer batch
+        await asyncio.sleep(args.commit_ms / 1000)
+        return [None] * len(ops)
+
+    writer._apply = commit
+
+    async def persist(job):
+        await writer.submit(None)
+        return False
+
+    pipeline = EventPipeline([
+        Stage("fetch", fetch, 8, 64),
+        Stage("decode", decode, 4, 64),
+        Stage("classify", classify, 4, 64),
+        Stage("persist", persist, 16, 64),
+    ])
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    futures = []
+    for i in range(args.events):
+        job = EventJob(frigate_event=str(i), after={}, msg_type="update", future=loop.create_future())
+        futures.append(await pipeline.submit(job))
+    await asyncio.gather(*futures)
+    elapsed = time.perf_counter() - started
+    stats = pipeline.get_stats()
+    stats["writer"] = writer.get_stats()
+    await pipeline.stop()
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--fetch-ms", type=float, default=80.0)
+    parser.add_argument("--decode-ms", type=float, default=8.0)
+    parser.add_argument("--classify-ms", type=float, default=15.0)
+    parser.add_argument("--commit-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    serial = asyncio.run(run_serial(args))
+    piped, stats = asyncio.run(run_pipeline(args))
+
+    print(f"serial:   {args.events / serial:8.1f} events/s ({serial:.2f}s)")
+    print(f"pipeline: {args.events / piped:8.1f} events/s ({piped:.2f}s)")
+    for name, stage in stats["stages"].items():
+        print(f"  {name:<9} avg {stage['avg_ms']:7.2f} ms")
+    print(f"  writer    avg batch {stats['writer']['avg_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+import pytest
+import pytest_asyncio
+
+import app.database as database
+from app.database import close_db, get_db, init_db
+from app.repositories.detection_repository import Detection, DetectionRepository
+
+
+@pytest_asyncio.fixture
+async def db_path(tmp_path, monkeypatch):
+    """A fresh database with the app's schema (and migrations); the pool is closed afterwards."""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    await init_db()
+    yield database.DB_PATH
+    await close_db()
+
+
+@pytest_asyncio.fixture
+async def repo(db_path):
+    """A DetectionRepository on the pooled writer connection."""
+    async with get_db() as db:
+        yield DetectionRepository(db)
+
+
+@pytest.fixture
+def make_detection():
+    """Factory for Detection rows; the time defaults to now."""
+    def make(
+        event_id: str,
+        detection_time: Optional[datetime] = None,
+        *,
+        species: str = "Cardinal",
+        score: float = 0.9,
+        has_clip: Optional[bool] = None,
+    ) -> Detection:
+        return Detection(
+            detection_time=detection_time or datetime.now(),
+            detection_index=1,
+            score=score,
+            display_name=species,
+            category_name=species,
+            frigate_event=event_id,
+            camera_name="cam1",
+            has_clip=has_clip,
+        )
+
+    return make
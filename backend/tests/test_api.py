@@ -7,3 +7,12 @@ def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok", "service": "whosatmyfeeder-backend"}
+
+
+def test_metrics_endpoint_uses_prometheus_text_format():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE yawamf_mqtt_messages_received_total counter" in response.text
+    assert "yawamf_sse_subscribers 0" in response.text
+    assert "yawamf_inference_queue_depth 0" in response.text
@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.database import get_read_db
+from app.repositories.detection_repository import DetectionRepository
+from app.services.backfill_service import BackfillService
+from app.services.detection_writer import DetectionWriter
+
+
+def _event(event_id: str, **fields) -> dict:
+    return {"id": event_id, "camera": "cam1", "start_time": 1700000000 + int(event_id[1:]), **fields}
+
+
+@pytest.mark.asyncio
+async def test_chunk_is_saved_with_one_batched_upsert(db_path):
+    scores = {"e1": 0.95, "e2": 0.2, "e3": 0.9}
+    classifier = MagicMock()
+    classifier.prepare_snapshot = MagicMock(side_effect=lambda content, trace: content.decode())
+    classifier.classify_prepared_async = AsyncMock(
+        side_effect=lambda event_id: [{"label": "Cardinal", "score": scores[event_id], "index": 1}])
+    frigate = MagicMock()
+    frigate.get_snapshot = AsyncMock(
+        side_effect=lambda event_id: MagicMock(status_code=200, content=event_id.encode()))
+    writer = DetectionWriter(max_wait_ms=0)
+    writer.upsert_many = AsyncMock(wraps=writer.upsert_many)
+    service = BackfillService(classifier, frigate=frigate, writer=writer)
+
+    statuses = await service.process_historical_batch([_event("e1"), _event("e2"), _event("e3")])
+
+    # e2 is below the confidence threshold
+    assert statuses == ["new", "skipped", "new"]
+    writer.upsert_many.assert_awaited_once()
+    assert [d.frigate_event for d in writer.upsert_many.await_args.args[0]] == ["e1", "e3"]
+    async with get_read_db() as db:
+        assert await DetectionRepository(db).get_count() == 2
+
+    # Already stored events are skipped before fetching
+    assert await service.process_historical_batch([_event("e1")]) == ["skipped"]
+
+
+def test_backfilled_detection_keeps_clip_availability():
+    service = BackfillService(MagicMock(), frigate=MagicMock(), writer=MagicMock())
+    results = [{"label": "Cardinal", "score": 0.95, "index": 1}]
+
+    assert service._build_detection(_event("e1", has_clip=True), results)[1].has_clip is True
+    assert service._build_detection(_event("e2", has_clip=False), results)[1].has_clip is False
+    assert service._build_detection(_event("e3"), results)[1].has_clip is None
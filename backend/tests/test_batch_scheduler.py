@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.services.batch_scheduler import BatchScheduler
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_dispatched_together():
+    calls = []
+
+    async def dispatch(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    scheduler = BatchScheduler(dispatch, max_batch_size=8, max_wait_ms=20)
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_dispatches_without_waiting_for_deadline():
+    calls = []
+
+    async def dispatch(items):
+        calls.append(len(items))
+        return items
+
+    # Deadline far in the future: only the size limit can trigger dispatch
+    scheduler = BatchScheduler(dispatch, max_batch_size=2, max_wait_ms=60_000)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(scheduler.submit(i) for i in range(4))), timeout=1
+    )
+
+    assert results == [0, 1, 2, 3]
+    assert calls == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_single_request_is_bounded_by_max_wait():
+    async def dispatch(items):
+        return items
+
+    scheduler = BatchScheduler(dispatch, max_batch_size=8, max_wait_ms=5)
+    assert await asyncio.wait_for(scheduler.submit("only"), timeout=1) == "only"
+    assert scheduler.get_stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatch_error_fails_every_caller():
+    async def dispatch(items):
+        raise RuntimeError("invoke failed")
+
+    scheduler = BatchScheduler(dispatch, max_batch_size=2, max_wait_ms=5)
+    results = await asyncio.gather(
+        scheduler.submit(1), scheduler.submit(2), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
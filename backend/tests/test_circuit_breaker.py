@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _fail(breaker: CircuitBreaker, times: int):
+    for _ in range(times):
+        breaker.acquire()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    _fail(breaker, 2)
+    breaker.acquire()
+    breaker.record_success()  # success resets the count
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+    _fail(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.get_stats()["rejected"] == 1
+    assert breaker.get_stats()["times_opened"] == 1
+
+
+def test_half_open_allows_one_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.02)
+    _fail(breaker, 1)
+    time.sleep(0.03)
+    assert breaker.state == HALF_OPEN
+
+    breaker.acquire()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.acquire()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.02)
+    _fail(breaker, 1)
+    time.sleep(0.03)
+    _fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert breaker.get_stats()["times_opened"] == 2
+
+
+def test_released_probe_frees_slot():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.02)
+    _fail(breaker, 1)
+    time.sleep(0.03)
+    breaker.acquire()
+    breaker.release()  # e.g. cancelled
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+
+
+def test_custom_error_class():
+    class Unavailable(CircuitOpenError):
+        pass
+
+    breaker = CircuitBreaker("test", failure_threshold=1, error_class=Unavailable)
+    _fail(breaker, 1)
+    with pytest.raises(Unavailable):
+        breaker.acquire()
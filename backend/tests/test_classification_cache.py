@@ -0,0 +1,66 @@
+from app.services.classification_cache import ClassificationCache, snapshot_digest
+
+RESULTS = [{"index": 1, "score": 0.9, "label": "Cardinal"}]
+
+
+def test_hit_and_miss_counters():
+    cache = ClassificationCache(max_entries=4)
+    digest = snapshot_digest(b"snapshot")
+
+    assert cache.get("bird:1", digest) is None
+    cache.put("bird:1", digest, RESULTS)
+    assert cache.get("bird:1", digest) == RESULTS
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_model_identity_is_part_of_key():
+    cache = ClassificationCache(max_entries=4)
+    digest = snapshot_digest(b"snapshot")
+    cache.put("bird:1", digest, RESULTS)
+
+    assert cache.get("bird:2", digest) is None
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = ClassificationCache(max_entries=2)
+    a, b, c = (snapshot_digest(x) for x in (b"a", b"b", b"c"))
+    cache.put("bird:1", a, RESULTS)
+    cache.put("bird:1", b, RESULTS)
+    cache.get("bird:1", a)  # a becomes most recently used
+    cache.put("bird:1", c, RESULTS)
+
+    assert cache.get("bird:1", b) is None
+    assert cache.get("bird:1", a) is not None
+    assert cache.get("bird:1", c) is not None
+
+
+def test_invalidate_only_drops_named_model():
+    cache = ClassificationCache(max_entries=4)
+    digest = snapshot_digest(b"snapshot")
+    cache.put("bird:1", digest, RESULTS)
+    cache.put("wildlife:1", digest, RESULTS)
+
+    cache.invalidate("bird")
+
+    assert cache.get("bird:1", digest) is None
+    assert cache.get("wildlife:1", digest) is not None
+
+
+def test_returned_results_are_copies():
+    cache = ClassificationCache(max_entries=4)
+    digest = snapshot_digest(b"snapshot")
+    cache.put("bird:1", digest, RESULTS)
+
+    cache.get("bird:1", digest)[0]["label"] = "Unknown Bird"
+    assert cache.get("bird:1", digest)[0]["label"] == "Cardinal"
+
+
+def test_disabled_cache_never_stores():
+    cache = ClassificationCache(max_entries=0)
+    digest = snapshot_digest(b"snapshot")
+    cache.put("bird:1", digest, RESULTS)
+    assert cache.get("bird:1", digest) is None
@@ -0,0 +1,313 @@
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+from app.services import classifier_service
+from app.services.classifier_service import ModelInstance
+
+
+class FakeInterpreter:
+    """Minimal stand-in for tflite.Interpreter: scores each RGB channel by its mean."""
+
+    def __init__(self, model_path: str, num_threads=None):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.input_shape = [1, 8, 8, 3]
+        self.invocations = 0
+        self.allocations = 0
+        self._tensors = {}
+
+    def allocate_tensors(self):
+        self.allocations += 1
+        self._tensors = {
+            0: np.zeros(self.input_shape, dtype=np.float32),
+            1: np.zeros((self.input_shape[0], 3), dtype=np.float32),
+        }
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.input_shape), "dtype": np.float32}]
+
+    def get_output_details(self):
+        return [{"index": 1, "shape": np.array([self.input_shape[0], 3]), "dtype": np.float32, "quantization_parameters": {}}]
+
+    def resize_tensor_input(self, index, shape):
+        self.input_shape = list(shape)
+
+    def tensor(self, index):
+        return lambda: self._tensors[index]
+
+    def invoke(self):
+        self.invocations += 1
+        self._tensors[1][...] = self._tensors[0].mean(axis=(1, 2)) * 10.0
+
+
+@pytest.fixture
+def fake_tflite(monkeypatch):
+    class FakeTflite:
+        Interpreter = FakeInterpreter
+
+    monkeypatch.setattr(classifier_service, "tflite", FakeTflite)
+
+
+@pytest.fixture
+def model_files(tmp_path):
+    model_path = tmp_path / "model.tflite"
+    model_path.write_bytes(b"fake")
+    labels_path = tmp_path / "labels.txt"
+    labels_path.write_text("Red Bird\nGreen Bird\nBlue Bird\n")
+    return str(model_path), str(labels_path)
+
+
+def test_load_creates_interpreter_pool(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=3)
+    assert model.load()
+
+    status = model.get_status()
+    assert status["pool_size"] == 3
+    assert status["interpreters_available"] == 3
+
+
+def test_checkout_hands_out_distinct_interpreters(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=2)
+    model.load()
+
+    with model.checkout() as first, model.checkout() as second:
+        assert first is not second
+        assert model.get_status()["interpreters_available"] == 0
+    assert model.get_status()["interpreters_available"] == 2
+
+
+def test_classify_in_parallel_threads(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=2)
+    model.load()
+    results = {}
+
+    def run(name, color):
+        results[name] = model.classify(Image.new("RGB", (16, 16), color=color))
+
+    threads = [
+        threading.Thread(target=run, args=("red", (255, 0, 0))),
+        threading.Thread(target=run, args=("blue", (0, 0, 255))),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results["red"][0]["label"] == "Red Bird"
+    assert results["blue"][0]["label"] == "Blue Bird"
+    assert model.get_status()["interpreters_available"] == 2
+
+
+def test_classify_batch_single_invoke_matches_single_results(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=1)
+    model.load()
+    images = [
+        Image.new("RGB", (16, 16), color=(255, 0, 0)),
+        Image.new("RGB", (16, 16), color=(0, 255, 0)),
+        Image.new("RGB", (16, 16), color=(0, 0, 255)),
+    ]
+
+    batch_results = model.classify_batch(images)
+
+    assert model.interpreter.invocations == 1
+    # Three images run in the four-row bucket; the padding row's output is dropped
+    assert model.interpreter.input_shape[0] == 4
+    assert len(batch_results) == 3
+    assert [r[0]["label"] for r in batch_results] == ["Red Bird", "Green Bird", "Blue Bird"]
+
+    for image, results in zip(images, batch_results):
+        single = model.classify(image)
+        assert [c["index"] for c in single] == [c["index"] for c in results]
+        assert single[0]["score"] == pytest.approx(results[0]["score"])
+        assert sum(c["score"] for c in single) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_input_is_normalized_in_place_and_buffers_are_reused(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=1)
+    model.load()
+    interpreter = model.interpreter
+    input_buffer = interpreter._tensors[0]
+
+    model.classify(Image.new("RGB", (16, 16), color=(255, 127, 0)))
+
+    # Pixels were normalized directly into the interpreter's input tensor
+    assert interpreter._tensors[0] is input_buffer
+    np.testing.assert_allclose(input_buffer[0, 0, 0], [1.0, 0.0, -127.0 / 128.0])
+
+    allocations = interpreter.allocations
+    scratch = model._scratch_pixels(interpreter, 1)
+    model.classify(Image.new("RGB", (16, 16), color=(0, 0, 255)))
+    assert interpreter.allocations == allocations
+    assert np.shares_memory(model._scratch_pixels(interpreter, 1), scratch)
+
+
+def test_batch_sizes_within_a_bucket_reuse_tensors(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=1)
+    model.load()
+    interpreter = model.interpreter
+    red, blue = Image.new("RGB", (16, 16), color=(255, 0, 0)), Image.new("RGB", (16, 16), color=(0, 0, 255))
+
+    model.classify_batch([red] * 5)
+    allocations = interpreter.allocations
+
+    for n in (6, 8, 7, 5):
+        results = model.classify_batch([blue] * (n - 1) + [red])
+        assert len(results) == n
+        assert results[-1][0]["label"] == "Red Bird"
+    assert interpreter.allocations == allocations
+    assert interpreter.input_shape[0] == 8
+
+
+def test_invoke_raw_after_batched_invoke(fake_tflite, model_files):
+    model = ModelInstance("bird", *model_files, pool_size=1)
+    model.load()
+    model.classify_batch([Image.new("RGB", (16, 16), color=(255, 0, 0))] * 3)
+
+    pixels = np.zeros((1, 8, 8, 3), dtype=np.uint8)
+    pixels[..., 2] = 255
+    raw = model.invoke_raw(pixels)
+
+    # Input was resized back to the single test image and normalized as for classification
+    assert raw.shape == (1, 3)
+    assert raw[0].argmax() == 2
+    assert model.get_status()["interpreters_available"] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_results_are_cached_until_model_reload(fake_tflite, model_files, monkeypatch):
+    from io import BytesIO
+    from app.services.classifier_service import ClassifierService
+
+    monkeypatch.setattr(ClassifierService, "_get_model_paths", lambda self, m, l: model_files)
+    service = ClassifierService()
+    try:
+        buffer = BytesIO()
+        Image.new("RGB", (16, 16), color=(0, 255, 0)).save(buffer, format="JPEG")
+        snapshot = buffer.getvalue()
+
+        first = await service.classify_snapshot_async(snapshot)
+        second = await service.classify_snapshot_async(snapshot)
+        assert first[0]["label"] == second[0]["label"] == "Green Bird"
+
+        cache_stats = service.get_inference_stats()["cache"]
+        assert cache_stats["hits"] == 1
+        assert cache_stats["misses"] == 1
+
+        await service.reload_model("bird")
+        await service.classify_snapshot_async(snapshot)
+        cache_stats = service.get_inference_stats()["cache"]
+        assert cache_stats["hits"] == 1
+        assert cache_stats["misses"] == 2
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_mode_keeps_one_interpreter_in_parent(fake_tflite, model_files, monkeypatch):
+    from app.config import settings
+    from app.services.classifier_service import ClassifierService
+
+    started = []
+
+    class FakePool:
+        def __init__(self, name, model_path, labels_path, **kwargs):
+            started.append(self)
+            self.stopped = False
+
+        def shutdown(self):
+            self.stopped = True
+
+    monkeypatch.setattr(settings.classification, "inference_mode", "process")
+    monkeypatch.setattr(settings.classification, "interpreter_pool_size", 4)
+    monkeypatch.setattr(classifier_service, "ProcessInferencePool", FakePool)
+    monkeypatch.setattr(ClassifierService, "_get_model_paths", lambda self, m, l: model_files)
+    service = ClassifierService()
+    try:
+        assert service._models["bird"].get_status()["pool_size"] == 1
+        assert service._process_pool is started[0]
+
+        await service.reload_model("bird")
+        assert started[0].stopped
+        assert service._process_pool is started[1]
+        assert service._models["bird"].get_status()["pool_size"] == 1
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_mode_returns_slot_when_cancelled_during_fill(fake_tflite, model_files, monkeypatch):
+    import asyncio
+    from app.config import settings
+    from app.services.classifier_service import ClassifierService
+
+    class FakeSlot:
+        def view(self, n):
+            return np.zeros((n, 8, 8, 3), dtype=np.uint8)
+
+    class FakePool:
+        max_batch_size = 4
+
+        def __init__(self, name, model_path, labels_path, **kwargs):
+            self.free = [FakeSlot(), FakeSlot()]
+
+        def acquire_slot(self):
+            return self.free.pop()
+
+        def release_slot(self, slot):
+            self.free.append(slot)
+
+        def shutdown(self):
+            pass
+
+    monkeypatch.setattr(settings.classification, "inference_mode", "process")
+    monkeypatch.setattr(classifier_service, "ProcessInferencePool", FakePool)
+    monkeypatch.setattr(ClassifierService, "_get_model_paths", lambda self, m, l: model_files)
+    service = ClassifierService()
+    try:
+        filling, finish = threading.Event(), threading.Event()
+
+        def slow_resize(image, out=None):
+            filling.set()
+            finish.wait(5)
+
+        monkeypatch.setattr(service._models["bird"], "_resize", slow_resize)
+        task = asyncio.create_task(service.classify_batch_async([Image.new("RGB", (16, 16))]))
+        await asyncio.to_thread(filling.wait, 5)
+        assert len(service._process_pool.free) == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        finish.set()
+        for _ in range(100):
+            if len(service._process_pool.free) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        assert len(service._process_pool.free) == 2
+    finally:
+        service.shutdown()
+
+
+def test_interpreters_share_the_cpu_budget(fake_tflite, model_files, monkeypatch):
+    from app.config import settings
+    from app.services.classifier_service import ClassifierService
+
+    monkeypatch.setattr(classifier_service.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings.classification, "interpreter_pool_size", None)
+    monkeypatch.setattr(ClassifierService, "_get_model_paths", lambda self, m, l: model_files)
+    service = ClassifierService()
+    try:
+        bird = service._models["bird"]
+        wildlife = service._get_wildlife_model()
+
+        assert bird.get_status()["pool_size"] == 8
+        assert wildlife.get_status()["pool_size"] == 2
+        # Eight inference threads, each invoke on one TFLite thread
+        assert service._executor.max_workers == 8
+        assert {i.num_threads for i in bird._interpreters + wildlife._interpreters} == {1}
+    finally:
+        service.shutdown()
+
+    assert classifier_service.interpreter_threads(2) == 4
@@ -0,0 +1,203 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from app.config import settings
+from app.database import get_db
+from app.repositories.detection_repository import DetectionRepository
+from app.services.clip_reconciler import ClipCache, ClipReconciler, batch_check_clips, clip_cache
+from app.services.frigate_client import FrigateUnavailableError
+
+
+@pytest.fixture(autouse=True)
+def empty_clip_cache():
+    clip_cache.clear()
+    yield
+    clip_cache.clear()
+
+
+def _frigate(clips: dict) -> MagicMock:
+    """Fake Frigate client answering get_event from {event_id: has_clip}; missing ids are 404."""
+    async def get_event(event_id):
+        if event_id not in clips:
+            return MagicMock(status_code=404)
+        return MagicMock(status_code=200, json=lambda: {"id": event_id, "has_clip": clips[event_id]})
+
+    frigate = MagicMock()
+    frigate.get_event = AsyncMock(side_effect=get_event)
+    return frigate
+
+
+@pytest.mark.asyncio
+async def test_has_clip_round_trip(db_path, make_detection):
+    async with get_db() as db:
+        repo = DetectionRepository(db)
+        await repo.create(make_detection("a"))
+        await repo.create(make_detection("b", has_clip=True))
+        assert (await repo.get_by_frigate_event("a")).has_clip is None
+        assert (await repo.get_by_frigate_event("b")).has_clip is True
+
+        # An update without clip information keeps the stored value
+        await repo.update(make_detection("b", has_clip=None))
+        assert (await repo.get_by_frigate_event("b")).has_clip is True
+
+        await repo.set_clip_availability({"a": False})
+        assert (await repo.get_by_frigate_event("a")).has_clip is False
+
+
+@pytest.mark.asyncio
+async def test_clip_check_candidates(db_path, make_detection):
+    async with get_db() as db:
+        repo = DetectionRepository(db)
+        await repo.create(make_detection("unknown"))
+        await repo.create(make_detection("fresh", has_clip=True))
+        await repo.create(make_detection("old_clip", datetime.now() - timedelta(days=30), has_clip=True))
+        await repo.create(make_detection("old_no_clip", datetime.now() - timedelta(days=30), has_clip=False))
+        await repo.create(make_detection("recent_no_clip", has_clip=False))
+
+        week_ago = datetime.now() - timedelta(days=7)
+        assert await repo.get_clip_check_candidates(datetime.now() - timedelta(hours=1), week_ago) == ["unknown"]
+
+        # Once everything is stale, recheck clips (retention) and recent misses, not old misses
+        candidates = await repo.get_clip_check_candidates(datetime.now() + timedelta(hours=1), week_ago)
+        assert candidates[0] == "unknown"
+        assert set(candidates) == {"unknown", "fresh", "old_clip", "recent_no_clip"}
+
+
+@pytest.mark.asyncio
+async def test_batch_check_clips_skips_undetermined_events():
+    responses = {
+        "a": MagicMock(status_code=200, json=lambda: {"has_clip": True}),
+        "b": MagicMock(status_code=404),
+        "c": MagicMock(status_code=500),
+        "d": FrigateUnavailableError("down"),
+    }
+
+    async def get_event(event_id):
+        if isinstance(responses[event_id], Exception):
+            raise responses[event_id]
+        return responses[event_id]
+
+    frigate = MagicMock()
+    frigate.get_event = AsyncMock(side_effect=get_event)
+
+    result = await batch_check_clips(["a", "b", "c", "d"], frigate)
+    assert result == {"a": True, "b": False}
+
+
+@pytest.mark.asyncio
+async def test_batch_check_clips_queries_frigate_in_bulk():
+    ids = [f"17000000{n:02d}.5-abc{n}" for n in range(5)]
+    frigate = MagicMock()
+    frigate.get_events = AsyncMock(return_value=MagicMock(
+        status_code=200,
+        # The bulk query misses ids[4] (e.g. beyond its page size)
+        json=lambda: [{"id": event_id, "has_clip": n % 2 == 0} for n, event_id in enumerate(ids[:4])]
+        + [{"id": "1700000001.0-other", "has_clip": True}],
+    ))
+    frigate.get_event = AsyncMock(return_value=MagicMock(status_code=200, json=lambda: {"has_clip": True}))
+
+    result = await batch_check_clips(ids, frigate)
+    assert result == {ids[0]: True, ids[1]: False, ids[2]: True, ids[3]: False, ids[4]: True}
+    frigate.get_events.assert_awaited_once()
+    params = frigate.get_events.await_args.args[0]
+    assert params["after"] <= 1700000000.5 and params["before"] >= 1700000004.5
+    frigate.get_event.assert_awaited_once_with(ids[4])
+
+    # A repeated page view is answered from the cache
+    assert await batch_check_clips(ids, frigate) == result
+    frigate.get_events.assert_awaited_once()
+    frigate.get_event.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_fallback_lookups_are_bounded():
+    import app.services.clip_reconciler as clip_reconciler
+    active = 0
+    peak = 0
+
+    async def get_event(event_id):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return MagicMock(status_code=404)
+
+    frigate = MagicMock()
+    frigate.get_event = AsyncMock(side_effect=get_event)
+    result = await batch_check_clips([f"evt{n}" for n in range(30)], frigate)
+    assert len(result) == 30
+    assert 1 < peak <= clip_reconciler.CLIP_CHECK_CONCURRENCY
+
+
+def test_clip_cache_expires():
+    cache = ClipCache(ttl_seconds=0.0)
+    cache.put({"a": True})
+    assert cache.get("a") is None
+
+    cache = ClipCache(ttl_seconds=60, max_entries=2)
+    cache.put({"a": True, "b": False, "c": True})
+    assert cache.get("a") is None
+    assert cache.get("b") is False
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_reconcile_requested_and_unknown_events(db_path, make_detection):
+    async with get_db() as db:
+        repo = DetectionRepository(db)
+        for event_id in ("a", "b", "c"):
+            await repo.create(make_detection(event_id))
+        await repo.create(make_detection("checked", has_clip=True))
+
+    reconciler = ClipReconciler(frigate=_frigate({"a": True, "b": False}), batch_size=10)
+    reconciler.request(["c"])
+    assert await reconciler.reconcile_once() == 3
+
+    async with get_db() as db:
+        repo = DetectionRepository(db)
+        assert (await repo.get_by_frigate_event("a")).has_clip is True
+        assert (await repo.get_by_frigate_event("b")).has_clip is False
+        assert (await repo.get_by_frigate_event("c")).has_clip is False  # 404: event gone
+        assert (await repo.get_by_frigate_event("checked")).has_clip is True
+
+    stats = reconciler.get_stats()
+    assert stats["pending"] == 0
+    assert stats["checked"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_clip_checks_rotate_behind_other_candidates(db_path, make_detection):
+    now = datetime.now()
+    async with get_db() as db:
+        repo = DetectionRepository(db)
+        for n, event_id in enumerate(("gone1", "gone2", "new1", "new2")):
+            await repo.create(make_detection(event_id, now - timedelta(minutes=n)))
+
+    # Frigate can't answer for gone1/gone2 (500s); new1/new2 are only found on later passes
+    frigate = MagicMock()
+    frigate.get_event = AsyncMock(return_value=MagicMock(status_code=500))
+    reconciler = ClipReconciler(frigate=frigate, batch_size=2)
+    assert await reconciler.reconcile_once() == 0
+    assert [c.args[0] for c in frigate.get_event.await_args_list] == ["gone1", "gone2"]
+
+    frigate.get_event.reset_mock()
+    assert await reconciler.reconcile_once() == 0
+    assert [c.args[0] for c in frigate.get_event.await_args_list] == ["new1", "new2"]
+
+    async with get_db() as db:
+        candidates = await DetectionRepository(db).get_clip_check_candidates(now, now - timedelta(days=7))
+    # Failed checks stay unknown and come back, least recently tried first
+    assert candidates[:2] == ["gone1", "gone2"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_skipped_when_clips_disabled(db_path, monkeypatch):
+    monkeypatch.setattr(settings.frigate, "clips_enabled", False)
+    frigate = _frigate({})
+    reconciler = ClipReconciler(frigate=frigate)
+    reconciler.request(["a"])
+    assert await reconciler.reconcile_once() == 0
+    frigate.get_event.assert_not_called()
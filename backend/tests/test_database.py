@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime
+
+import aiosqlite
+import pytest
+
+import app.database as database
+from app.database import DatabasePool, close_db, get_db, get_pool, get_pool_stats, get_read_db, init_db
+from app.repositories.detection_repository import DetectionRepository
+
+
+async def _pragma(db, name: str):
+    async with db.execute(f"PRAGMA {name}") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+@pytest.mark.asyncio
+async def test_pragmas_applied_once_at_open(db_path):
+    async with get_db() as db:
+        assert await _pragma(db, "journal_mode") == "wal"
+        assert await _pragma(db, "synchronous") == 1  # NORMAL
+        assert await _pragma(db, "busy_timeout") == 5000
+        assert await _pragma(db, "query_only") == 0
+    async with get_read_db() as db:
+        assert await _pragma(db, "cache_size") == -16000
+        assert await _pragma(db, "query_only") == 1
+        with pytest.raises(aiosqlite.OperationalError):
+            await db.execute("DELETE FROM detections")
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(db_path):
+    async with get_db() as first:
+        pass
+    async with get_db() as second:
+        assert second is first
+    async with get_read_db() as reader:
+        assert reader is not first
+
+
+@pytest.mark.asyncio
+async def test_writer_is_exclusive_and_readers_are_bounded(db_path):
+    pool = DatabasePool(db_path, readers=2)
+    active_writers = 0
+    peak_writers = 0
+    active_readers = 0
+    peak_readers = 0
+
+    async def write():
+        nonlocal active_writers, peak_writers
+        async with pool.writer():
+            active_writers += 1
+            peak_writers = max(peak_writers, active_writers)
+            await asyncio.sleep(0.01)
+            active_writers -= 1
+
+    async def read():
+        nonlocal active_readers, peak_readers
+        async with pool.reader():
+            active_readers += 1
+            peak_readers = max(peak_readers, active_readers)
+            await asyncio.sleep(0.01)
+            active_readers -= 1
+
+    await asyncio.gather(*[write() for _ in range(5)], *[read() for _ in range(6)])
+    assert peak_writers == 1
+    assert peak_readers == 2
+    stats = pool.get_stats()
+    assert stats["writes"] == 5
+    assert stats["reads"] == 6
+    assert stats["readers_in_use"] == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_write_block_is_rolled_back(db_path):
+    with pytest.raises(RuntimeError):
+        async with get_db() as db:
+            await db.execute("INSERT INTO detection_traces VALUES ('e1', 'live', '2024-01-01', 1.0, '{}')")
+            raise RuntimeError("boom")
+
+    async with get_db() as db:
+        await db.commit()  # must not commit the failed block's insert
+    async with get_read_db() as db:
+        async with db.execute("SELECT COUNT(*) FROM detection_traces") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+    assert get_pool_stats()["rollbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_follows_db_path(db_path, tmp_path, monkeypatch):
+    pool = await get_pool()
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "other.db"))
+    await init_db()
+    other = await get_pool()
+    assert other is not pool
+    assert other.path == database.DB_PATH
+
+
+@pytest.mark.asyncio
+async def test_legacy_detections_table_is_migrated(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    async with aiosqlite.connect(path) as db:
+        # Schema and storage format before the migration
+        await db.execute("""
+            CREATE TABLE detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                detection_time TIMESTAMP NOT NULL,
+                detection_index INTEGER NOT NULL,
+                score REAL NOT NULL,
+                display_name TEXT NOT NULL,
+                category_name TEXT NOT NULL,
+                frigate_event TEXT NOT NULL UNIQUE,
+                camera_name TEXT NOT NULL,
+                is_hidden INTEGER DEFAULT 0
+            )
+        """)
+        await db.executemany(
+            "INSERT INTO detections (detection_time, detection_index, score, display_name, category_name, frigate_event, camera_name) VALUES (?, 1, 0.9, 'Robin', 'Robin', ?, 'cam1')",
+            [("2024-01-15 08:30:00", "a"), ("2024-07-15 08:30:00.500000", "b"), ("2024-07-16T21:00:00", "c")],
+        )
+        await db.execute("UPDATE detections SET is_hidden = NULL WHERE frigate_event = 'c'")
+        await db.execute("CREATE INDEX idx_detections_species ON detections(display_name)")
+        await db.commit()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    await init_db()
+    await init_db()  # already migrated: no-op
+
+    async with get_read_db() as db:
+        assert await _pragma(db, "user_version") == database.SCHEMA_VERSION
+        async with db.execute("SELECT frigate_event, detection_time, utc_offset FROM detections ORDER BY id") as cursor:
+            rows = await cursor.fetchall()
+        async with db.execute("SELECT COUNT(*) FROM detections WHERE is_hidden = 0") as cursor:
+            visible = (await cursor.fetchone())[0]
+        async with db.execute("SELECT name FROM pragma_table_info('detections') WHERE \"notnull\" AND name = 'is_hidden'") as cursor:
+            is_hidden_not_null = await cursor.fetchone() is not None
+        async with db.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_detections_species'") as cursor:
+            old_index = await cursor.fetchone()
+        repo = DetectionRepository(db)
+        fetched = [await repo.get_by_frigate_event(event_id) for event_id in ("a", "b", "c")]
+    await close_db()
+
+    expected = [datetime(2024, 1, 15, 8, 30), datetime(2024, 7, 15, 8, 30, 0, 500000), datetime(2024, 7, 16, 21, 0)]
+    for (_, epoch_ms, utc_offset), dt in zip(rows, expected):
+        assert epoch_ms == round(dt.astimezone().timestamp() * 1000)
+        assert utc_offset == dt.astimezone().utcoffset().total_seconds()
+    assert [d.detection_time for d in fetched] == expected
+    assert visible == 3  # NULL meant visible
+    assert is_hidden_not_null
+    assert old_index is None
+
+
+@pytest.mark.asyncio
+async def test_v2_timestamps_are_migrated_to_epoch_ms(tmp_path, monkeypatch):
+    path = str(tmp_path / "v2.db")
+    checked = datetime(2024, 7, 15, 8, 30, 0, 250000)
+    async with aiosqlite.connect(path) as db:
+        # clip_checked_at and recorded_at were written as local-time text before v3
+        await db.execute(database.DETECTIONS_TABLE.format(name="detections"))
+        await db.execute("CREATE TABLE detection_traces (frigate_event TEXT PRIMARY KEY, source TEXT NOT NULL, "
+                         "recorded_at TIMESTAMP NOT NULL, total_ms REAL NOT NULL, trace TEXT NOT NULL)")
+        await db.executemany(
+            "INSERT INTO detections (detection_time, utc_offset, detection_index, score, display_name, category_name, "
+            "frigate_event, camera_name, has_clip, clip_checked_at) VALUES (0, 0, 1, 0.9, 'Robin', 'Robin', ?, 'cam1', ?, ?)",
+            [("a", 1, "2024-07-15 08:30:00.250000"), ("b", 0, "garbage"), ("c", None, None)],
+        )
+        await db.execute("INSERT INTO detection_traces VALUES ('a', 'live', '2024-07-15 08:30:00.250000', 1.0, '{}')")
+        await db.execute("PRAGMA user_version = 2")
+        await db.commit()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    await init_db()
+
+    async with get_read_db() as db:
+        async with db.execute("SELECT clip_checked_at FROM detections ORDER BY frigate_event") as cursor:
+            clip_checked = [row[0] for row in await cursor.fetchall()]
+        async with db.execute("SELECT recorded_at FROM detection_traces") as cursor:
+            recorded_at = (await cursor.fetchone())[0]
+    await close_db()
+
+    expected_ms = round(checked.astimezone().timestamp() * 1000)
+    # Unparseable values become 0, so the clip is checked again
+    assert clip_checked == [expected_ms, 0, None]
+    assert recorded_at == expected_ms
@@ -1,52 +1,77 @@
 import pytest
-import aiosqlite
-from datetime import datetime
-from app.repositories.detection_repository import DetectionRepository, Detection
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.mark.asyncio
+async def test_detection_repository(repo, make_detection):
+    # Test Create
+    dt = datetime(2023, 1, 1, 12, 0, 0)
+    detection = make_detection("evt_1", dt)
+    await repo.create(detection)
+
+    # Test Get
+    fetched = await repo.get_by_frigate_event("evt_1")
+    assert fetched is not None
+    assert fetched.frigate_event == "evt_1"
+    assert fetched.score == 0.9
+    assert fetched.detection_time == dt
+
+    # Test Update
+    detection.score = 0.95
+    await repo.update(detection)
+
+    fetched_updated = await repo.get_by_frigate_event("evt_1")
+    assert fetched_updated.score == 0.95
+
+
+@pytest.mark.asyncio
+async def test_time_is_stored_as_epoch_ms(repo, make_detection):
+    dt = datetime(2024, 7, 1, 6, 30, 15, 250000)
+    await repo.create(make_detection("evt_1", dt))
+
+    async with repo.db.execute("SELECT detection_time, utc_offset FROM detections") as cursor:
+        epoch_ms, utc_offset = await cursor.fetchone()
+    assert epoch_ms == round(dt.astimezone().timestamp() * 1000)
+    assert utc_offset == dt.astimezone().utcoffset().total_seconds()
+    assert (await repo.get_by_frigate_event("evt_1")).detection_time == dt
+
 
 @pytest.mark.asyncio
-async def test_detection_repository():
-    async with aiosqlite.connect(":memory:") as db:
-        # Init schema matches backend/app/database.py
-        await db.execute("""
-            CREATE TABLE detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                detection_time TIMESTAMP NOT NULL,
-                detection_index INTEGER NOT NULL,
-                score REAL NOT NULL,
-                display_name TEXT NOT NULL,
-                category_name TEXT NOT NULL,
-                frigate_event TEXT NOT NULL UNIQUE,
-                camera_name TEXT NOT NULL
-            )
-        """)
-        await db.commit()
-
-        repo = DetectionRepository(db)
-        
-        # Test Create
-        dt = datetime(2023, 1, 1, 12, 0, 0)
-        detection = Detection(
-            detection_time=dt,
-            detection_index=1,
-            score=0.9,
-            display_name="Bird",
-            category_name="Bird",
-            frigate_event="evt_1",
-            camera_name="cam_1"
-        )
-        await repo.create(detection)
-        
-        # Test Get
-        fetched = await repo.get_by_frigate_event("evt_1")
-        assert fetched is not None
-        assert fetched.frigate_event == "evt_1"
-        assert fetched.score == 0.9
-        # Check datetime handling if sqlite returns string
-        # assert fetched.detection_time == dt # Might fail if format differs slightly, but checks object presence
-        
-        # Test Update
-        detection.score = 0.95
-        await repo.update(detection)
-        
-        fetched_updated = await repo.get_by_frigate_event("evt_1")
-        assert fetched_updated.score == 0.95
+async def test_time_range_sort_and_buckets(repo, make_detection):
+    times = [
+        datetime(2024, 3, 3, 7, 15),   # Sunday
+        datetime(2024, 3, 4, 7, 45),   # Monday
+        datetime(2024, 3, 4, 18, 5),
+        datetime(2024, 4, 10, 23, 59),  # Wednesday
+    ]
+    for n, dt in enumerate(times):
+        await repo.create(make_detection(f"evt_{n}", dt))
+
+    in_range = await repo.get_all(start_date=datetime(2024, 3, 4), end_date=datetime(2024, 3, 4, 23, 59))
+    assert [d.detection_time for d in in_range] == [times[2], times[1]]
+    assert await repo.get_count(start_date=datetime(2024, 3, 4)) == 3
+    oldest = await repo.get_all(sort="oldest", limit=1)
+    assert oldest[0].detection_time == times[0]
+    assert await repo.get_oldest_detection_date() == times[0]
+
+    hourly = await repo.get_hourly_distribution("Cardinal")
+    assert hourly[7] == 2 and hourly[18] == 1 and hourly[23] == 1
+    daily = await repo.get_daily_distribution("Cardinal")
+    assert daily[0] == 1 and daily[1] == 2 and daily[3] == 1
+    monthly = await repo.get_monthly_distribution("Cardinal")
+    assert monthly[2] == 3 and monthly[3] == 1
+
+    assert await repo.delete_older_than(datetime(2024, 3, 4)) == 1
+
+
+@pytest.mark.asyncio
+async def test_species_stats_use_each_detections_offset(repo, make_detection):
+    # Recorded in UTC+09:30, whatever this system's time zone is
+    adelaide = timezone(timedelta(hours=9, minutes=30))
+    await repo.create(make_detection("evt_1", datetime(2024, 1, 1, 6, 0, tzinfo=adelaide)))
+    await repo.create(make_detection("evt_2", datetime(2024, 1, 2, 23, 30, tzinfo=adelaide)))
+
+    stats = await repo.get_species_basic_stats("Cardinal")
+    assert stats["first_seen"] == datetime(2024, 1, 1, 6, 0)
+    assert stats["last_seen"] == datetime(2024, 1, 2, 23, 30)
+    assert (await repo.get_hourly_distribution("Cardinal"))[23] == 1
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+
+from app.database import get_db, get_read_db
+from app.repositories.detection_repository import DetectionRepository
+from app.services.detection_writer import DetectionWriter
+
+
+async def _stored(event_id: str):
+    async with get_read_db() as db:
+        return await DetectionRepository(db).get_by_frigate_event(event_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_one_transaction(db_path, make_detection):
+    writer = DetectionWriter(max_batch_size=64, max_wait_ms=20)
+
+    await asyncio.gather(*(writer.insert(make_detection(f"e{i}")) for i in range(10)))
+
+    assert writer.batches == 1
+    assert writer.writes == 10
+    async with get_read_db() as db:
+        assert await DetectionRepository(db).get_count() == 10
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_written_without_waiting(db_path, make_detection):
+    writer = DetectionWriter(max_batch_size=4, max_wait_ms=60_000)
+
+    await asyncio.wait_for(
+        asyncio.gather(*(writer.insert(make_detection(f"e{i}")) for i in range(8))), timeout=5)
+
+    assert writer.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_upsert_creates_improves_and_keeps(db_path, make_detection):
+    writer = DetectionWriter(max_wait_ms=0)
+
+    assert await writer.upsert(make_detection("a", score=0.7)) == "created"
+    assert await writer.upsert(make_detection("a", score=0.9)) == "updated"
+    assert await writer.upsert(make_detection("a", score=0.8, has_clip=True)) == "unchanged"
+
+    stored = await _stored("a")
+    assert stored.score == 0.9
+    assert stored.has_clip is True
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_is_one_statement_per_detection(db_path, make_detection):
+    async with get_db() as db:
+        repo = DetectionRepository(db)
+        await repo.create(make_detection("old", score=0.8))
+        await repo.create(make_detection("newest", score=0.8))  # last insert on this connection
+
+        outcomes = await repo.upsert_many([
+            make_detection("new", score=0.7),
+            make_detection("old", score=0.6, has_clip=True),
+            make_detection("newest", score=0.95),
+            make_detection("new", score=0.75),  # same event again within the batch
+        ])
+
+    assert outcomes == ["created", "unchanged", "updated", "updated"]
+    assert (await _stored("new")).score == 0.75
+    old = await _stored("old")
+    assert old.score == 0.8
+    assert old.has_clip is True
+    assert (await _stored("newest")).score == 0.95
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_sink_its_batch(db_path, make_detection):
+    writer = DetectionWriter(max_wait_ms=20)
+    await writer.insert(make_detection("dup"))
+
+    results = await asyncio.gather(
+        writer.insert(make_detection("x")),
+        writer.insert(make_detection("dup")),  # UNIQUE(frigate_event)
+        writer.insert(make_detection("y")),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], Exception)
+    assert writer.failed == 1
+    assert await _stored("x") is not None
+    assert await _stored("y") is not None
+
+
+@pytest.mark.asyncio
+async def test_hide_and_delete_report_their_outcome(db_path, make_detection):
+    writer = DetectionWriter(max_wait_ms=0)
+    await writer.insert(make_detection("a"))
+
+    assert await writer.toggle_hidden("a") is True
+    assert (await _stored("a")).is_hidden is True
+    assert await writer.toggle_hidden("missing") is None
+    assert await writer.delete("a") is True
+    assert await writer.delete("a") is False
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_queued_writes(db_path, make_detection):
+    writer = DetectionWriter(max_batch_size=64, max_wait_ms=60_000)
+    tasks = [asyncio.create_task(writer.insert(make_detection(f"e{i}"))) for i in range(3)]
+    await asyncio.sleep(0)
+    assert writer.pending == 3
+
+    await writer.close()
+
+    assert writer.pending == 0
+    await asyncio.gather(*tasks)
+    async with get_read_db() as db:
+        assert await DetectionRepository(db).get_count() == 3
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import pytest
+from app.services.event_coalescer import EventCoalescer
+
+
+def _payload(event_id: str, msg_type: str, score: float) -> bytes:
+    return json.dumps({"type": msg_type, "after": {"id": event_id, "top_score": score}}).encode()
+
+
+@pytest.fixture
+def handled():
+    return []
+
+
+@pytest.fixture
+def coalescer(handled):
+    async def handler(message):
+        handled.append(message.data)
+
+    return EventCoalescer(handler, quiet_window_ms=20, max_delay_ms=1000)
+
+
+@pytest.mark.asyncio
+async def test_burst_keeps_only_latest_payload(coalescer, handled):
+    for score in (0.5, 0.6, 0.7):
+        await coalescer.submit(_payload("a", "update", score))
+
+    assert handled == []
+    await asyncio.sleep(0.06)
+
+    assert [m["after"]["top_score"] for m in handled] == [0.7]
+    assert coalescer.get_stats()["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_events_are_coalesced_independently(coalescer, handled):
+    await coalescer.submit(_payload("a", "update", 0.5))
+    await coalescer.submit(_payload("b", "update", 0.6))
+    await asyncio.sleep(0.06)
+
+    assert sorted(m["after"]["id"] for m in handled) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_end_message_is_processed_immediately(coalescer, handled):
+    await coalescer.submit(_payload("a", "update", 0.5))
+    await coalescer.submit(_payload("a", "end", 0.9))
+    await asyncio.sleep(0)  # let the dispatch task run
+
+    assert [m["type"] for m in handled] == ["end"]
+    await asyncio.sleep(0.06)
+    # The superseded update is never processed
+    assert len(handled) == 1
+
+
+@pytest.mark.asyncio
+async def test_max_delay_bounds_continuous_updates(handled):
+    async def handler(message):
+        handled.append(message)
+
+    coalescer = EventCoalescer(handler, quiet_window_ms=30, max_delay_ms=60)
+    for _ in range(8):
+        await coalescer.submit(_payload("a", "update", 0.5))
+        await asyncio.sleep(0.015)
+
+    # Updates never went quiet for 30 ms, yet the 60 ms cap forced a dispatch
+    assert len(handled) >= 1
+
+
+@pytest.mark.asyncio
+async def test_receive_time_of_latest_payload_is_handed_on():
+    received = []
+
+    async def handler(message):
+        received.append(message.received_at)
+
+    coalescer = EventCoalescer(handler, quiet_window_ms=20, max_delay_ms=1000)
+    await coalescer.submit(_payload("a", "update", 0.5), received_at=1.0)
+    await coalescer.submit(_payload("a", "update", 0.6), received_at=2.0)
+    await asyncio.sleep(0.06)
+
+    assert received == [2.0]
+
+
+@pytest.mark.asyncio
+async def test_handler_gets_parsed_message(handled):
+    async def handler(message):
+        handled.append(message)
+
+    coalescer = EventCoalescer(handler, quiet_window_ms=0)
+    await coalescer.submit(_payload("a", "update", 0.5), received_at=3.0)
+    await coalescer.submit(b"not json", received_at=4.0)
+    await asyncio.sleep(0)
+
+    assert (handled[0].event_id, handled[0].msg_type, handled[0].received_at) == ("a", "update", 3.0)
+    assert handled[0].after["top_score"] == 0.5
+    # Unparseable payloads pass straight through for the processor to count
+    assert handled[1].data is None and handled[1].payload == b"not json"
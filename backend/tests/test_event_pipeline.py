@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from app.services.event_pipeline import EventJob, EventPipeline, Stage
+
+
+def _job(event_id: str) -> EventJob:
+    return EventJob(
+        frigate_event=event_id,
+        after={"id": event_id},
+        msg_type="update",
+        future=asyncio.get_running_loop().create_future(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_stages_overlap_across_events():
+    active = 0
+    max_active = 0
+
+    async def slow_fetch(job):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return True
+
+    finished = []
+
+    async def record(job):
+        finished.append(job.frigate_event)
+        return False
+
+    pipeline = EventPipeline([
+        Stage("fetch", slow_fetch, concurrency=4, max_queue=16),
+        Stage("record", record, concurrency=1, max_queue=16),
+    ])
+    futures = [await pipeline.submit(_job(str(i))) for i in range(4)]
+
+    started = asyncio.get_running_loop().time()
+    await asyncio.gather(*futures)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    # Four 50 ms fetches ran side by side rather than back-to-back
+    assert max_active == 4
+    assert elapsed < 0.15
+    assert sorted(finished) == ["0", "1", "2", "3"]
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_failing_stage_finishes_job():
+    async def broken(job):
+        raise RuntimeError("boom")
+
+    reached = []
+
+    async def after(job):
+        reached.append(job)
+        return False
+
+    pipeline = EventPipeline([
+        Stage("broken", broken, concurrency=1, max_queue=4),
+        Stage("after", after, concurrency=1, max_queue=4),
+    ])
+    future = await pipeline.submit(_job("x"))
+    await asyncio.wait_for(future, 1)
+
+    assert reached == []
+    stats = pipeline.get_stats()
+    assert stats["completed"] == 1
+    assert stats["stages"]["broken"]["failed"] == 1
+    await pipeline.stop()
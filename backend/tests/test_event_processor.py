@@ -1,38 +1,152 @@
+import asyncio
+import time
 import pytest
+import pytest_asyncio
+from io import BytesIO
 from unittest.mock import AsyncMock, MagicMock
+from PIL import Image
 from app.services.event_processor import EventProcessor
+from app.services.metrics import detection_latency
 
-@pytest.mark.asyncio
-async def test_process_mqtt_message_valid_bird():
-    # Mock classifier
+
+def _jpeg_bytes() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (32, 32), color=(200, 30, 30)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest_asyncio.fixture
+async def processor():
+    """EventProcessor with a mocked classifier (Cardinal, 0.95) and Frigate client serving a JPEG.
+
+    Database writes and Frigate sublabels are mocked out; the pipeline is closed afterwards.
+    """
     classifier = MagicMock()
-    classifier.classify.return_value = [{"label": "Cardinal", "score": 0.95, "index": 1}]
-    
-    # Mock EventProcessor methods/dependencies
-    processor = EventProcessor(classifier)
-    processor.http_client.get = AsyncMock()
-    processor.http_client.get.return_value = MagicMock(status_code=200, content=b"fakeimage")
-    processor.http_client.post = AsyncMock()
-    
-    # Mock DB interaction (This is harder without dependency injection or mocking get_db)
-    # Ideally checking side effects or using a test DB. 
-    # For unit test, we might want to mock the _save_detection method if we can't easily mock the context manager.
-    processor._save_detection = AsyncMock() 
+    classifier.classify_prepared_async = AsyncMock(return_value=[{"label": "Cardinal", "score": 0.95, "index": 1}])
+    frigate = MagicMock()
+    frigate.get_snapshot = AsyncMock(return_value=MagicMock(status_code=200, content=_jpeg_bytes()))
+    processor = EventProcessor(classifier, frigate=frigate)
+    processor._save_detections = AsyncMock()
     processor._set_sublabel = AsyncMock()
+    yield processor
+    await processor.close()
+
 
+@pytest.mark.asyncio
+async def test_process_mqtt_message_valid_bird(processor):
     payload = b'{"after": {"id": "123", "label": "bird", "camera": "cam1", "start_time": 1700000000}}'
-    
+
     await processor.process_mqtt_message(payload)
-    
-    processor._save_detection.assert_called_once()
+
+    processor._save_detections.assert_awaited_once()
     processor._set_sublabel.assert_called_with("123", "Cardinal")
 
+
 @pytest.mark.asyncio
-async def test_process_mqtt_message_ignore_non_bird():
-    classifier = MagicMock()
-    processor = EventProcessor(classifier)
-    
+async def test_process_mqtt_message_ignore_non_bird(processor):
     payload = b'{"after": {"id": "124", "label": "person", "camera": "cam1"}}'
     await processor.process_mqtt_message(payload)
-    
-    classifier.classify.assert_not_called()
+
+    processor.classifier.prepare_snapshot.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_snapshot_updates_are_skipped(processor):
+    def message(msg_type, snapshot_time):
+        return (
+            '{"type": "%s", "after": {"id": "200", "label": "bird", "camera": "cam1", '
+            '"start_time": 1700000000, "has_snapshot": true, "snapshot_time": %s, "top_score": 0.8}}'
+            % (msg_type, snapshot_time)
+        ).encode()
+
+    await processor.process_mqtt_message(message("new", 1700000001.0))
+    await processor.process_mqtt_message(message("update", 1700000001.0))
+    await processor.process_mqtt_message(message("update", 1700000001.0))
+    await processor.process_mqtt_message(message("update", 1700000005.0))
+
+    assert processor.frigate.get_snapshot.await_count == 2
+    assert processor.classifier.classify_prepared_async.await_count == 2
+    assert processor.get_stats()["snapshots_skipped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_events_without_snapshot_are_not_fetched(processor):
+    payload = b'{"after": {"id": "201", "label": "bird", "camera": "cam1", "has_snapshot": false}}'
+    await processor.process_mqtt_message(payload)
+
+    processor.frigate.get_snapshot.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_processed_event_records_stage_latencies(processor):
+    detection_latency.reset()
+
+    payload = b'{"after": {"id": "300", "label": "bird", "camera": "cam1", "start_time": 1700000000}}'
+    await processor.process_mqtt_message(payload)
+    await processor.close()
+
+    stages = detection_latency.get_stats()["live"]
+    for stage in ("intake", "fetch", "persist", "sublabel", "broadcast", "total"):
+        assert stages[stage]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_trace_starts_at_mqtt_receive_time(processor):
+    detection_latency.reset()
+
+    payload = b'{"after": {"id": "301", "label": "bird", "camera": "cam1", "start_time": 1700000000}}'
+    # Received 200 ms ago, e.g. held back by the coalescer and intake queue
+    await processor.process_mqtt_message(payload, received_at=time.perf_counter() - 0.2)
+    await processor.close()
+
+    stages = detection_latency.get_stats()["live"]
+    assert stages["intake"]["max"] >= 200.0
+    assert stages["total"]["max"] >= 200.0
+
+
+@pytest.mark.asyncio
+async def test_end_message_records_clip_availability(processor):
+    processor._save_clip_availability = AsyncMock()
+
+    def message(msg_type, has_clip):
+        return (
+            '{"type": "%s", "after": {"id": "400", "label": "bird", "camera": "cam1", "start_time": 1700000000, '
+            '"has_snapshot": true, "snapshot_time": 1700000001.0, "has_clip": %s}}' % (msg_type, has_clip)
+        ).encode()
+
+    await processor.process_mqtt_message(message("new", "false"))
+    # Persisted detections carry has_clip from the payload
+    saved_after = processor._save_detections.await_args.args[0][0][0]
+    assert saved_after["has_clip"] is False
+
+    # The end message repeats the snapshot, so only the clip flag is stored
+    await processor.process_mqtt_message(message("end", "true"))
+    processor._save_clip_availability.assert_awaited_once_with("400", True)
+    assert processor._save_detections.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_updates_classify_once(processor):
+    payload = (b'{"type": "update", "after": {"id": "500", "label": "bird", "camera": "cam1", '
+               b'"start_time": 1700000000, "snapshot_time": 1700000001.0, "top_score": 0.8}}')
+    # The second copy arrives while the first is still in the pipeline
+    await asyncio.gather(processor.process_mqtt_message(payload), processor.process_mqtt_message(payload))
+
+    assert processor.frigate.get_snapshot.await_count == 1
+    assert processor.classifier.classify_prepared_async.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_lets_the_snapshot_be_retried(processor):
+    processor.frigate.get_snapshot.side_effect = [
+        MagicMock(status_code=500, content=b""),
+        MagicMock(status_code=200, content=_jpeg_bytes()),
+    ]
+
+    payload = (b'{"type": "update", "after": {"id": "501", "label": "bird", "camera": "cam1", '
+               b'"start_time": 1700000000, "snapshot_time": 1700000001.0, "top_score": 0.8}}')
+    await processor.process_mqtt_message(payload)
+    await processor.process_mqtt_message(payload)
+
+    assert processor.frigate.get_snapshot.await_count == 2
+    processor.classifier.classify_prepared_async.assert_awaited_once()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import pytest
+from app.services.event_coalescer import EventMessage
+from app.services.event_queue import EventQueue
+
+
+def _message(event_id: str, msg_type: str = "update", received_at: float = None) -> EventMessage:
+    return EventMessage.parse(json.dumps({"type": msg_type, "after": {"id": event_id}}).encode(), received_at)
+
+
+class BlockingHandler:
+    """Handler that holds every call until released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.handled = []
+
+    async def __call__(self, message: EventMessage):
+        await self.release.wait()
+        self.handled.append(message.event_id)
+
+
+@pytest.mark.asyncio
+async def test_put_does_not_wait_for_processing():
+    handler = BlockingHandler()
+    queue = EventQueue(handler, max_size=10, workers=1)
+
+    for i in range(5):
+        assert await queue.put(_message(str(i)))
+
+    await asyncio.sleep(0)
+    # One event is with the worker, the rest wait in the queue
+    assert queue.get_stats()["active"] == 1
+    assert queue.depth == 4
+
+    handler.release.set()
+    await queue.stop()
+    assert handler.handled == ["0", "1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_overflow_drops_oldest_update():
+    handler = BlockingHandler()
+    queue = EventQueue(handler, max_size=2, workers=1)
+
+    await queue.put(_message("busy"))
+    await asyncio.sleep(0)  # worker picks it up and blocks
+    await queue.put(_message("a"))
+    await queue.put(_message("b"))
+    await queue.put(_message("c"))
+
+    assert queue.get_stats()["dropped"] == 1
+
+    handler.release.set()
+    await queue.stop()
+    assert handler.handled == ["busy", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_end_messages_are_never_dropped():
+    handler = BlockingHandler()
+    queue = EventQueue(handler, max_size=2, workers=1)
+
+    await queue.put(_message("busy"))
+    await asyncio.sleep(0)
+    await queue.put(_message("e1", "end"))
+    await queue.put(_message("e2", "end"))
+
+    # Queue is full of 'end' messages: updates are turned away...
+    assert not await queue.put(_message("u1"))
+    # ...but another 'end' is still accepted
+    assert await queue.put(_message("e3", "end"))
+
+    handler.release.set()
+    await queue.stop()
+    assert handler.handled == ["busy", "e1", "e2", "e3"]
+    assert queue.get_stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_handler_errors_do_not_stop_workers():
+    handled = []
+
+    async def handler(message: EventMessage):
+        event_id = message.event_id
+        if event_id == "bad":
+            raise RuntimeError("boom")
+        handled.append(event_id)
+
+    queue = EventQueue(handler, max_size=10, workers=2)
+    await queue.put(_message("bad"))
+    await queue.put(_message("good"))
+    await queue.stop()
+
+    stats = queue.get_stats()
+    assert handled == ["good"]
+    assert stats["failed"] == 1
+    assert stats["processed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_receive_time_is_passed_to_handler():
+    received = {}
+
+    async def handler(message: EventMessage):
+        received[message.event_id] = message.received_at
+
+    queue = EventQueue(handler, max_size=10, workers=1)
+    await queue.put(_message("a", received_at=12.5))
+    await queue.stop()
+
+    assert received == {"a": 12.5}
@@ -0,0 +1,143 @@
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.frigate_client import (
+    ADAPTIVE_MIN_SAMPLES,
+    ADAPTIVE_MIN_TIMEOUT,
+    ADAPTIVE_WINDOW,
+    ENDPOINT_TIMEOUTS,
+    FrigateClient,
+    FrigateUnavailableError,
+    get_frigate_client,
+)
+
+
+@pytest.fixture
+def frigate_settings():
+    original = (settings.frigate.frigate_url, settings.frigate.frigate_auth_token)
+    settings.frigate.frigate_url = "http://frigate.test:5000"
+    settings.frigate.frigate_auth_token = "secret"
+    yield settings.frigate
+    settings.frigate.frigate_url, settings.frigate.frigate_auth_token = original
+
+
+def _client_with(handler) -> FrigateClient:
+    frigate = FrigateClient(http2=False)
+    frigate._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return frigate
+
+
+def test_shared_instance():
+    assert get_frigate_client() is get_frigate_client()
+
+
+def test_headers_include_auth_token(frigate_settings):
+    frigate = FrigateClient(http2=False)
+    assert frigate.headers() == {"Authorization": "Bearer secret"}
+    assert frigate.headers({"Range": "bytes=0-1"})["Range"] == "bytes=0-1"
+
+    frigate_settings.frigate_auth_token = None
+    assert frigate.headers() == {}
+
+
+def test_endpoint_timeouts():
+    frigate = FrigateClient(http2=False)
+    assert frigate.timeout("event").read == ENDPOINT_TIMEOUTS["event"]
+    assert frigate.timeout("clip").read == ENDPOINT_TIMEOUTS["clip"]
+    assert frigate.timeout("unknown").read == ENDPOINT_TIMEOUTS["default"]
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_one_client_with_current_settings(frigate_settings):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, content=b"jpeg")
+
+    frigate = _client_with(handler)
+    pooled = frigate.client
+
+    await frigate.get_snapshot("abc")
+    frigate_settings.frigate_url = "http://other:5000"
+    await frigate.set_sub_label("abc", "A very long species name indeed")
+
+    assert frigate.client is pooled
+    assert str(seen[0].url) == "http://frigate.test:5000/api/events/abc/snapshot.jpg?crop=1&quality=95"
+    assert seen[0].headers["Authorization"] == "Bearer secret"
+    assert seen[0].extensions["timeout"]["read"] == ENDPOINT_TIMEOUTS["snapshot"]
+    assert str(seen[1].url) == "http://other:5000/api/events/abc/sub_label"
+    assert seen[1].content == b'{"subLabel": "A very long species "}'
+    await frigate.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_recreated_after_close():
+    frigate = FrigateClient(http2=False)
+    first = frigate.client
+    await frigate.aclose()
+    assert first.is_closed
+    assert frigate.client is not first
+    await frigate.aclose()
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_fails_fast(frigate_settings):
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("refused", request=request)
+
+    frigate = _client_with(handler)
+    frigate.breaker.failure_threshold = 3
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            await frigate.get_event("abc")
+
+    with pytest.raises(FrigateUnavailableError):
+        await frigate.get_event("abc")
+    # Existing "cannot reach Frigate" handlers catch the fail-fast error too
+    assert issubclass(FrigateUnavailableError, httpx.RequestError)
+    assert calls == 3
+    assert frigate.get_stats()["circuit"]["state"] == "open"
+    await frigate.aclose()
+
+
+@pytest.mark.asyncio
+async def test_server_errors_count_as_failures(frigate_settings):
+    frigate = _client_with(lambda request: httpx.Response(503))
+    frigate.breaker.failure_threshold = 2
+    for _ in range(2):
+        assert (await frigate.get_event("abc")).status_code == 503
+    with pytest.raises(FrigateUnavailableError):
+        await frigate.get_event("abc")
+
+    # Client errors (e.g. unknown event) mean Frigate is healthy
+    frigate = _client_with(lambda request: httpx.Response(404))
+    frigate.breaker.failure_threshold = 1
+    for _ in range(3):
+        assert (await frigate.get_event("abc")).status_code == 404
+    assert frigate.breaker.state == "closed"
+    await frigate.aclose()
+
+
+@pytest.mark.asyncio
+async def test_timeouts_adapt_to_observed_latency(frigate_settings):
+    frigate = _client_with(lambda request: httpx.Response(200))
+    for _ in range(ADAPTIVE_MIN_SAMPLES - 1):
+        await frigate.get_snapshot("abc")
+    assert frigate.timeout("snapshot").read == ENDPOINT_TIMEOUTS["snapshot"]
+
+    await frigate.get_snapshot("abc")
+    # Fast responses shrink the timeout down to the floor
+    assert frigate.timeout("snapshot").read == ADAPTIVE_MIN_TIMEOUT
+    assert frigate.timeout("clip").read == ENDPOINT_TIMEOUTS["clip"]
+
+    # Slow responses push it back up, never beyond the configured ceiling
+    for _ in range(ADAPTIVE_WINDOW):
+        frigate._record_latency("snapshot", 60.0)
+    assert frigate.timeout("snapshot").read == ENDPOINT_TIMEOUTS["snapshot"]
+    await frigate.aclose()
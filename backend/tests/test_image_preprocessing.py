@@ -0,0 +1,48 @@
+import numpy as np
+from io import BytesIO
+from PIL import Image
+from app.services.image_preprocessing import resize_to_input
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 // width, y * 255 // height, np.full_like(x, 128)], axis=-1).astype(np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def test_jpeg_is_decoded_at_reduced_size():
+    image = Image.open(BytesIO(_jpeg(1920, 1080)))
+    pixels = resize_to_input(image, (224, 224))
+
+    assert pixels.shape == (224, 224, 3)
+    assert pixels.dtype == np.uint8
+    # Draft mode picked a DCT-scaled decode instead of the full 1920x1080
+    assert image.size[0] < 1920
+
+
+def test_writes_into_preallocated_buffer():
+    batch = np.zeros((2, 224, 224, 3), dtype=np.uint8)
+    result = resize_to_input(Image.open(BytesIO(_jpeg(640, 480))), (224, 224), out=batch[1])
+
+    assert result is batch[1] or np.shares_memory(result, batch)
+    assert batch[1].any()
+    assert not batch[0].any()
+
+
+def test_fast_path_matches_full_decode():
+    data = _jpeg(1280, 960)
+    reference = np.asarray(
+        Image.open(BytesIO(data)).convert("RGB").resize((224, 224), Image.Resampling.LANCZOS),
+        dtype=np.float32
+    )
+    fast = resize_to_input(Image.open(BytesIO(data)), (224, 224)).astype(np.float32)
+
+    assert np.abs(reference - fast).mean() < 3.0
+
+
+def test_non_rgb_images_are_converted():
+    pixels = resize_to_input(Image.new("L", (50, 60), color=200), (32, 32))
+    assert pixels.shape == (32, 32, 3)
+    assert (pixels == 200).all()
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import pytest
+from app.services.inference_executor import InferenceExecutor
+
+
+@pytest.mark.asyncio
+async def test_run_executes_off_event_loop():
+    executor = InferenceExecutor(max_workers=1, max_queue=4)
+    loop_thread = threading.get_ident()
+
+    try:
+        thread_id = await executor.run(threading.get_ident)
+        assert thread_id != loop_thread
+
+        stats = executor.get_stats()
+        assert stats["completed"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["active"] == 0
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_errors_and_counts_failures():
+    executor = InferenceExecutor(max_workers=1, max_queue=4)
+
+    def boom():
+        raise ValueError("bad image")
+
+    try:
+        with pytest.raises(ValueError):
+            await executor.run(boom)
+        assert executor.get_stats()["failed"] == 1
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_loop_stays_responsive_during_inference():
+    executor = InferenceExecutor(max_workers=1, max_queue=4)
+    release = threading.Event()
+
+    try:
+        job = asyncio.create_task(executor.run(release.wait, 5))
+        # The loop keeps scheduling other coroutines while the job blocks its thread
+        await asyncio.sleep(0.01)
+        assert not job.done()
+        release.set()
+        assert await job is True
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_leave_queue_depth_consistent():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    try:
+        busy = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        # Waits for the only slot, then is cancelled
+        waiter = asyncio.create_task(executor.run(lambda: None))
+        await asyncio.sleep(0.05)
+        assert executor.queue_depth == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert executor.queue_depth == 0
+
+        release.set()
+        await busy
+        assert executor.get_stats()["queue_depth"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
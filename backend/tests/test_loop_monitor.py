@@ -0,0 +1,41 @@
+import asyncio
+import time
+import pytest
+from app.services.loop_monitor import LoopLagMonitor
+
+
+def blocking_helper():
+    # Stands in for PIL decode / inference running on the event loop
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_recorded_with_blocking_stack():
+    monitor = LoopLagMonitor(interval_ms=20, threshold_ms=50)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_helper()
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    stats = monitor.get_stats()
+    assert stats["stalls"] == 1
+    assert stats["lag_ms"]["max"] >= 200
+    offender = stats["top_offenders"][0]
+    assert offender["count"] == 1
+    assert any("blocking_helper" in frame for frame in offender["stack"])
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_has_no_stalls():
+    monitor = LoopLagMonitor(interval_ms=10, threshold_ms=100)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    stats = monitor.get_stats()
+    assert stats["stalls"] == 0
+    assert stats["lag_ms"]["count"] >= 5
+    assert not monitor.running
@@ -0,0 +1,80 @@
+from app.services.metrics import Histogram, LatencyHistograms
+
+
+def test_histogram_counts_and_quantiles():
+    histogram = Histogram(buckets=(10, 20, 50, 100))
+    for value in [5] * 50 + [15] * 40 + [80] * 10:
+        histogram.observe(value)
+
+    stats = histogram.get_stats()
+    assert stats["count"] == 100
+    assert stats["avg"] == (5 * 50 + 15 * 40 + 80 * 10) / 100
+    assert stats["max"] == 80
+    # Median falls in the first bucket, p95 in the (50, 100] bucket
+    assert 0 < stats["p50"] <= 10
+    assert 50 < stats["p95"] <= 100
+
+
+def test_histogram_cumulative_counts_end_with_inf():
+    histogram = Histogram(buckets=(1, 10))
+    for value in (0.5, 5, 500):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [(1, 1), (10, 2), (float("inf"), 3)]
+
+
+def test_latency_histograms_are_keyed_by_source_and_stage():
+    histograms = LatencyHistograms()
+    histograms.observe("live", "fetch", 12.0)
+    histograms.observe("live", "fetch", 14.0)
+    histograms.observe("backfill", "inference", 30.0)
+
+    stats = histograms.get_stats()
+    assert stats["live"]["fetch"]["count"] == 2
+    assert stats["backfill"]["inference"]["count"] == 1
+    assert list(histograms.get_stats("live")) == ["live"]
+
+
+def test_registry_renders_prometheus_text():
+    from app.services.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests", ("status",))
+    latency = registry.histogram("app_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("app_queue_depth", "Depth", ("queue",), callback=lambda: {"a": 3, "b": 0})
+
+    requests.inc("200")
+    requests.inc("200")
+    requests.inc("500")
+    latency.observe(0.05)
+    latency.observe(2.0)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE app_requests_total counter" in lines
+    assert 'app_requests_total{status="200"} 2' in lines
+    assert 'app_requests_total{status="500"} 1' in lines
+    assert 'app_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'app_latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "app_latency_seconds_count 2" in lines
+    assert 'app_queue_depth{queue="a"} 3' in lines
+
+
+def test_instrument_methods_times_public_coroutines():
+    import asyncio
+    from app.services.metrics import HistogramMetric, instrument_methods
+
+    histogram = HistogramMetric("repo_seconds", "Repo latency", ("method",))
+
+    @instrument_methods(histogram, "Repo")
+    class Repo:
+        async def fetch(self):
+            return 42
+
+        async def _private(self):
+            return 0
+
+    assert asyncio.run(Repo().fetch()) == 42
+    asyncio.run(Repo()._private())
+
+    assert histogram.labels("Repo.fetch").count == 1
+    assert 'method="Repo._private"' not in "\n".join(histogram.collect())
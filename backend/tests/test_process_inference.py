@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from app.services import process_inference
+from app.services.process_inference import ProcessInferencePool
+
+
+class FakeWorkerModel:
+    """Stand-in for a worker's ModelInstance: labels each image by its brightest channel."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def classify_pixels(self, pixels):
+        labels = ["red", "green", "blue"]
+        return [[{"label": labels[int(p.mean(axis=(0, 1)).argmax())], "score": 1.0}] for p in pixels]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Threads instead of spawned processes; the shared-memory hand-off is the same
+    def init_worker(name, model_path, labels_path, num_threads):
+        process_inference._worker_model = FakeWorkerModel(name)
+
+    monkeypatch.setattr(process_inference, "_init_worker", init_worker)
+    monkeypatch.setattr(
+        process_inference, "ProcessPoolExecutor",
+        lambda max_workers, mp_context, initializer, initargs: ThreadPoolExecutor(
+            max_workers, initializer=initializer, initargs=initargs),
+    )
+    pool = ProcessInferencePool("bird", "model.tflite", "labels.txt",
+                                image_shape=(4, 4, 3), workers=2, max_batch_size=3, slot_timeout=0.05)
+    yield pool
+    pool.shutdown()
+
+
+def test_slots_round_trip(pool):
+    assert pool.get_stats()["free_slots"] == 3
+
+    slot = pool.acquire_slot()
+    slot.view(2)[...] = 7
+    assert pool.get_stats()["free_slots"] == 2
+    pool.release_slot(slot)
+
+    # Slots are reused, contents and all
+    slots = [pool.acquire_slot() for _ in range(3)]
+    assert slot in slots
+    assert (slot.view(2) == 7).all()
+    for s in slots:
+        pool.release_slot(s)
+
+
+def test_acquire_slot_times_out_when_all_in_use(pool):
+    slots = [pool.acquire_slot() for _ in range(3)]
+
+    with pytest.raises(TimeoutError):
+        pool.acquire_slot()
+
+    pool.release_slot(slots[0])
+    assert pool.acquire_slot(timeout=0) is slots[0]
+
+
+@pytest.mark.asyncio
+async def test_worker_classifies_pixels_from_shared_memory(pool):
+    slot = pool.acquire_slot()
+    view = slot.view(2)
+    view[...] = 0
+    view[0, ..., 2] = 255
+    view[1, ..., 0] = 255
+    del view
+
+    try:
+        results = await pool.classify_slot(slot, 2)
+    finally:
+        pool.release_slot(slot)
+
+    assert [r[0]["label"] for r in results] == ["blue", "red"]
+    assert pool.get_stats()["jobs"] == 1
+
+
+def test_shutdown_frees_shared_memory(pool):
+    names = [slot.shm.name for slot in pool._all_slots]
+
+    pool.shutdown()
+
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+    with pytest.raises(RuntimeError):
+        pool._executor.submit(np.zeros, 1)
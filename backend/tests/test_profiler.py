@@ -0,0 +1,60 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.services.profiler import SamplingProfiler
+
+client = TestClient(app)
+
+
+def busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_profiler_attributes_samples_to_busy_function():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+
+    profiler = SamplingProfiler(interval_ms=2)
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert profiler.samples > 10
+    busy_rows = [row for row in profiler.top_functions(100) if row["function"].startswith("busy_worker")]
+    assert busy_rows and busy_rows[0]["total"] > 0
+
+    collapsed = profiler.collapsed().splitlines()
+    assert any(line.startswith("busy;") and "busy_worker" in line for line in collapsed)
+    # Each line is "frame;frame;... count"
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed)
+
+
+@pytest.fixture
+def profiler_enabled(monkeypatch):
+    monkeypatch.setattr(settings.diagnostics, "profiler_enabled", True)
+
+
+def test_profile_endpoint_is_disabled_by_default():
+    response = client.post("/api/debug/profile", params={"seconds": 0.2})
+    assert response.status_code == 403
+
+
+def test_profile_endpoint_returns_table_and_collapsed_stacks(profiler_enabled):
+    response = client.post("/api/debug/profile", params={"seconds": 0.2, "interval_ms": 5})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["samples"] > 0
+    assert isinstance(data["top_functions"], list)
+    assert isinstance(data["collapsed"], str)
+
+
+def test_profile_endpoint_rejects_long_windows(profiler_enabled):
+    response = client.post("/api/debug/profile", params={"seconds": 100000})
+    assert response.status_code == 400
@@ -1,7 +1,8 @@
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import patch, MagicMock, AsyncMock, PropertyMock
 from app.main import app
 from app.config import settings
+from app.services.frigate_client import FrigateClient
 import pytest
 
 client = TestClient(app)
@@ -87,12 +88,11 @@ def test_proxy_clip_enabled(mock_frigate_response):
     original_setting = settings.frigate.clips_enabled
     settings.frigate.clips_enabled = True
 
-    with patch("app.routers.proxy.httpx.AsyncClient") as MockClient:
+    with patch.object(FrigateClient, "client", new_callable=PropertyMock) as client_property:
         mock_client = MagicMock()
         mock_client.build_request = MagicMock()
         mock_client.send = AsyncMock(return_value=mock_frigate_response)
-        mock_client.aclose = AsyncMock()
-        MockClient.return_value = mock_client
+        client_property.return_value = mock_client
 
         try:
             response = client.get("/api/frigate/test_event_id/clip.mp4")
@@ -108,12 +108,11 @@ def test_proxy_clip_range_header_forwarded(mock_frigate_partial_response):
     original_setting = settings.frigate.clips_enabled
     settings.frigate.clips_enabled = True
 
-    with patch("app.routers.proxy.httpx.AsyncClient") as MockClient:
+    with patch.object(FrigateClient, "client", new_callable=PropertyMock) as client_property:
         mock_client = MagicMock()
         mock_client.build_request = MagicMock()
         mock_client.send = AsyncMock(return_value=mock_frigate_partial_response)
-        mock_client.aclose = AsyncMock()
-        MockClient.return_value = mock_client
+        client_property.return_value = mock_client
 
         try:
             response = client.get(
@@ -127,6 +126,7 @@ def test_proxy_clip_range_header_forwarded(mock_frigate_partial_response):
             call_args = mock_client.build_request.call_args
             request_headers = call_args[1]["headers"] if "headers" in call_args[1] else call_args[0][2] if len(call_args[0]) > 2 else {}
             # The Range header should have been included
+            assert request_headers.get("Range") == "bytes=0-999"
         finally:
             settings.frigate.clips_enabled = original_setting
 
@@ -140,12 +140,11 @@ def test_proxy_clip_404_from_frigate():
     mock_response.status_code = 404
     mock_response.aclose = AsyncMock()
 
-    with patch("app.routers.proxy.httpx.AsyncClient") as MockClient:
+    with patch.object(FrigateClient, "client", new_callable=PropertyMock) as client_property:
         mock_client = MagicMock()
         mock_client.build_request = MagicMock()
         mock_client.send = AsyncMock(return_value=mock_response)
-        mock_client.aclose = AsyncMock()
-        MockClient.return_value = mock_client
+        client_property.return_value = mock_client
 
         try:
             response = client.get("/api/frigate/test_event_id/clip.mp4")
@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime
+
+from app.repositories.detection_repository import DetectionRepository
+
+
+async def _plans(repo: DetectionRepository, call) -> list[str]:
+    """Run a repository call and return the EXPLAIN QUERY PLAN of each SELECT it issued."""
+    statements = []
+    await repo.db.set_trace_callback(statements.append)
+    try:
+        await call
+    finally:
+        await repo.db.set_trace_callback(None)
+
+    plans = []
+    for sql in statements:
+        if not sql.lstrip().upper().startswith("SELECT"):
+            continue
+        async with repo.db.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+            plans.append(" | ".join(row[3] for row in await cursor.fetchall()))
+    return plans
+
+
+async def _plan(repo: DetectionRepository, call) -> str:
+    plans = await _plans(repo, call)
+    assert len(plans) == 1, plans
+    return plans[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["newest", "oldest"])
+async def test_visible_list_walks_partial_time_index(repo, sort):
+    plan = await _plan(repo, repo.get_all(sort=sort))
+    assert "idx_detections_visible_time" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_visible_list_by_confidence_walks_score_index(repo):
+    plan = await _plan(repo, repo.get_all(sort="confidence"))
+    assert "idx_detections_visible_score" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_time_range_count_is_index_only(repo):
+    plan = await _plan(repo, repo.get_count(start_date=datetime(2024, 1, 1), end_date=datetime(2024, 2, 1)))
+    assert "COVERING INDEX idx_detections_visible_time" in plan
+    assert "detection_time>? AND detection_time<?" in plan
+
+
+@pytest.mark.asyncio
+async def test_species_and_camera_filters_use_composite_indexes(repo):
+    plan = await _plan(repo, repo.get_all(species="Robin", start_date=datetime(2024, 1, 1)))
+    assert "idx_detections_species_time (display_name=? AND detection_time>?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = await _plan(repo, repo.get_all(camera="cam1"))
+    assert "idx_detections_camera_time (camera_name=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = await _plan(repo, repo.get_recent_by_species("Robin"))
+    assert "idx_detections_species_time" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_species_stats_are_index_only(repo):
+    for call in (
+        repo.get_species_basic_stats("Robin"),
+        repo.get_hourly_distribution("Robin"),
+        repo.get_daily_distribution("Robin"),
+        repo.get_monthly_distribution("Robin"),
+    ):
+        assert "COVERING INDEX idx_detections_species_time (display_name=?)" in await _plan(repo, call)
+
+
+@pytest.mark.asyncio
+async def test_hidden_and_unfiltered_queries(repo):
+    assert "idx_detections_hidden_time" in await _plan(repo, repo.get_hidden_count())
+    plan = await _plan(repo, repo.get_all(include_hidden=True))
+    assert "idx_detections_time" in plan
+    assert "TEMP B-TREE" not in plan
+    assert "COVERING INDEX idx_detections_time" in await _plan(repo, repo.delete_older_than(datetime(2024, 1, 1)))
+
+
+@pytest.mark.asyncio
+async def test_clip_check_candidates_use_partial_indexes(repo):
+    plan = await _plan(repo, repo.get_clip_check_candidates(datetime(2024, 1, 1), datetime(2023, 12, 1)))
+    assert "COVERING INDEX idx_detections_clip_pending" in plan
+    assert "COVERING INDEX idx_detections_clip_stale (clip_checked_at<?)" in plan
+    assert "COVERING INDEX idx_detections_clip_missing (detection_time>?)" in plan
+    assert all("USING COVERING INDEX" in step for step in plan.split(" | ") if "detections" in step)
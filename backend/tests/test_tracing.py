@@ -0,0 +1,50 @@
+from app.services.metrics import LatencyHistograms
+from app.services.tracing import DetectionTrace
+
+
+def test_spans_are_measured_between_milestones():
+    trace = DetectionTrace("evt1")
+    trace.marks.update({
+        "fetched": 40.0,
+        "decoded": 45.0,
+        "preprocessed": 47.0,
+        "inferred": 60.0,
+        "persisted": 62.0,
+        "broadcast": 63.0,
+        "sublabel_set": 90.0,
+    })
+
+    assert trace.spans() == {
+        "intake": 0.0,
+        "fetch": 40.0,
+        "decode": 5.0,
+        "preprocess": 2.0,
+        "inference": 13.0,
+        "persist": 2.0,
+        # Sublabel and broadcast both start when the detection is persisted
+        "sublabel": 28.0,
+        "broadcast": 1.0,
+    }
+    assert trace.total_ms == 90.0
+
+
+def test_finish_records_reached_spans_once():
+    histograms = LatencyHistograms()
+    trace = DetectionTrace("evt1", source="backfill")
+    trace.mark("fetched")
+    trace.finish(histograms)
+    trace.finish(histograms)
+
+    stats = histograms.get_stats()["backfill"]
+    assert set(stats) == {"intake", "fetch", "total"}
+    assert stats["fetch"]["count"] == 1
+
+
+def test_intake_span_starts_at_receive_time():
+    import time
+    trace = DetectionTrace("evt1", received_at=time.perf_counter() - 0.5)
+    trace.mark("fetched")
+
+    spans = trace.spans()
+    assert spans["intake"] >= 500.0
+    assert trace.total_ms >= spans["intake"] + spans["fetch"]